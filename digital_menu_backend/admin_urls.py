@@ -0,0 +1,10 @@
+"""
+URLs de l'admin. Aquest mòdul només s'importa quan arriba la primera petició a /admin/, i és llavors
+quan es registren els models (`autodiscover`): els workers que només serveixen l'API no carreguen
+l'admin ni els seus mòduls (exportació i purga de restaurants, etc.) en arrencar.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
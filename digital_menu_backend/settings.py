@@ -37,12 +37,24 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS")
 DATABASES = {
     "default": env.db("DATABASE_URL"),
 }
+# Connexions persistents: els workers reutilitzen les que obre l'escalfament de /readyz
+DATABASES["default"]["CONN_MAX_AGE"] = env.int("DJANGO_CONN_MAX_AGE", default=60)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Bases de dades addicionals per repartir-hi restaurants (p. ex. "shard_1=postgres://...,shard_2=postgres://...").
+# Només se n'hi poden afegir al final: la posició fixa el bloc d'ids de cadascuna (vegeu menu/sharding.py)
+for alias, url in env.dict("DATABASE_SHARDS", default={}).items():
+    DATABASES[alias] = env.db_url_config(url)
+    DATABASES[alias]["CONN_MAX_AGE"] = DATABASES["default"]["CONN_MAX_AGE"]
+    DATABASES[alias]["CONN_HEALTH_CHECKS"] = True
+DATABASE_ROUTERS = ['menu.sharding.TenantRouter']
 
 
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Sense autodiscover en arrencar: els admin.py es carreguen amb la primera petició a /admin/
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -54,15 +66,24 @@ INSTALLED_APPS = [
     'menu',
 ]
 
+# Els workers que només serveixen l'API poden arrencar sense l'admin
+ADMIN_ENABLED = env.bool("DJANGO_ADMIN_ENABLED", default=True)
+if not ADMIN_ENABLED:
+    INSTALLED_APPS.remove('django.contrib.admin.apps.SimpleAdminConfig')
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # Els de Django, però sense fer res a les rutes del menú públic (vegeu menu/pipeline.py)
+    'menu.pipeline.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'menu.pipeline.CsrfViewMiddleware',
+    'menu.pipeline.AuthenticationMiddleware',
+    'menu.pipeline.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Només per a staff amb `X-Profile: 1` o `?_profile=1`
+    'menu.profiling.RequestProfilingMiddleware',
+    'menu.sharding.TenantShardMiddleware',
 ]
 
 CORS_ALLOWED_ORIGINS = [
@@ -141,8 +162,27 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'menu.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Límits a MENU_RATE_LIMITS (vegeu menu/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'menu.throttling.RestaurantRateThrottle',
+        'menu.throttling.ClientRateThrottle',
+    ],
 }
 
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Els fitxers pujats porten el hash del contingut al nom, i es poden guardar a la cache per sempre
+STORAGES = {
+    'default': {'BACKEND': 'menu.media.HashedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# Servir MEDIA_URL des de Django també en producció (vegeu menu/media.py). Amb DJANGO_MEDIA_SENDFILE
+# ("x-accel-redirect" o "x-sendfile") Django només respon les capçaleres i el fitxer l'envia el servidor web.
+MEDIA_SERVE = env.bool("DJANGO_MEDIA_SERVE", default=DEBUG)
+MENU_MEDIA_SENDFILE = env("DJANGO_MEDIA_SENDFILE", default=None)
+MENU_MEDIA_ACCEL_PREFIX = env("DJANGO_MEDIA_ACCEL_PREFIX", default='/protected-media/')
\ No newline at end of file
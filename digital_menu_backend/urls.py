@@ -15,22 +15,28 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.contrib import admin
-from django.urls import path, include
-from menu.views import CustomAuthToken
+import re
+
+from django.urls import path, re_path, include
+from menu.media import serve_media
+from menu.views import CustomAuthToken, healthz, readyz
 from django.conf import settings
-from django.conf.urls.static import static
 from django.http import HttpResponse
 
 def home(request):
     return HttpResponse("Welcome to the Digital Menu API!")
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('menu.urls')),
     path('token-auth/', CustomAuthToken.as_view(), name='token_auth'), # Endpoint para obtener el token
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
     path('', home),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if settings.ADMIN_ENABLED:
+    # L'admin es carrega a la primera petició a /admin/ (vegeu admin_urls.py)
+    urlpatterns.append(path('admin/', ('digital_menu_backend.admin_urls', 'admin', 'admin')))
+
+if settings.MEDIA_SERVE and settings.MEDIA_URL.startswith('/'):
+    urlpatterns.append(re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$', serve_media))
\ No newline at end of file
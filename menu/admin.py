@@ -1,31 +1,284 @@
+import io
+import tempfile
+import zipfile
+
+from django.conf import settings
 from django.contrib import admin
-from .models import Restaurant, RestaurantUser, Category, MenuItem
+from django.contrib.admin.options import IS_POPUP_VAR, TO_FIELD_VAR
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.db.models import Prefetch
+from django.http import FileResponse
+from django.utils.functional import cached_property
+from .models import Restaurant, RestaurantUser, Category, MenuItem, CategoryTranslation, MenuItemTranslation
+from .models import AvailabilityWindow, MenuChange, MenuItemCategory, Brand, MenuItemOverride, DailyMenuStat
+from .models import Order, OrderLine, TenantShard, RequestProfile
+from .tenants import Timer, export_restaurant, purge_restaurant
+
+ADMIN_ESTIMATED_COUNT_ABOVE = getattr(settings, 'MENU_ADMIN_ESTIMATED_COUNT_ABOVE', 100000)
+
+# Paràmetres del changelist que no filtren files
+UNFILTERED_PARAMS = {ORDER_VAR, PAGE_VAR, IS_POPUP_VAR, TO_FIELD_VAR}
+
+
+def estimated_count(model):
+    """
+    Nombre de files de la taula segons les estadístiques de PostgreSQL, o None si no n'hi ha.
+    """
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Amb `estimate`, fa servir el recompte estimat quan la taula té més de
+    `ADMIN_ESTIMATED_COUNT_ABOVE` files en lloc d'un COUNT(*) sencer.
+    """
+
+    def __init__(self, *args, estimate=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if self.estimate:
+            estimate = estimated_count(self.object_list.model)
+            if estimate is not None and estimate > ADMIN_ESTIMATED_COUNT_ABOVE:
+                return estimate
+        return super().count
+
+
+class LazyRelatedFilter(admin.RelatedFieldListFilter):
+    """
+    Filtre per una relació que no carrega totes les files relacionades: només mostra la
+    seleccionada i un camp per escriure'n l'id.
+    """
+    template = 'admin/menu/lazy_related_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.hidden_params = [
+            (name, value) for name, values in request.GET.lists() if name not in (self.lookup_kwarg, PAGE_VAR)
+            for value in values
+        ]
+
+    def has_output(self):
+        return True
+
+    def field_choices(self, field, request, model_admin):
+        if not self.lookup_val:
+            return []
+        related = field.related_model._base_manager.filter(pk__in=self.lookup_val)
+        return [(obj.pk, str(obj)) for obj in related]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist per a taules grans: no compta el total sense filtres a cada pàgina i, si no
+    s'ha filtrat res, fa servir el recompte estimat.
+    """
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        estimate = set(request.GET) <= UNFILTERED_PARAMS
+        return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page, estimate=estimate)
+
+class CategoryTranslationInline(admin.TabularInline):
+    model = CategoryTranslation
+    extra = 0
+
+class MenuItemCategoryInline(admin.TabularInline):
+    model = MenuItemCategory
+    extra = 0
+    autocomplete_fields = ('category',)
+
+class MenuItemTranslationInline(admin.TabularInline):
+    model = MenuItemTranslation
+    extra = 0
+
+class MenuItemOverrideInline(admin.TabularInline):
+    model = MenuItemOverride
+    extra = 0
+    autocomplete_fields = ('restaurant',)
+
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    extra = 0
+    readonly_fields = ('menu_item', 'name', 'unit_price', 'quantity')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(Brand)
+class BrandAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+    ordering = ('name',)
 
 @admin.register(Restaurant)
-class RestaurantAdmin(admin.ModelAdmin):
-    list_display = ('name', 'address', 'phone')
+class RestaurantAdmin(LargeTableAdmin):
+    list_display = ('name', 'brand', 'address', 'phone')
+    list_select_related = ('brand',)
     search_fields = ('name',)
+    list_filter = (('brand', LazyRelatedFilter),)
+    autocomplete_fields = ('brand',)
+    # Per clau primària, com MenuItemAdmin: `name` no és indexat
+    ordering = ('-pk',)
+    actions = ['export_and_purge']
+
+    @admin.action(description="Export and purge selected restaurants", permissions=['delete'])
+    def export_and_purge(self, request, queryset):
+        """
+        Exporta els restaurants seleccionats (es descarrega com a JSON Lines) i després els esborra per lots.
+        """
+        export = tempfile.TemporaryFile()
+        stream = io.TextIOWrapper(export, encoding='utf-8')
+        timer = Timer()
+        restaurant_ids = list(queryset.values_list('pk', flat=True))
+        for restaurant_id in restaurant_ids:
+            timer.step(f'export {restaurant_id}', lambda: export_restaurant(restaurant_id, stream))
+        stream.flush()
+        for restaurant_id in restaurant_ids:
+            purge_restaurant(restaurant_id, timer=timer)
+
+        self.message_user(request, f"Purged {len(restaurant_ids)} restaurant(s) in {timer.total:.2f}s.")
+        stream.detach()
+        export.seek(0)
+        return FileResponse(export, as_attachment=True, filename='restaurants-export.jsonl')
 
 # Registre del model RestaurantUser (perfil d'usuari)
 @admin.register(RestaurantUser)
-class RestaurantUserAdmin(admin.ModelAdmin):
+class RestaurantUserAdmin(LargeTableAdmin):
     list_display = ('user', 'restaurant')
+    list_select_related = ('user', 'restaurant')
     search_fields = ('user__username', 'restaurant__name')
-    list_filter = ('restaurant',)
+    list_filter = (('restaurant', LazyRelatedFilter),)
+    autocomplete_fields = ('user', 'restaurant')
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(LargeTableAdmin):
     list_display = ('name', 'restaurant')
-    search_fields = ('name',)
-    list_filter = ('restaurant',)
+    list_select_related = ('restaurant',)
+    search_fields = ('name', 'restaurant__name')
+    list_filter = (('restaurant', LazyRelatedFilter),)
+    autocomplete_fields = ('restaurant',)
+    inlines = [CategoryTranslationInline]
+
+    def get_queryset(self, request):
+        # El nom de la categoria inclou el del restaurant (p. ex. a l'autocompletat)
+        return super().get_queryset(request).select_related('restaurant')
 
 @admin.register(MenuItem)
-class MenuItemAdmin(admin.ModelAdmin):
+class MenuItemAdmin(LargeTableAdmin):
     list_display = ('name', 'display_categories', 'price')
     search_fields = ('name',)
-    list_filter = ('categories',)
+    list_filter = (('categories__restaurant', LazyRelatedFilter), ('categories', LazyRelatedFilter))
+    # Per clau primària, que és indexada: ordenar per nom tota la taula seria lent
+    ordering = ('-pk',)
+    inlines = [MenuItemCategoryInline, MenuItemTranslationInline, MenuItemOverrideInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('categories', queryset=Category.objects.only('id', 'name'))
+        )
 
     def display_categories(self, obj):
         return ", ".join([category.name for category in obj.categories.all()])
     
-    display_categories.short_description = 'Categories'
\ No newline at end of file
+    display_categories.short_description = 'Categories'
+
+@admin.register(AvailabilityWindow)
+class AvailabilityWindowAdmin(LargeTableAdmin):
+    list_display = ('__str__', 'restaurant', 'weekday', 'start_time', 'end_time')
+    list_select_related = ('restaurant', 'category', 'menu_item')
+    list_filter = ('weekday', ('restaurant', LazyRelatedFilter))
+    autocomplete_fields = ('restaurant', 'category', 'menu_item')
+
+@admin.register(MenuChange)
+class MenuChangeAdmin(LargeTableAdmin):
+    list_display = ('restaurant', 'model', 'object_id', 'action', 'created_at')
+    list_select_related = ('restaurant',)
+    list_filter = ('model', 'action', ('restaurant', LazyRelatedFilter))
+    readonly_fields = ('restaurant', 'model', 'object_id', 'action', 'diff', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(DailyMenuStat)
+class DailyMenuStatAdmin(LargeTableAdmin):
+    list_display = ('restaurant', 'date', 'kind', 'object_id', 'count')
+    list_select_related = ('restaurant',)
+    list_filter = ('kind', 'date', ('restaurant', LazyRelatedFilter))
+    readonly_fields = ('restaurant', 'date', 'kind', 'object_id', 'count')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(Order)
+class OrderAdmin(LargeTableAdmin):
+    list_display = ('id', 'restaurant', 'table', 'status', 'total', 'created_at')
+    list_select_related = ('restaurant',)
+    list_filter = ('status', ('restaurant', LazyRelatedFilter))
+    readonly_fields = ('restaurant', 'table', 'note', 'total', 'created_at')
+    ordering = ('-pk',)
+    inlines = [OrderLineInline]
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(TenantShard)
+class TenantShardAdmin(admin.ModelAdmin):
+    list_display = ('restaurant_id', 'alias', 'read_only')
+    list_filter = ('alias', 'read_only')
+    search_fields = ('=restaurant_id',)
+
+    # Només es canvia amb `manage.py move_restaurant_shard`, que també hi copia les dades
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'status_code', 'duration_ms', 'sql_count', 'sql_ms',
+                    'serializers_ms', 'user')
+    list_select_related = ('user',)
+    search_fields = ('path',)
+    fields = ('created_at', 'user', 'method', 'path', 'status_code', 'duration_ms', 'sql_count', 'sql_ms',
+              'serializers_ms', 'report')
+    readonly_fields = fields
+    ordering = ('-pk',)
+    actions = ['download']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Download selected profiles", permissions=['view'])
+    def download(self, request, queryset):
+        """
+        Descarrega un zip amb l'informe (`.txt`) i les estadístiques de cProfile (`.prof`, per a
+        `pstats` o snakeviz) de cada perfil seleccionat.
+        """
+        archive = tempfile.TemporaryFile()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zipped:
+            for profile in queryset.order_by('pk'):
+                zipped.writestr(f'profile-{profile.pk}.txt', profile.report)
+                zipped.writestr(f'profile-{profile.pk}.prof', bytes(profile.stats))
+        archive.seek(0)
+        return FileResponse(archive, as_attachment=True, filename='request-profiles.zip')
@@ -0,0 +1,147 @@
+import atexit
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+
+from . import metrics
+from .models import Restaurant, MenuEvent, DailyMenuStat
+from .sharding import each_shard, get_tenant_shard
+
+ANALYTICS_BUFFER_SIZE = getattr(settings, 'MENU_ANALYTICS_BUFFER_SIZE', 500)
+ANALYTICS_FLUSH_INTERVAL = getattr(settings, 'MENU_ANALYTICS_FLUSH_INTERVAL', 10)
+ANALYTICS_MAX_EVENTS = getattr(settings, 'MENU_ANALYTICS_MAX_EVENTS', 50)
+ANALYTICS_BATCH_SIZE = 1000
+
+EVENT_KINDS = {
+    'menu_view': MenuEvent.MENU_VIEW,
+    'item_view': MenuEvent.ITEM_VIEW,
+    'category_open': MenuEvent.CATEGORY_OPEN,
+}
+EVENT_NAMES = {kind: name for name, kind in EVENT_KINDS.items()}
+
+metrics.register('analytics.flushed')
+
+
+class EventBuffer:
+    """
+    Acumula esdeveniments en memòria i els escriu amb un sol `bulk_create` quan n'hi ha `size` o,
+    com a molt tard, `interval` segons després del primer pendent: un temporitzador (un fil daemon)
+    els escriu encara que el worker no rebi cap més petició. Cada worker té el seu buffer, que
+    també s'escriu quan el procés acaba normalment; si el procés mor de cop, es perden els
+    pendents, cosa acceptable per a estadístiques.
+    """
+
+    def __init__(self, size=ANALYTICS_BUFFER_SIZE, interval=ANALYTICS_FLUSH_INTERVAL):
+        self.size = size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._events = []
+        self._timer = None
+
+    def add(self, events):
+        with self._lock:
+            if not self._events:
+                self.schedule()
+            self._events.extend(events)
+            due = len(self._events) >= self.size
+        if due:
+            self.flush()
+
+    def schedule(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.interval, self.flush_idle)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush_idle(self):
+        try:
+            self.flush()
+        finally:
+            # El fil del temporitzador té la seva pròpia connexió: no es pot deixar oberta
+            connections.close_all()
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if events:
+            MenuEvent.objects.bulk_create(events, batch_size=ANALYTICS_BATCH_SIZE)
+            metrics.increment('analytics.flushed', len(events))
+        return len(events)
+
+
+_buffer = None
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = EventBuffer()
+        # En aturar el worker (gunicorn ho fa en reciclar-lo), s'escriuen els pendents
+        atexit.register(_buffer.flush)
+    return _buffer
+
+
+def roll_up(until=None):
+    """
+    Suma els esdeveniments anteriors a `until` (per defecte, tots) als comptadors diaris de
+    `DailyMenuStat` i els esborra. Els esdeveniments de restaurants que no existeixen es descarten
+    i els dels que s'estan traslladant es deixen per a la propera execució. Els comptadors de cada
+    base de dades s'escriuen en una transacció pròpia, dins de la que esborra els esdeveniments.
+    Retorna el nombre d'esdeveniments processats.
+    """
+    with transaction.atomic():
+        events = MenuEvent.objects.all()
+        if until is not None:
+            events = events.filter(created_at__lt=until)
+        last_id = events.aggregate(last_id=Max('id'))['last_id']
+        if last_id is None:
+            return 0
+        # Els esdeveniments que arribin mentrestant queden per a la propera execució
+        events = events.filter(id__lte=last_id)
+
+        counts = {
+            (row['restaurant_id'], row['date'], row['kind'], row['object_id']): row['count']
+            for row in events.annotate(date=TruncDate('created_at'))
+            .values('restaurant_id', 'date', 'kind', 'object_id')
+            .annotate(count=Count('id'))
+            .order_by()
+        }
+        shards = {restaurant_id: get_tenant_shard(restaurant_id, cached=False) for restaurant_id in {key[0] for key in counts}}
+        for alias in each_shard():
+            restaurant_ids = [restaurant_id for restaurant_id, (shard, read_only) in shards.items()
+                              if shard == alias and not read_only]
+            existing_ids = set(Restaurant.all_objects.filter(pk__in=restaurant_ids).values_list('pk', flat=True))
+            if existing_ids:
+                with transaction.atomic(using=alias):
+                    add_counts({key: count for key, count in counts.items() if key[0] in existing_ids})
+
+        moving = [restaurant_id for restaurant_id, (_shard, read_only) in shards.items() if read_only]
+        processed, _ = events.exclude(restaurant_id__in=moving).delete()
+    return processed
+
+
+def add_counts(counts):
+    """
+    Suma `counts` (`{(restaurant_id, date, kind, object_id): count}`) a `DailyMenuStat`.
+    """
+    existing = DailyMenuStat.objects.select_for_update().filter(
+        restaurant_id__in={key[0] for key in counts}, date__in={key[1] for key in counts}
+    )
+    to_update = []
+    for stat in existing:
+        count = counts.pop((stat.restaurant_id, stat.date, stat.kind, stat.object_id), None)
+        if count is not None:
+            stat.count += count
+            to_update.append(stat)
+    DailyMenuStat.objects.bulk_update(to_update, ['count'], batch_size=ANALYTICS_BATCH_SIZE)
+    DailyMenuStat.objects.bulk_create([
+        DailyMenuStat(restaurant_id=restaurant_id, date=date, kind=kind, object_id=object_id, count=count)
+        for (restaurant_id, date, kind, object_id), count in counts.items()
+    ], batch_size=ANALYTICS_BATCH_SIZE)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'menu'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401
+        from .sharding import check_shared_cache, reserve_id_range
+        post_migrate.connect(reserve_id_range, sender=self)
+        checks.register(check_shared_cache, checks.Tags.caches)
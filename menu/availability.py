@@ -0,0 +1,77 @@
+import datetime
+import zoneinfo
+
+from django.utils import timezone
+
+from .models import AvailabilityWindow
+
+
+class Schedule:
+    """
+    Estat de les franges horàries d'un restaurant en un instant concret.
+
+    `inactive_category_ids` i `inactive_item_ids` són els objectes que tenen franges
+    però cap d'activa ara mateix, i `next_transition` és el proper instant en què
+    alguna franja s'obre o es tanca (None si el restaurant no en té cap).
+    """
+
+    def __init__(self, windows, tz, now):
+        self.now = now
+        active = {}
+        self.next_transition = None
+
+        local_now = now.astimezone(tz)
+        for target, weekday, start_time, end_time in windows:
+            is_active, transition = _evaluate_window(local_now, weekday, start_time, end_time, tz)
+            active[target] = active.get(target, False) or is_active
+            if self.next_transition is None or transition < self.next_transition:
+                self.next_transition = transition
+
+        self.inactive_category_ids = {pk for (kind, pk), is_active in active.items() if kind == 'category' and not is_active}
+        self.inactive_item_ids = {pk for (kind, pk), is_active in active.items() if kind == 'menu_item' and not is_active}
+
+    def seconds_until_transition(self):
+        if self.next_transition is None:
+            return None
+        return max(1, int((self.next_transition - self.now).total_seconds()) + 1)
+
+
+def _evaluate_window(local_now, weekday, start_time, end_time, tz):
+    """
+    Retorna si la franja està activa a `local_now` i el proper instant en què obre o tanca.
+    """
+    active = False
+    transition = None
+    # Es revisa des d'ahir (per a franges que passen de mitjanit) fins d'aquí a una setmana
+    for offset in range(-1, 8):
+        day = local_now.date() + datetime.timedelta(days=offset)
+        if day.weekday() != weekday:
+            continue
+        start = datetime.datetime.combine(day, start_time, tzinfo=tz)
+        end_day = day if end_time > start_time else day + datetime.timedelta(days=1)
+        end = datetime.datetime.combine(end_day, end_time, tzinfo=tz)
+
+        if start <= local_now < end:
+            active = True
+        for boundary in (start, end):
+            if boundary > local_now and (transition is None or boundary < transition):
+                transition = boundary
+    return active, transition
+
+
+def get_schedule(restaurant_id, now=None):
+    """
+    Avalua les franges d'un restaurant amb una sola consulta indexada per `restaurant_id`.
+    """
+    now = now or timezone.now()
+    rows = AvailabilityWindow.objects.filter(restaurant_id=restaurant_id).values_list(
+        'category_id', 'menu_item_id', 'weekday', 'start_time', 'end_time', 'restaurant__timezone'
+    )
+
+    windows = []
+    tz = datetime.timezone.utc
+    for category_id, menu_item_id, weekday, start_time, end_time, tz_name in rows:
+        tz = zoneinfo.ZoneInfo(tz_name)
+        target = ('category', category_id) if category_id else ('menu_item', menu_item_id)
+        windows.append((target, weekday, start_time, end_time))
+    return Schedule(windows, tz, now)
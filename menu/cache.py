@@ -0,0 +1,96 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+from . import metrics
+
+PUBLIC_MENU_TIMEOUT = getattr(settings, 'MENU_PUBLIC_CACHE_TIMEOUT', 60 * 15)
+TENANT_CACHE_TIMEOUT = getattr(settings, 'MENU_TENANT_CACHE_TIMEOUT', 60 * 5)
+
+metrics.register('tenant_cache.hit', 'tenant_cache.miss')
+
+
+def _version_key(restaurant_id, scope='menu'):
+    return f'{scope}:{restaurant_id}:version'
+
+
+def get_version(restaurant_id, scope='menu'):
+    # La versió inicial depèn del temps perquè, si la clau s'expulsa, no coincideixi amb entrades antigues
+    key = _version_key(restaurant_id, scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def public_menu_key(restaurant_id, endpoint, language=None):
+    """
+    Clau de la resposta pública d'un restaurant. Inclou la versió del menú,
+    de manera que invalidar-la descarta totes les entrades (tots els idiomes) alhora.
+    """
+    version = get_version(restaurant_id)
+    return f'menu:{restaurant_id}:v{version}:{endpoint}:{language or "default"}'
+
+
+def get_or_build_public_menu(restaurant_id, endpoint, language, build):
+    """
+    `build` retorna `(data, timeout)`. Si `timeout` no és None (p. ex. els segons fins al proper
+    canvi de franja horària) l'entrada caduca just llavors en lloc d'esperar el temps per defecte.
+    """
+    key = public_menu_key(restaurant_id, endpoint, language)
+    data = cache.get(key)
+    if data is None:
+        data, timeout = build()
+        if timeout is None or timeout > PUBLIC_MENU_TIMEOUT:
+            timeout = PUBLIC_MENU_TIMEOUT
+        cache.set(key, data, timeout)
+    return data
+
+
+def tenant_cache_key(restaurant_id, scope, *parts, query_params=None):
+    """
+    Clau de la cache de l'API autenticada d'un restaurant. Depèn de la versió de `scope`
+    ('menu' o 'users') del restaurant, de manera que només l'invaliden les escriptures d'aquest restaurant.
+    """
+    version = get_version(restaurant_id, scope)
+    query = urlencode(sorted(query_params.lists()), doseq=True) if query_params else ''
+    return ':'.join(['tenant', str(restaurant_id), scope, f'v{version}', *map(str, parts), query])
+
+
+def get_tenant_response(key):
+    data = cache.get(key)
+    metrics.increment('tenant_cache.hit' if data is not None else 'tenant_cache.miss')
+    return data
+
+
+def set_tenant_response(key, data):
+    cache.set(key, data, TENANT_CACHE_TIMEOUT)
+
+
+def _bump_version(restaurant_id, scope):
+    key = _version_key(restaurant_id, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def invalidate_public_menu(restaurant_id):
+    """
+    Invalida el menú públic i les respostes de l'API autenticada que en depenen.
+    """
+    _bump_version(restaurant_id, 'menu')
+
+
+def invalidate_tenant_users(restaurant_id):
+    _bump_version(restaurant_id, 'users')
+
+
+def invalidate_nearby():
+    """
+    Descarta les cerques de restaurants propers de totes les zones (`menu.geo`).
+    """
+    _bump_version('all', 'nearby')
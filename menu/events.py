@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+EVENTS_BACKEND = getattr(settings, 'MENU_EVENTS_BACKEND', 'menu.events.InProcessBackend')
+EVENTS_HEARTBEAT = getattr(settings, 'MENU_EVENTS_HEARTBEAT', 15)
+EVENTS_QUEUE_SIZE = getattr(settings, 'MENU_EVENTS_QUEUE_SIZE', 100)
+
+_event_ids = itertools.count(1)
+
+
+class Subscription:
+    """
+    Cua d'esdeveniments d'un client. `publish` hi escriu des de qualsevol fil; es llegeix amb `get`
+    (codi síncron) o amb `aget` des del bucle asyncio on s'ha creat la subscripció.
+    """
+
+    def __init__(self, backend, restaurant_id):
+        self.backend = backend
+        self.restaurant_id = restaurant_id
+        self._events = deque()
+        self._condition = threading.Condition()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        self._ready = asyncio.Event() if self._loop else None
+
+    def put(self, event):
+        with self._condition:
+            if len(self._events) >= EVENTS_QUEUE_SIZE:
+                # El client no llegeix prou ràpid: es descarten els pendents i se li demana que recarregui el menú
+                self._events.clear()
+                event = make_event('resync')
+            self._events.append(event)
+            self._condition.notify()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                # El bucle ja s'ha tancat: el client ha marxat
+                pass
+
+    def pop(self):
+        with self._condition:
+            return self._events.popleft() if self._events else None
+
+    def get(self, timeout=None):
+        with self._condition:
+            if not self._events:
+                self._condition.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    async def aget(self, timeout=None):
+        event = self.pop()
+        if event is not None:
+            return event
+        self._ready.clear()
+        # `put` afegeix l'esdeveniment abans d'avisar el bucle: si ha arribat entre `pop` i `clear`, ja hi és
+        event = self.pop()
+        if event is not None:
+            return event
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except TimeoutError:
+            return None
+        return self.pop()
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class InProcessBackend:
+    """
+    Difon els esdeveniments als clients connectats al mateix procés: un canvi fet en un worker no
+    arriba als clients d'un altre. Amb diversos workers o servidors cal un backend compartit
+    (p. ex. Redis pub/sub) amb la mateixa interfície.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, restaurant_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(restaurant_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, restaurant_id):
+        subscription = Subscription(self, restaurant_id)
+        with self._lock:
+            self._subscriptions[restaurant_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.restaurant_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.restaurant_id]
+
+
+_broadcaster = None
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = import_string(EVENTS_BACKEND)()
+    return _broadcaster
+
+
+def make_event(event_type, **data):
+    return {'id': next(_event_ids), 'type': event_type, 'data': data}
+
+
+def item_events(item_id, action, diff):
+    """
+    Converteix un canvi de l'historial d'un ítem en esdeveniments compactes per als clients.
+    Els canvis sense esdeveniment específic generen `menu.changed` perquè el client recarregui.
+    """
+    if action == 'create':
+        return [make_event('item.created', id=item_id, **diff)]
+    if action == 'delete':
+        return [make_event('item.deleted', id=item_id)]
+
+    events = []
+    if 'is_available' in diff:
+        events.append(make_event('item.availability', id=item_id, is_available=diff['is_available'][1]))
+    if 'price' in diff:
+        events.append(make_event('item.price', id=item_id, price=diff['price'][1]))
+    if action != 'update' or set(diff) - {'is_available', 'price'}:
+        events.append(make_event('menu.changed'))
+    return events
+
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def event_stream(subscription, heartbeat=EVENTS_HEARTBEAT):
+    """
+    Genera el flux Server-Sent Events d'una subscripció, amb comentaris periòdics
+    perquè els proxies no tanquin la connexió. És asíncron: cada client connectat
+    no ocupa cap fil del servidor ASGI mentre espera.
+    """
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            event = await subscription.aget(timeout=heartbeat)
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                yield format_sse(event)
+    finally:
+        subscription.close()
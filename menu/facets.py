@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from .models import MENU_TAGS, ALLERGENS
+from .payloads import format_price
+
+# Els filtres i els recomptes treballen sobre les files del menú públic que ja són a la cache,
+# de manera que filtrar no torna a consultar la base de dades.
+
+
+def menu_facets(rows):
+    """
+    Recomptes per als filtres del menú públic: ítems de cada etiqueta i al·lergen i rang de preus.
+    """
+    tags = dict.fromkeys(MENU_TAGS, 0)
+    allergens = dict.fromkeys(ALLERGENS, 0)
+    prices = []
+    for row in rows:
+        for name in row['tags']:
+            tags[name] += 1
+        for name in row['allergens']:
+            allergens[name] += 1
+        prices.append(Decimal(row['price']))
+    return {
+        'total': len(rows),
+        'price': {
+            'min': format_price(min(prices)) if prices else None,
+            'max': format_price(max(prices)) if prices else None,
+        },
+        'tags': tags,
+        'allergens': allergens,
+    }
+
+
+def filter_menu_rows(rows, max_price=None, tags=(), exclude_allergens=()):
+    """
+    Ítems de `rows` que no superen `max_price`, tenen totes les etiquetes `tags` i cap dels
+    al·lèrgens de `exclude_allergens`.
+    """
+    tags = set(tags)
+    excluded = set(exclude_allergens)
+    return [
+        row for row in rows
+        if (max_price is None or Decimal(row['price']) <= max_price)
+        and tags.issubset(row['tags'])
+        and excluded.isdisjoint(row['allergens'])
+    ]
@@ -0,0 +1,120 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import get_version
+from .models import Restaurant
+from .payloads import file_url
+from .sharding import each_shard
+
+NEARBY_CACHE_TIMEOUT = getattr(settings, 'MENU_NEARBY_CACHE_TIMEOUT', 60 * 5)
+NEARBY_MAX_RADIUS_KM = getattr(settings, 'MENU_NEARBY_MAX_RADIUS_KM', 50)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precisió de geohash per radi: la cel·la ha de ser de l'ordre del radi perquè els candidats
+# d'una cel·la (la cel·la més el radi al voltant) no siguin gaires més que els del cercle
+GEOHASH_PRECISIONS = [(1.2, 6), (5, 5), (20, 4)]
+
+
+def geohash_bounds(latitude, longitude, precision):
+    """
+    Geohash de `precision` caràcters del punt i els límits de la seva cel·la
+    (`(hash, (lat_min, lat_max, lon_min, lon_max))`).
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        coordinate, interval = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars), (lat_range[0], lat_range[1], lon_range[0], lon_range[1])
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """
+    Distància de cercle màxim (haversine).
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat_min, lat_max, lon_min, lon_max, radius_km):
+    """
+    Caixa que conté tots els punts a `radius_km` o menys de la caixa donada. No travessa
+    l'antimeridià: prop de ±180° es talla al límit.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    widest = max(abs(lat_min), abs(lat_max)) + delta_lat
+    if widest >= 90:
+        delta_lon = 360
+    else:
+        delta_lon = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+    return (max(-90, lat_min - delta_lat), min(90, lat_max + delta_lat),
+            max(-180, lon_min - delta_lon), min(180, lon_max + delta_lon))
+
+
+def area_candidates(latitude, longitude, radius_km):
+    """
+    Restaurants que poden ser a `radius_km` del punt, guardats a la cache per cel·la de geohash i
+    radi (arrodonit amunt), de manera que totes les cerques d'una zona popular comparteixen entrada.
+    La consulta (una per base de dades) fa servir l'índex de `(latitude, longitude)` amb la caixa
+    de la cel·la més el radi.
+    """
+    radius_bucket = math.ceil(radius_km)
+    precision = next((precision for limit, precision in GEOHASH_PRECISIONS if radius_bucket <= limit), 3)
+    cell, bounds = geohash_bounds(latitude, longitude, precision)
+    key = f"nearby:v{get_version('all', 'nearby')}:{cell}:{radius_bucket}"
+    rows = cache.get(key)
+    if rows is None:
+        lat_min, lat_max, lon_min, lon_max = bounding_box(*bounds, radius_bucket)
+        rows = {}
+        for _alias in each_shard():
+            # Durant un trasllat, el restaurant surt a les dues bases de dades amb les mateixes dades
+            rows.update((row[0], row) for row in Restaurant.objects.filter(
+                latitude__range=(lat_min, lat_max), longitude__range=(lon_min, lon_max)
+            ).values_list('id', 'name', 'address', 'logo', 'latitude', 'longitude'))
+        rows = list(rows.values())
+        cache.set(key, rows, NEARBY_CACHE_TIMEOUT)
+    return rows
+
+
+def nearby_restaurants(latitude, longitude, radius_km, limit, request=None):
+    """
+    Restaurants a `radius_km` o menys del punt, del més proper al més llunyà.
+    """
+    logo_field = Restaurant._meta.get_field('logo')
+    results = []
+    for pk, name, address, logo, lat, lon in area_candidates(latitude, longitude, radius_km):
+        distance = distance_km(latitude, longitude, lat, lon)
+        if distance <= radius_km:
+            results.append((distance, pk, name, address, logo, lat, lon))
+    results.sort()
+    return [
+        {
+            'id': pk,
+            'name': name,
+            'address': address,
+            'logo': file_url(logo_field.attr_class(None, logo_field, logo), request),
+            'latitude': lat,
+            'longitude': lon,
+            'distance_km': round(distance, 3),
+        }
+        for distance, pk, name, address, logo, lat, lon in results[:limit]
+    ]
@@ -0,0 +1,135 @@
+import datetime
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import MenuEvent, DailyMenuStat
+from .public import public_categories, public_menu_items, public_facets
+from .sharding import each_shard, get_tenant_shard, use_tenant
+
+logger = logging.getLogger(__name__)
+
+WARMUP_RESTAURANTS = getattr(settings, 'MENU_WARMUP_RESTAURANTS', 50)
+WARMUP_DAYS = getattr(settings, 'MENU_WARMUP_DAYS', 7)
+# Idiomes que s'escalfen a més del contingut original (p. ex. ['en', 'es'])
+WARMUP_LANGUAGES = getattr(settings, 'MENU_WARMUP_LANGUAGES', [])
+
+
+def check_database():
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+
+def check_cache():
+    value = uuid.uuid4().hex
+    cache.set('health:ping', value, 10)
+    if cache.get('health:ping') != value:
+        raise RuntimeError('The cache did not return the stored value.')
+
+
+_migrations_applied = False
+
+
+def check_migrations():
+    # Un cop aplicades no es desfan mentre el procés viu: no cal tornar a llegir el graf
+    global _migrations_applied
+    if _migrations_applied:
+        return
+    for connection in connections.all():
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if plan:
+            raise RuntimeError(f'{len(plan)} unapplied migration(s) in {connection.alias}.')
+    _migrations_applied = True
+
+
+CHECKS = {
+    'database': check_database,
+    'cache': check_cache,
+    'migrations': check_migrations,
+}
+
+
+def run_checks(names):
+    """
+    Executa les comprovacions `names` i retorna `(ok, {nom: 'ok' | 'error'})`.
+    Els detalls dels errors només van al log, perquè les respostes són públiques.
+    """
+    results = {}
+    for name in names:
+        try:
+            CHECKS[name]()
+            results[name] = 'ok'
+        except Exception:
+            logger.exception('Health check %s failed', name)
+            results[name] = 'error'
+    return all(result == 'ok' for result in results.values()), results
+
+
+def popular_restaurant_ids(limit=WARMUP_RESTAURANTS, days=WARMUP_DAYS):
+    """
+    Restaurants amb més visites al menú els últims `days` dies, segons els agregats diaris de totes
+    les bases de dades.
+    """
+    since = timezone.now().date() - datetime.timedelta(days=days)
+    rows = []
+    for alias in each_shard():
+        rows.extend(
+            (views, restaurant_id) for views, restaurant_id in
+            DailyMenuStat.objects.filter(kind=MenuEvent.MENU_VIEW, date__gte=since, restaurant__deleted_at__isnull=True)
+            .values('restaurant_id').annotate(views=Sum('count')).order_by('-views', 'restaurant_id')
+            .values_list('views', 'restaurant_id')[:limit]
+            # Durant un trasllat el restaurant també és a la base de dades de destinació
+            if get_tenant_shard(restaurant_id)[0] == alias
+        )
+    rows.sort(key=lambda row: (-row[0], row[1]))
+    return [restaurant_id for _views, restaurant_id in rows[:limit]]
+
+
+def warm_up(restaurant_ids=None, languages=WARMUP_LANGUAGES):
+    """
+    Obre les connexions a la base de dades i omple la cache del menú públic (categories, ítems
+    i recomptes) dels restaurants `restaurant_ids`, per defecte els més consultats.
+    Retorna el nombre de restaurants escalfats.
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+    if restaurant_ids is None:
+        restaurant_ids = popular_restaurant_ids()
+    for restaurant_id in restaurant_ids:
+        with use_tenant(restaurant_id):
+            for language in (None, *languages):
+                public_categories(restaurant_id, language)
+                public_menu_items(restaurant_id, language)
+            public_facets(restaurant_id)
+    return len(restaurant_ids)
+
+
+_warm_lock = threading.Lock()
+_warmed = False
+
+
+def ensure_warm():
+    """
+    Escalfa el worker un sol cop, la primera vegada que es comprova si està llest.
+    Retorna si està escalfat; si falla es torna a provar a la següent comprovació.
+    """
+    global _warmed
+    with _warm_lock:
+        if not _warmed:
+            try:
+                restaurants = warm_up()
+            except Exception:
+                logger.exception('Warm-up failed')
+                return False
+            logger.info('Worker warmed up: %s restaurant menu(s) cached', restaurants)
+            _warmed = True
+    return True
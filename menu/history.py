@@ -0,0 +1,151 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Restaurant, Category, MenuItem, MenuItemOverride, MenuChange
+from .sharding import tenant_db
+
+HISTORY_MODELS = {
+    'restaurant': Restaurant,
+    'category': Category,
+    'menu_item': MenuItem,
+}
+
+MODEL_NAMES = {model: name for name, model in HISTORY_MODELS.items()}
+
+
+def record_save(instance, created, restaurant_ids):
+    """
+    Afegeix a l'historial el canvi d'una instància desada. Només es guarden els camps modificats
+    respecte dels valors carregats de la base de dades. Retorna `(action, diff)`, o `(None, {})`
+    si no ha canviat res.
+    """
+    current = instance.history_values()
+    previous = getattr(instance, 'history_snapshot', None)
+    instance.history_snapshot = current
+
+    if created:
+        action, diff = 'create', {name: value for name, value in current.items() if name != 'deleted_at'}
+    else:
+        previous = previous or {}
+        diff = {
+            name: [previous.get(name), value]
+            for name, value in current.items()
+            if name != 'deleted_at' and previous.get(name) != value
+        }
+        if current['deleted_at'] and not previous.get('deleted_at'):
+            action = 'delete'
+        elif previous.get('deleted_at') and not current['deleted_at']:
+            action = 'restore'
+        elif diff:
+            action = 'update'
+        else:
+            return None, {}
+
+    MenuChange.objects.bulk_create([
+        MenuChange(restaurant_id=restaurant_id, model=MODEL_NAMES[type(instance)],
+                   object_id=instance.pk, action=action, diff=diff)
+        for restaurant_id in restaurant_ids
+    ])
+    return action, diff
+
+
+def record_categories(restaurant_links):
+    """
+    Afegeix a l'historial els canvis de categories dels ítems.
+    `restaurant_links` és `{(restaurant_id, item_id): {"add": [...], "remove": [...]}}`.
+    """
+    MenuChange.objects.bulk_create([
+        MenuChange(restaurant_id=restaurant_id, model='menu_item', object_id=item_id,
+                   action='categories', diff={key: sorted(ids) for key, ids in diff.items() if ids})
+        for (restaurant_id, item_id), diff in restaurant_links.items()
+        if any(diff.values())
+    ])
+
+
+def record_field_update(restaurant_id, model, object_ids, field, old, new):
+    """
+    Registra un canvi fet amb `QuerySet.update()`, que no envia senyals.
+    """
+    MenuChange.objects.bulk_create([
+        MenuChange(restaurant_id=restaurant_id, model=model, object_id=object_id,
+                   action='update', diff={field: [old, new]})
+        for object_id in object_ids
+    ])
+
+
+def record_field_changes(restaurant_ids, model, field, changes):
+    """
+    Com `record_field_update`, amb un valor diferent per objecte: `changes` és `[(object_id, anterior, nou)]`.
+    """
+    MenuChange.objects.bulk_create([
+        MenuChange(restaurant_id=restaurant_id, model=model, object_id=object_id,
+                   action='update', diff={field: [old, new]})
+        for restaurant_id in restaurant_ids
+        for object_id, old, new in changes
+    ])
+
+
+def restore_menu(restaurant_id, at):
+    """
+    Torna el menú d'un restaurant a l'estat que tenia a `at` dins d'una sola transacció.
+
+    Per a cada objecte només importa el primer canvi posterior a `at`: els valors anteriors
+    d'aquell canvi són l'estat a restaurar. Els canvis que es fan en restaurar també
+    queden a l'historial, de manera que una restauració també es pot desfer.
+    """
+    with transaction.atomic(using=tenant_db()):
+        changes = MenuChange.objects.filter(restaurant_id=restaurant_id, created_at__gt=at).order_by('id')
+
+        states = {}
+        links = {}
+        for change in changes.iterator():
+            if change.action == 'categories':
+                for category_id in change.diff.get('add', []):
+                    links.setdefault((change.object_id, category_id), False)
+                for category_id in change.diff.get('remove', []):
+                    links.setdefault((change.object_id, category_id), True)
+                continue
+
+            state = states.setdefault((change.model, change.object_id), {'fields': {}})
+            if 'alive' not in state:
+                state['alive'] = {'create': False, 'delete': True, 'restore': False}.get(change.action)
+            if change.action == 'update':
+                for name, (old, _new) in change.diff.items():
+                    state['fields'].setdefault(name, old)
+
+        restored = 0
+        for model_name, model in HISTORY_MODELS.items():
+            object_states = {object_id: state for (name, object_id), state in states.items() if name == model_name}
+            for instance in model.all_objects.filter(pk__in=object_states):
+                state = object_states[instance.pk]
+                for name, value in state['fields'].items():
+                    setattr(instance, name, value)
+                if state['alive'] is False and instance.deleted_at is None:
+                    instance.deleted_at = timezone.now()
+                elif state['alive'] is True:
+                    instance.deleted_at = None
+                instance.save()
+                restored += 1
+
+        # Preus i disponibilitat propis del local: l'override del restaurant, si encara hi és
+        override_states = {object_id: state for (name, object_id), state in states.items() if name == 'menu_item_override'}
+        for override in MenuItemOverride.objects.filter(restaurant_id=restaurant_id, menu_item_id__in=override_states):
+            for name, value in override_states[override.menu_item_id]['fields'].items():
+                setattr(override, name, value)
+            override.save()
+            restored += 1
+
+        to_add = defaultdict(list)
+        to_remove = defaultdict(list)
+        for (item_id, category_id), linked in links.items():
+            (to_add if linked else to_remove)[item_id].append(category_id)
+        for item in MenuItem.all_objects.filter(pk__in=set(to_add) | set(to_remove)):
+            if to_remove[item.pk]:
+                item.categories.remove(*to_remove[item.pk])
+            if to_add[item.pk]:
+                item.categories.add(*to_add[item.pk])
+            restored += 1
+
+    return restored
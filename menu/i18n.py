@@ -0,0 +1,31 @@
+from django.utils import translation
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+
+def normalize_language(code):
+    """
+    Retorna el codi d'idioma base suportat (p. ex. 'ca' per a 'ca-ES'), o None.
+    """
+    try:
+        return translation.get_supported_language_variant(code.strip().lower()).split('-')[0]
+    except LookupError:
+        return None
+
+
+def get_request_language(request):
+    """
+    Retorna el codi d'idioma de la petició (`?lang=` o `Accept-Language`).
+    Si no se'n demana cap de suportat retorna None i es fa servir el contingut original.
+    """
+    lang = request.GET.get('lang')
+    if lang:
+        return normalize_language(lang)
+
+    accept = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
+    for code, _quality in parse_accept_lang_header(accept):
+        if code == '*':
+            break
+        language = normalize_language(code)
+        if language:
+            return language
+    return None
@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .events import make_event
+from .history import record_field_update
+from .models import MenuItem, MenuItemOverride, MenuDelta
+from .sharding import tenant_db
+from .signals import menu_changed
+from .sync import record_changes
+
+# L'override és disponible: ho diu ell o, si no en diu res, l'ítem (com `MenuItemQuerySet.resolved`)
+AVAILABLE = Q(is_available=True) | Q(is_available__isnull=True, menu_item__is_available=True)
+
+
+class OutOfStock(Exception):
+    """
+    No queden prou unitats. `stock` és l'estoc que hi havia.
+    """
+
+    def __init__(self, stock):
+        super().__init__(f"Only {stock} left.")
+        self.stock = stock
+
+
+def item_availability():
+    return Subquery(MenuItem.all_objects.filter(pk=OuterRef('menu_item_id')).values('is_available')[:1])
+
+
+def location_overrides(restaurant_id, menu_item_ids):
+    """
+    Overrides del local per als ítems, creant amb un sol INSERT els que falten (amb tots els camps
+    buits, de manera que continuen fent servir els valors de l'ítem).
+    """
+    MenuItemOverride.objects.bulk_create(
+        [MenuItemOverride(restaurant_id=restaurant_id, menu_item_id=menu_item_id) for menu_item_id in menu_item_ids],
+        ignore_conflicts=True,
+    )
+    return MenuItemOverride.objects.filter(restaurant_id=restaurant_id, menu_item_id__in=menu_item_ids)
+
+
+def availability_changed(restaurant_id, menu_item_ids, is_available):
+    """
+    Historial, registre de sincronització, cache i esdeveniments d'un canvi de disponibilitat del
+    local fet amb `QuerySet.update()` als seus overrides. Els altres locals de l'ítem no canvien.
+    """
+    record_field_update(restaurant_id, 'menu_item_override', menu_item_ids, 'is_available', not is_available, is_available)
+    record_changes([(restaurant_id, menu_item_id) for menu_item_id in menu_item_ids], MenuDelta.MENU_ITEM)
+    menu_changed({restaurant_id}, [
+        make_event('item.availability', id=menu_item_id, is_available=is_available) for menu_item_id in menu_item_ids
+    ])
+
+
+def toggle_availability(restaurant_id, menu_item_id):
+    """
+    Alterna la disponibilitat de l'ítem al local amb un sol UPDATE de l'override, de manera que dos
+    clics simultanis no es trepitgen. Retorna el valor nou.
+    """
+    with transaction.atomic(using=tenant_db()):
+        overrides = location_overrides(restaurant_id, [menu_item_id])
+        overrides.update(is_available=~Coalesce('is_available', item_availability()), sold_out=False)
+        is_available = overrides.values_list('is_available', flat=True).get()
+        availability_changed(restaurant_id, [menu_item_id], is_available)
+    return is_available
+
+
+def set_availability(restaurant_id, menu_items, is_available):
+    """
+    Fixa la disponibilitat al local dels ítems de `menu_items` (un queryset) que no la tenen ja.
+    Retorna els ids que han canviat.
+    """
+    with transaction.atomic(using=tenant_db()):
+        changed_ids = list(
+            menu_items.resolved(restaurant_id).exclude(resolved_is_available=is_available).values_list('pk', flat=True)
+        )
+        if changed_ids:
+            location_overrides(restaurant_id, changed_ids).update(is_available=is_available, sold_out=False)
+            availability_changed(restaurant_id, changed_ids, is_available)
+    return changed_ids
+
+
+def consume(restaurant_id, menu_item_id, quantity):
+    """
+    Descompta `quantity` unitats de l'estoc del local amb UPDATE condicionals (`stock >= quantity`)
+    sense llegir-lo abans. Quan arriba a zero, el mateix UPDATE marca l'ítem com a exhaurit i no
+    disponible al local, i només llavors s'invalida la cache. Retorna l'estoc que queda (None si no se'n porta el
+    compte) o llança `OutOfStock`.
+    """
+    overrides = MenuItemOverride.objects.filter(restaurant_id=restaurant_id, menu_item_id=menu_item_id)
+    with transaction.atomic(using=overrides.db):
+        if overrides.filter(stock__gt=quantity).update(stock=F('stock') - quantity):
+            pass
+        elif overrides.filter(AVAILABLE, stock=quantity).update(stock=0, is_available=False, sold_out=True):
+            availability_changed(restaurant_id, [menu_item_id], False)
+        elif not overrides.filter(stock=quantity).update(stock=0):
+            stock = overrides.values_list('stock', flat=True).first()
+            if stock is None:
+                return None
+            raise OutOfStock(stock)
+        return overrides.values_list('stock', flat=True).get()
+
+
+def set_stock(restaurant_id, menu_item_id, stock):
+    """
+    Fixa l'estoc del local (None deixa de portar-ne el compte). Amb zero l'ítem passa a no
+    disponible al local. En reposar-lo torna a estar disponible només si el va treure l'estoc
+    exhaurit; si el personal l'ha canviat després, es respecta.
+    """
+    with transaction.atomic(using=tenant_db()):
+        if stock is None:
+            MenuItemOverride.objects.filter(restaurant_id=restaurant_id, menu_item_id=menu_item_id).update(stock=None)
+            return
+        overrides = location_overrides(restaurant_id, [menu_item_id])
+        if stock == 0 and overrides.filter(AVAILABLE).update(stock=0, is_available=False, sold_out=True):
+            availability_changed(restaurant_id, [menu_item_id], False)
+        elif stock > 0 and overrides.filter(sold_out=True).update(stock=stock, is_available=True, sold_out=False):
+            availability_changed(restaurant_id, [menu_item_id], True)
+        else:
+            overrides.update(stock=stock)
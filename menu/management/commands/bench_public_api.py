@@ -0,0 +1,70 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+from django.test.client import ClientHandler
+
+from menu.cache import invalidate_public_menu
+
+from .bench_serialization import Command as SerializationBenchmark
+
+ENDPOINTS = ('public', 'menu/changes', 'categories/public', 'menuItems/public', 'menuItems/public/facets')
+PIPELINES = (('stack', False), ('lean', True))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara les peticions per segon d'un worker a les rutes del menú públic amb tots els middlewares i "
+        "la configuració global de DRF (MENU_LEAN_PUBLIC = False) i pel camí lleuger. Les peticions passen pel "
+        "handler de Django sense xarxa, amb la cache ja plena i sense límits de peticions. Les dades de prova "
+        "es desfan en acabar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=500, help="Peticions per ronda.")
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        handler, factory = ClientHandler(), RequestFactory()
+        results = {}
+        with transaction.atomic(), mock.patch('menu.throttling.hit', return_value=0), \
+                override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            restaurant = SerializationBenchmark().create_menu(options['items'], options['categories'])
+            for endpoint in ENDPOINTS:
+                url = f"/api/restaurants/{restaurant.id}/{endpoint}/"
+                bodies = {}
+                for name, lean in PIPELINES:
+                    with override_settings(MENU_LEAN_PUBLIC=lean):
+                        response = handler(factory.get(url).environ)
+                    if response.status_code != 200:
+                        raise CommandError(f"{url} answered {response.status_code}.")
+                    bodies[name] = response.content
+                if bodies['stack'] != bodies['lean']:
+                    self.stderr.write(f"{endpoint}: les dues respostes no coincideixen.")
+
+                # Rondes alternades; es queda la millor de cada camí
+                for _ in range(options['rounds']):
+                    for name, lean in PIPELINES:
+                        with override_settings(MENU_LEAN_PUBLIC=lean):
+                            rate = self.measure(handler, factory, url, options['requests'])
+                        results[endpoint, name] = max(rate, results.get((endpoint, name), 0))
+            transaction.set_rollback(True)
+        # Les entrades de la cache del restaurant de prova deixen de valer
+        invalidate_public_menu(restaurant.id)
+
+        self.stdout.write(f"{'ruta':<26}{'stack':>10}{'lleuger':>10}{'guany':>9}")
+        for endpoint in ENDPOINTS:
+            stack, lean = results[endpoint, 'stack'], results[endpoint, 'lean']
+            self.stdout.write(f"{endpoint:<26}{stack:>8.0f}/s{lean:>8.0f}/s{(lean / stack - 1) * 100:>+8.0f}%")
+
+    def measure(self, handler, factory, url, count):
+        environs = [factory.get(url).environ for _ in range(count)]
+        start = time.perf_counter()
+        for environ in environs:
+            handler(environ)
+        return count / (time.perf_counter() - start)
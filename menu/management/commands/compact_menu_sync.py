@@ -0,0 +1,20 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from menu.sync import SYNC_RETENTION_DAYS, compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta el registre de canvis de la sincronització del menú: deixa l'última fila de cada objecte "
+        "i esborra les més antigues que --days. Els clients amb una seqüència anterior hauran de resincronitzar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=SYNC_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        deleted = compact(timezone.now() - datetime.timedelta(days=options['days']))
+        self.stdout.write(f"{deleted} canvis esborrats.")
@@ -0,0 +1,77 @@
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Envia comandes simultànies al restaurant d'un servidor en marxa i mostra el rendiment i la "
+        "latència de l'enviament. Les comandes són reals: feu-ho amb un restaurant de proves i amb "
+        "MENU_RATE_LIMITS prou alts al servidor (si no, es veuran respostes 429)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_id', type=int)
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument('--orders', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--lines', type=int, default=3, help="Ítems diferents per comanda.")
+        parser.add_argument('--budget-p95-ms', type=float)
+
+    def handle(self, *args, **options):
+        base_url = f"{options['url'].rstrip('/')}/api/restaurants/{options['restaurant_id']}"
+        try:
+            with urllib.request.urlopen(f"{base_url}/menuItems/public/") as response:
+                menu = json.load(response)
+        except (urllib.error.URLError, ValueError) as e:
+            raise CommandError(f"Could not load the public menu: {e}")
+        if not menu:
+            raise CommandError("The restaurant has no available items.")
+
+        def submit(number):
+            rows = random.Random(number).sample(menu, min(options['lines'], len(menu)))
+            body = json.dumps({
+                'table': str(number % 50 + 1),
+                'lines': [{'id': row['id'], 'quantity': 1, 'price': row['price']} for row in rows],
+            }).encode()
+            request = urllib.request.Request(f"{base_url}/orders/", data=body, method='POST',
+                                             headers={'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    code = response.status
+            except urllib.error.HTTPError as e:
+                code = e.code
+            except urllib.error.URLError:
+                code = 'error'
+            return code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(submit, range(options['orders'])))
+        elapsed = time.perf_counter() - start
+
+        latencies = [seconds * 1000 for code, seconds in results if code == 201]
+        codes = Counter(code for code, _seconds in results)
+        self.stdout.write(f"{len(results)} comandes en {elapsed:.2f}s ({len(results) / elapsed:.0f}/s), "
+                          f"{options['concurrency']} alhora")
+        self.stdout.write("respostes: " + ", ".join(f"{code}: {count}" for code, count in sorted(codes.items(), key=str)))
+        if not latencies:
+            raise CommandError("No order was accepted.")
+        p95 = percentile(latencies, 0.95)
+        self.stdout.write(f"latència (201): p50 {percentile(latencies, 0.5):.1f}ms, p95 {p95:.1f}ms, "
+                          f"p99 {percentile(latencies, 0.99):.1f}ms, màx {max(latencies):.1f}ms")
+
+        if options['budget_p95_ms'] is not None and p95 > options['budget_p95_ms']:
+            raise CommandError(f"p95 latency {p95:.1f}ms is over the {options['budget_p95_ms']}ms budget.")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.tenants import PURGE_CHUNK_SIZE, Timer, move_restaurant
+
+
+class Command(BaseCommand):
+    help = (
+        "Trasllada un restaurant (i els locals que hi comparteixen dades) a una altra base de dades de "
+        "DATABASES. Mentre es copia no s'hi pot escriure; els workers han de compartir la cache "
+        "perquè vegin el canvi del directori."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_id', type=int)
+        parser.add_argument('target', help="Àlies de la base de dades de destinació.")
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE)
+        parser.add_argument('--grace', type=float, default=5,
+                            help="Segons d'espera perquè acabin les escriptures en curs abans de copiar.")
+
+    def handle(self, *args, **options):
+        timer = Timer()
+        try:
+            restaurant_ids = move_restaurant(
+                options['restaurant_id'], options['target'], options['chunk_size'], options['grace'], timer
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Restaurants {', '.join(map(str, restaurant_ids))} moved to {options['target']}:")
+        for line in timer.report():
+            self.stdout.write(f"  {line}")
@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.models import Restaurant
+from menu.sharding import each_shard, use_tenant
+from menu.tenants import PURGE_CHUNK_SIZE, Timer, delete_orphan_items, delete_orphan_logos
+from menu.tenants import export_restaurant, purge_restaurant
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta les dades d'un restaurant (JSON Lines, compatible amb loaddata) i les esborra per lots. "
+        "Amb --orphans només esborra els ítems sense categories i els logos que no fa servir cap restaurant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_ids', nargs='*', type=int)
+        parser.add_argument('--output-dir', default='.', help="Directori on es deixen les exportacions.")
+        parser.add_argument('--no-export', action='store_true', help="Esborra sense exportar.")
+        parser.add_argument('--delete-users', action='store_true',
+                            help="Esborra també els comptes dels usuaris del restaurant (excepte staff), que no s'exporten.")
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE)
+        parser.add_argument('--orphans', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['orphans']:
+            timer = Timer()
+            timer.step('orphan items', lambda: sum(
+                delete_orphan_items(chunk_size=options['chunk_size']) for _alias in each_shard()
+            ))
+            timer.step('orphan logos', delete_orphan_logos)
+            self.write_report(timer)
+            return
+
+        if not options['restaurant_ids']:
+            raise CommandError("Indicate at least one restaurant id, or --orphans.")
+        missing = set()
+        for restaurant_id in options['restaurant_ids']:
+            with use_tenant(restaurant_id):
+                if not Restaurant.all_objects.filter(pk=restaurant_id).exists():
+                    missing.add(restaurant_id)
+        if missing:
+            raise CommandError(f"Unknown restaurant ids: {', '.join(map(str, sorted(missing)))}")
+
+        for restaurant_id in options['restaurant_ids']:
+            timer = Timer()
+            if not options['no_export']:
+                path = os.path.join(
+                    options['output_dir'], f'restaurant-{restaurant_id}-{time.strftime("%Y%m%d%H%M%S")}.jsonl'
+                )
+                with open(path, 'w') as stream:
+                    timer.step('export', lambda: export_restaurant(restaurant_id, stream, options['chunk_size']))
+                self.stdout.write(f"Restaurant {restaurant_id} exported to {path}")
+            purge_restaurant(restaurant_id, options['delete_users'], options['chunk_size'], timer)
+            self.stdout.write(f"Restaurant {restaurant_id} purged:")
+            self.write_report(timer)
+
+    def write_report(self, timer):
+        for line in timer.report():
+            self.stdout.write(f"  {line}")
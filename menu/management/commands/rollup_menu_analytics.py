@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from menu.analytics import roll_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Agrega els esdeveniments d'analítica pendents als comptadors diaris i els esborra. "
+        "Pensat per executar-se periòdicament (p. ex. cada hora amb cron)."
+    )
+
+    def handle(self, *args, **options):
+        processed = roll_up()
+        self.stdout.write(f"{processed} esdeveniments agregats.")
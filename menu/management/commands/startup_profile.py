@@ -0,0 +1,143 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# S'executa en un procés nou perquè aquest ja té Django i l'aplicació carregats
+CHILD_SCRIPT = r'''
+import json, os, sys, time
+
+options = json.loads(sys.argv[1])
+if options['memory']:
+    import tracemalloc
+    tracemalloc.start()
+
+def rss():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+stages = []
+def stage(name, run):
+    modules = len(sys.modules)
+    start = time.perf_counter()
+    result = run()
+    stages.append({'name': name, 'seconds': time.perf_counter() - start, 'rss': rss(),
+                   'modules': len(sys.modules) - modules})
+    return result
+
+stages.append({'name': 'python', 'seconds': 0, 'rss': rss(), 'modules': len(sys.modules)})
+
+def load_settings():
+    from django.conf import settings
+    settings.INSTALLED_APPS
+
+def setup():
+    import django
+    django.setup()
+
+def wsgi():
+    from django.core.wsgi import get_wsgi_application
+    return get_wsgi_application()
+
+def first_request(application):
+    from wsgiref.util import setup_testing_defaults
+    environ = {'PATH_INFO': options['path'], 'HTTP_HOST': options['host']}
+    setup_testing_defaults(environ)
+    status = []
+    response = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    b''.join(response)
+    return status[0]
+
+stage('settings', load_settings)
+stage('apps', setup)
+application = stage('wsgi', wsgi)
+status = stage('first request', lambda: first_request(application))
+
+memory = {}
+if options['memory']:
+    base_dir = options['base_dir'] + os.sep
+    for stat in tracemalloc.take_snapshot().statistics('filename'):
+        filename = stat.traceback[0].filename
+        if 'site-packages' + os.sep in filename:
+            package = filename.split('site-packages' + os.sep, 1)[1].split(os.sep)[0]
+        elif filename.startswith(base_dir):
+            package = filename[len(base_dir):].split(os.sep)[0]
+        else:
+            package = 'stdlib'
+        package = package.split('.')[0]
+        memory[package] = memory.get(package, 0) + stat.size
+
+print(json.dumps({'stages': stages, 'status': status, 'memory': memory}))
+'''
+
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)')
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesura l'arrencada d'un worker en un procés nou: temps i memòria (RSS) de cada fase fins a "
+        "servir la primera petició, i temps d'importació per paquet. Amb --budget-ms/--budget-mb "
+        "falla si se superen, per poder-ho comprovar a la CI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/restaurants/1/menuItems/public/',
+                            help="Petició de prova que es serveix en acabar l'arrencada.")
+        parser.add_argument('--top', type=int, default=15, help="Nombre de paquets a mostrar.")
+        parser.add_argument('--memory', action='store_true',
+                            help="Mesura també la memòria per paquet amb tracemalloc (alenteix l'arrencada).")
+        parser.add_argument('--budget-ms', type=float)
+        parser.add_argument('--budget-mb', type=float)
+
+    def handle(self, *args, **options):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+        child_options = {
+            'path': options['path'], 'host': host, 'memory': options['memory'], 'base_dir': str(settings.BASE_DIR),
+        }
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT, json.dumps(child_options)],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(f"{'stage':<15}{'time':>10}{'RSS':>10}{'+RSS':>10}{'modules':>9}")
+        previous_rss = None
+        for stage in report['stages']:
+            delta = '' if previous_rss is None else f"{(stage['rss'] - previous_rss) / 2 ** 20:.1f}MB"
+            self.stdout.write(
+                f"{stage['name']:<15}{stage['seconds'] * 1000:>8.1f}ms{stage['rss'] / 2 ** 20:>8.1f}MB"
+                f"{delta:>10}{stage['modules']:>9}"
+            )
+            previous_rss = stage['rss']
+        total_ms = sum(stage['seconds'] for stage in report['stages']) * 1000
+        total_mb = report['stages'][-1]['rss'] / 2 ** 20
+        self.stdout.write(f"total: {total_ms:.1f}ms, {total_mb:.1f}MB (first request: HTTP {report['status']})")
+
+        import_times = Counter()
+        for match in IMPORT_TIME.finditer(result.stderr):
+            import_times[match.group(3).split('.')[0]] += int(match.group(1))
+        self.stdout.write("\nImport time per package (self):")
+        for package, microseconds in import_times.most_common(options['top']):
+            self.stdout.write(f"  {package:<25}{microseconds / 1000:>8.1f}ms")
+
+        if report['memory']:
+            self.stdout.write("\nAllocated memory per package (tracemalloc):")
+            for package, size in Counter(report['memory']).most_common(options['top']):
+                self.stdout.write(f"  {package:<25}{size / 2 ** 20:>8.1f}MB")
+
+        if options['budget_ms'] is not None and total_ms > options['budget_ms']:
+            raise CommandError(f"Startup took {total_ms:.1f}ms, over the {options['budget_ms']}ms budget.")
+        if options['budget_mb'] is not None and total_mb > options['budget_mb']:
+            raise CommandError(f"Startup uses {total_mb:.1f}MB, over the {options['budget_mb']}MB budget.")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from menu.health import WARMUP_LANGUAGES, WARMUP_RESTAURANTS, popular_restaurant_ids, warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Omple la cache del menú públic dels restaurants indicats o, per defecte, dels més consultats. "
+        "Amb una cache compartida (p. ex. Redis) es pot executar just després d'un desplegament; "
+        "cada worker també s'escalfa sol a la primera crida a /readyz."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_ids', nargs='*', type=int)
+        parser.add_argument('--limit', type=int, default=WARMUP_RESTAURANTS,
+                            help="Nombre de restaurants més consultats a escalfar.")
+        parser.add_argument('--languages', nargs='*', default=WARMUP_LANGUAGES,
+                            help="Idiomes a escalfar a més del contingut original.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        restaurant_ids = options['restaurant_ids'] or popular_restaurant_ids(options['limit'])
+        warmed = warm_up(restaurant_ids, options['languages'])
+        self.stdout.write(f"{warmed} restaurants escalfats en {time.perf_counter() - start:.2f}s.")
@@ -0,0 +1,159 @@
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+# Els noms amb hash no canvien mai de contingut: un any i `immutable`
+HASHED_MAX_AGE = getattr(settings, 'MENU_MEDIA_HASHED_MAX_AGE', 60 * 60 * 24 * 365)
+# Fitxers pujats abans que els noms portessin hash
+MEDIA_MAX_AGE = getattr(settings, 'MENU_MEDIA_MAX_AGE', 60 * 60)
+# None (els envia Django), 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache, lighttpd)
+SENDFILE = getattr(settings, 'MENU_MEDIA_SENDFILE', None)
+# Location `internal` de nginx que apunta a MEDIA_ROOT
+ACCEL_PREFIX = getattr(settings, 'MENU_MEDIA_ACCEL_PREFIX', '/protected-media/')
+CHUNK_SIZE = 64 * 1024
+
+HASH_LENGTH = 12
+HASHED_NAME = re.compile(rf'\.([0-9a-f]{{{HASH_LENGTH}}})(\.[^./]+)?$')
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def content_hash(content):
+    hasher = hashlib.md5(usedforsecurity=False)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    content.seek(0)
+    return hasher.hexdigest()[:HASH_LENGTH]
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """
+    Desa els fitxers a MEDIA_ROOT amb el hash del contingut al nom (`logo.3f2a9c1b7d4e.png`), com
+    fa `ManifestStaticFilesStorage` amb els estàtics. Un contingut nou té una URL nova, de manera
+    que es poden guardar a la cache per sempre. Si el mateix fitxer ja hi és, es reaprofita.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        root, ext = os.path.splitext(name)
+        if max_length is not None:
+            root = root[:max_length - len(ext) - HASH_LENGTH - 1]
+        name = f'{root}.{content_hash(content)}{ext}'
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+def requested_range(request, size, etag, last_modified):
+    """
+    `(inici, final)` (inclusius) del `Range: bytes=` de la petició; None si cal el fitxer sencer (sense
+    Range, amb més d'un interval o amb un `If-Range` que ja no coincideix) i False si no és satisfactible.
+    """
+    header = request.META.get('HTTP_RANGE')
+    if not header:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        return None
+    match = BYTE_RANGE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), size - 1 if not last else min(int(last), size - 1)
+        if last and int(last) < start:
+            return None
+    else:
+        if not int(last):
+            return False
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size:
+        return False
+    return start, end
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(request, name, full_path, size, etag, last_modified):
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    if SENDFILE == 'x-accel-redirect':
+        # nginx envia el fitxer i resol els Range
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = ACCEL_PREFIX.rstrip('/') + '/' + quote(name)
+        return response
+    if SENDFILE == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = requested_range(request, size, etag, last_modified)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(read_range(full_path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serveix un fitxer de MEDIA_ROOT en producció, amb `ETag`/`Last-Modified` (respon 304 a les
+    peticions condicionals), `Range` d'un sol interval i `Cache-Control` d'un any per als noms amb
+    hash. Amb MENU_MEDIA_SENDFILE, el fitxer l'envia el servidor web.
+    """
+    try:
+        full_path = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        info = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404
+
+    hashed = HASHED_NAME.search(path)
+    etag = f'"{hashed.group(1)}"' if hashed else f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+    last_modified = int(info.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = file_response(request, path, full_path, info.st_size, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if hashed:
+        response['Cache-Control'] = f'public, max-age={HASHED_MAX_AGE}, immutable'
+    else:
+        response['Cache-Control'] = f'public, max-age={MEDIA_MAX_AGE}'
+    return response
@@ -0,0 +1,31 @@
+from django.core.cache import cache
+
+COUNTERS = set()
+
+
+def _counter_key(name):
+    return f'metrics:{name}'
+
+
+def register(*names):
+    """
+    Declara comptadors perquè surtin a `snapshot()` encara que aquest procés no els hagi incrementat.
+    """
+    COUNTERS.update(names)
+
+
+def increment(name, amount=1):
+    """
+    Incrementa un comptador compartit (a la cache, de manera que el veuen tots els workers).
+    """
+    COUNTERS.add(name)
+    try:
+        cache.incr(_counter_key(name), amount)
+    except ValueError:
+        if not cache.add(_counter_key(name), amount, None):
+            cache.incr(_counter_key(name), amount)
+
+
+def snapshot():
+    values = cache.get_many([_counter_key(name) for name in COUNTERS])
+    return {name: values.get(_counter_key(name), 0) for name in sorted(COUNTERS)}
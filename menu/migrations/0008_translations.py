@@ -0,0 +1,43 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0007_remove_category_order_remove_menuitem_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryTranslation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=10)),
+                ('name', models.CharField(max_length=100)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='menu.category')),
+            ],
+            options={
+                'verbose_name': 'Category Translation',
+                'verbose_name_plural': 'Category Translations',
+                'unique_together': {('category', 'language')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MenuItemTranslation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=10)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='menu.menuitem')),
+            ],
+            options={
+                'verbose_name': 'Menu Item Translation',
+                'verbose_name_plural': 'Menu Item Translations',
+                'unique_together': {('menu_item', 'language')},
+            },
+        ),
+    ]
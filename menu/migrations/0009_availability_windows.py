@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:10
+
+import django.db.models.deletion
+import menu.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0008_translations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='timezone',
+            field=models.CharField(default='UTC', max_length=64, validators=[menu.models.validate_timezone]),
+        ),
+        migrations.CreateModel(
+            name='AvailabilityWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_windows', to='menu.category')),
+                ('menu_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_windows', to='menu.menuitem')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_windows', to='menu.restaurant')),
+            ],
+            options={
+                'verbose_name': 'Availability Window',
+                'verbose_name_plural': 'Availability Windows',
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('category__isnull', False), ('menu_item__isnull', True)), models.Q(('category__isnull', True), ('menu_item__isnull', False)), _connector='OR'), name='availability_window_single_target')],
+            },
+        ),
+    ]
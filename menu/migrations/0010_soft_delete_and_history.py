@@ -0,0 +1,65 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0009_availability_windows'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('restaurant', 'Restaurant'), ('category', 'Category'), ('menu_item', 'Menu Item')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete'), ('restore', 'Restore'), ('categories', 'Categories')], max_length=20)),
+                ('diff', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Menu Change',
+                'verbose_name_plural': 'Menu Changes',
+            },
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['restaurant'], name='category_alive_restaurant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('is_available', True)), fields=['id'], name='menuitem_public_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['id'], name='restaurant_alive_idx'),
+        ),
+        migrations.AddField(
+            model_name='menuchange',
+            name='restaurant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='menu.restaurant'),
+        ),
+        migrations.AddIndex(
+            model_name='menuchange',
+            index=models.Index(fields=['restaurant', 'created_at'], name='menuchange_restaurant_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:20
+
+import django.db.models.deletion
+import menu.ordering
+from django.db import migrations, models
+
+
+def assign_initial_ranks(apps, schema_editor):
+    # Conserva l'ordre actual (per id) deixant espai entre rangs
+    Category = apps.get_model('menu', 'Category')
+    MenuItemCategory = apps.get_model('menu', 'MenuItemCategory')
+    db_alias = schema_editor.connection.alias
+
+    categories = list(Category.objects.using(db_alias).order_by('restaurant_id', 'id'))
+    for position, category in enumerate(categories, start=1):
+        category.rank = position * menu.ordering.RANK_GAP
+    Category.objects.using(db_alias).bulk_update(categories, ['rank'], batch_size=500)
+
+    links = list(MenuItemCategory.objects.using(db_alias).order_by('category_id', 'menu_item_id'))
+    for position, link in enumerate(links, start=1):
+        link.rank = position * menu.ordering.RANK_GAP
+    MenuItemCategory.objects.using(db_alias).bulk_update(links, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0010_soft_delete_and_history'),
+    ]
+
+    operations = [
+        # La taula intermèdia ja existeix (menu_menuitem_categories): només canvia l'estat del model
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='MenuItemCategory',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='menu.category')),
+                        ('menu_item', models.ForeignKey(db_column='menuitem_id', on_delete=django.db.models.deletion.CASCADE, to='menu.menuitem')),
+                    ],
+                    options={
+                        'db_table': 'menu_menuitem_categories',
+                        'unique_together': {('menu_item', 'category')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='menuitem',
+                    name='categories',
+                    field=models.ManyToManyField(related_name='items', through='menu.MenuItemCategory', to='menu.category'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='menuitemcategory',
+            name='rank',
+            field=models.BigIntegerField(default=menu.ordering.next_rank),
+        ),
+        migrations.AlterModelOptions(
+            name='category',
+            options={'ordering': ['rank', 'id'], 'verbose_name_plural': 'Categories'},
+        ),
+        migrations.RemoveIndex(
+            model_name='category',
+            name='category_alive_restaurant_idx',
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='rank',
+            field=models.BigIntegerField(default=menu.ordering.next_rank),
+        ),
+        migrations.RunPython(assign_initial_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['restaurant', 'rank'], name='category_alive_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitemcategory',
+            index=models.Index(fields=['category', 'rank'], name='menuitemcategory_rank_idx'),
+        ),
+    ]
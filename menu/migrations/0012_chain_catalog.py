@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0011_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Brand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='brand',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='restaurants', to='menu.brand'),
+        ),
+        migrations.CreateModel(
+            name='MenuItemOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('is_available', models.BooleanField(blank=True, null=True)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overrides', to='menu.menuitem')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_overrides', to='menu.restaurant')),
+            ],
+            options={
+                'verbose_name': 'Menu Item Override',
+                'verbose_name_plural': 'Menu Item Overrides',
+                'unique_together': {('menu_item', 'restaurant')},
+            },
+        ),
+    ]
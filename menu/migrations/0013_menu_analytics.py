@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0012_chain_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('restaurant_id', models.BigIntegerField()),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Menu view'), (2, 'Item view'), (3, 'Category open')])),
+                ('object_id', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Menu Event',
+                'verbose_name_plural': 'Menu Events',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyMenuStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Menu view'), (2, 'Item view'), (3, 'Category open')])),
+                ('object_id', models.BigIntegerField(default=0)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='menu.restaurant')),
+            ],
+            options={
+                'verbose_name': 'Daily Menu Stat',
+                'verbose_name_plural': 'Daily Menu Stats',
+                'unique_together': {('restaurant', 'date', 'kind', 'object_id')},
+            },
+        ),
+    ]
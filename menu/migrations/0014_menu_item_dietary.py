@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:49
+
+import menu.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0013_menu_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='allergens',
+            field=menu.models.FlagsField(flags=('gluten', 'crustaceans', 'eggs', 'fish', 'peanuts', 'soybeans', 'milk', 'nuts', 'celery', 'mustard', 'sesame', 'sulphites', 'lupin', 'molluscs')),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='tags',
+            field=menu.models.FlagsField(flags=('vegetarian', 'vegan', 'gluten_free', 'lactose_free', 'spicy', 'halal', 'kosher', 'organic')),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0014_menu_item_dietary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Category'), (2, 'Menu Item'), (3, 'Floor')])),
+                ('object_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menu_deltas', to='menu.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['restaurant', 'id'], name='menudelta_restaurant_seq_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0018_restaurant_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantShard',
+            fields=[
+                ('restaurant_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('alias', models.CharField(max_length=100)),
+                ('read_only', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Tenant Shard',
+                'verbose_name_plural': 'Tenant Shards',
+            },
+        ),
+        migrations.AlterField(
+            model_name='restaurantuser',
+            name='restaurant',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='menu.restaurant'),
+        ),
+    ]
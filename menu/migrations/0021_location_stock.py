@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+def copy_stock_to_locations(apps, schema_editor):
+    # Cada local on era l'ítem comença amb l'estoc que tenia l'ítem compartit
+    MenuItem = apps.get_model('menu', 'MenuItem')
+    MenuItemCategory = apps.get_model('menu', 'MenuItemCategory')
+    MenuItemOverride = apps.get_model('menu', 'MenuItemOverride')
+    db_alias = schema_editor.connection.alias
+
+    stock = dict(MenuItem.objects.using(db_alias).filter(stock__isnull=False).values_list('pk', 'stock'))
+    if not stock:
+        return
+    locations = MenuItemCategory.objects.using(db_alias).filter(menu_item_id__in=stock) \
+        .values_list('menu_item_id', 'category__restaurant_id').distinct()
+    for menu_item_id, restaurant_id in locations:
+        MenuItemOverride.objects.using(db_alias).update_or_create(
+            restaurant_id=restaurant_id, menu_item_id=menu_item_id, defaults={'stock': stock[menu_item_id]}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0020_request_profiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitemoverride',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_stock_to_locations, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='menuitem',
+            name='stock',
+        ),
+    ]
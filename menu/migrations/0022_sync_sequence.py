@@ -0,0 +1,48 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:36
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+FLOOR = 3
+
+
+def number_existing_changes(apps, schema_editor):
+    # Fins ara l'`id` era la seqüència: es conserva, perquè els `since` dels clients continuïn valent
+    MenuDelta = apps.get_model('menu', 'MenuDelta')
+    db_alias = schema_editor.connection.alias
+    changes = MenuDelta.objects.using(db_alias).exclude(kind=FLOOR)
+    changes.update(seq=F('id'))
+    for row in changes.values('restaurant_id').annotate(latest=Max('id')).order_by():
+        floor, _created = MenuDelta.objects.using(db_alias).get_or_create(
+            restaurant_id=row['restaurant_id'], kind=FLOOR, defaults={'object_id': 0}
+        )
+        floor.seq = max(row['latest'], floor.object_id)
+        floor.save(update_fields=['seq'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0021_location_stock'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='menudelta',
+            name='menudelta_restaurant_seq_idx',
+        ),
+        migrations.AddField(
+            model_name='menudelta',
+            name='seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(number_existing_changes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='menudelta',
+            index=models.Index(fields=['restaurant', 'seq'], name='menudelta_restaurant_seq_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='menudelta',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 3)), fields=('restaurant',), name='menudelta_one_floor'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0022_sync_sequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+    ]
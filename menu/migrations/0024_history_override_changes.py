@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0023_widen_order_total'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='menuchange',
+            name='model',
+            field=models.CharField(choices=[('restaurant', 'Restaurant'), ('category', 'Category'), ('menu_item', 'Menu Item'), ('menu_item_override', 'Menu Item Override')], max_length=20),
+        ),
+    ]
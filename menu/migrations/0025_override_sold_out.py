@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0024_history_override_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitemoverride',
+            name='sold_out',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -1,20 +1,179 @@
-from django.db import models
+import datetime
+import zoneinfo
+from decimal import Decimal
+
+from django import forms
+from django.db import models, transaction
+from django.utils import timezone as django_timezone
+from django.db.models import F, FilteredRelation, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from .ordering import next_rank
+
+def validate_timezone(value):
+    if value not in zoneinfo.available_timezones():
+        raise ValidationError(f"Unknown timezone: {value}")
+
+def history_value(field, value):
+    """
+    Converteix el valor d'un camp a un valor JSON estable per comparar-lo i guardar-lo a l'historial.
+    """
+    if value is None:
+        return None
+    if isinstance(field, models.DecimalField):
+        return str(field.to_python(value).quantize(Decimal(10) ** -field.decimal_places))
+    if isinstance(field, models.FileField):
+        return value.name or None
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+# Els bits de cada nom són la seva posició: només s'hi poden afegir noms al final
+MENU_TAGS = ('vegetarian', 'vegan', 'gluten_free', 'lactose_free', 'spicy', 'halal', 'kosher', 'organic')
+ALLERGENS = (
+    'gluten', 'crustaceans', 'eggs', 'fish', 'peanuts', 'soybeans', 'milk', 'nuts',
+    'celery', 'mustard', 'sesame', 'sulphites', 'lupin', 'molluscs',
+)
+
+class FlagsField(models.PositiveIntegerField):
+    """
+    Conjunt de noms de `flags` guardat com una màscara de bits. Als formularis es mostra
+    com a caselles i a l'ORM es llegeix i s'escriu com a enter.
+    """
+    def __init__(self, *args, flags=(), **kwargs):
+        self.flags = tuple(flags)
+        kwargs.setdefault('default', 0)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['flags'] = self.flags
+        if kwargs.get('default') == 0:
+            del kwargs['default']
+        return name, path, args, kwargs
+
+    def to_mask(self, names):
+        return sum(1 << self.flags.index(name) for name in set(names))
+
+    def to_names(self, mask):
+        return [name for bit, name in enumerate(self.flags) if mask >> bit & 1]
+
+    def value_from_object(self, obj):
+        return self.to_names(super().value_from_object(obj) or 0)
+
+    def value_to_string(self, obj):
+        return str(super().value_from_object(obj))
+
+    def save_form_data(self, instance, data):
+        setattr(instance, self.attname, self.to_mask(data))
+
+    def formfield(self, **kwargs):
+        return forms.MultipleChoiceField(
+            choices=[(name, name.replace('_', ' ').capitalize()) for name in self.flags],
+            widget=forms.CheckboxSelectMultiple, required=False, label=self.verbose_name.capitalize(),
+        )
+
+class AliveManager(models.Manager):
+    """
+    Manager per defecte que amaga les files esborrades amb `soft_delete()`.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+class SoftDeleteModel(models.Model):
+    """
+    Model amb esborrat lògic i seguiment dels camps de `history_fields` per a l'historial de canvis.
+    """
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    history_fields = ()
 
-class Restaurant(models.Model):
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in field_names for name in cls.history_attnames()):
+            instance.history_snapshot = instance.history_values()
+        return instance
+
+    @classmethod
+    def history_attnames(cls):
+        return [cls._meta.get_field(name).attname for name in cls.history_fields] + ['deleted_at']
+
+    def history_values(self):
+        values = {name: history_value(self._meta.get_field(name), getattr(self, name)) for name in self.history_fields}
+        values['deleted_at'] = self.deleted_at is not None
+        return values
+
+    def soft_delete(self, at=None):
+        self.deleted_at = at or django_timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+    def restore(self):
+        self.deleted_at = None
+        self.save(update_fields=['deleted_at'])
+
+class Brand(models.Model):
+    """
+    Cadena de restaurants. Els ítems de catàleg de la cadena es defineixen un sol cop i es posen a les
+    categories de cada local, que en pot canviar el preu i la disponibilitat amb `MenuItemOverride`.
+    """
+    name = models.CharField(max_length=255)
+
+    def __str__(self):
+        return self.name
+
+class Restaurant(SoftDeleteModel):
+    brand = models.ForeignKey(Brand, on_delete=models.SET_NULL, null=True, blank=True, related_name='restaurants')
     name = models.CharField(max_length=255)
     address = models.CharField(max_length=255, blank=True, null=True)
     hours = models.CharField(max_length=255, blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     logo = models.ImageField(upload_to='restaurant_photos/', blank=True, null=True)
+    timezone = models.CharField(max_length=64, default='UTC', validators=[validate_timezone])
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+
+    objects = AliveManager()
+    all_objects = models.Manager()
+
+    history_fields = ('name', 'address', 'hours', 'phone', 'logo', 'timezone', 'latitude', 'longitude')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True), name='restaurant_alive_idx'),
+            # Prefiltre per caixa de `menu.geo.nearby_restaurants`
+            models.Index(fields=['latitude', 'longitude'], condition=Q(deleted_at__isnull=True, latitude__isnull=False),
+                         name='restaurant_location_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def soft_delete(self, at=None):
+        # Les categories s'esborren una a una, amb la mateixa marca de temps, perquè quedin a
+        # l'historial i `restore()` sàpiga quines ha d'abaixar
+        at = at or django_timezone.now()
+        with transaction.atomic(using=self._state.db):
+            for category in self.categories.all():
+                category.soft_delete(at)
+            super().soft_delete(at)
+
+    def restore(self):
+        # Només les categories esborrades amb el restaurant; les que ja ho eren abans continuen esborrades
+        with transaction.atomic(using=self._state.db):
+            for category in Category.all_objects.filter(restaurant=self, deleted_at=self.deleted_at):
+                category.restore()
+            super().restore()
+
 class RestaurantUser(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    restaurant = models.ForeignKey(Restaurant, on_delete=models.SET_NULL, null=True, blank=True)
+    # És global (`menu.sharding`) i el restaurant pot ser en una altra base de dades
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False)
 
     class Meta:
         verbose_name = "Restaurant User"
@@ -31,26 +190,116 @@ class RestaurantUser(models.Model):
         else:
             return self.user.username
     
-class Category(models.Model):
+class CategoryQuerySet(models.QuerySet):
+    def translated(self, language=None):
+        """
+        Afegeix `translated_name` amb la traducció a `language`, o el nom original si no n'hi ha.
+        """
+        if not language:
+            return self.annotate(translated_name=F('name'))
+        return self.annotate(
+            translation=FilteredRelation('translations', condition=Q(translations__language=language)),
+            translated_name=Coalesce(NullIf('translation__name', Value('')), 'name'),
+        )
+
+class Category(SoftDeleteModel):
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='categories')
     name = models.CharField(max_length=100)
+    rank = models.BigIntegerField(default=next_rank)
+
+    objects = AliveManager.from_queryset(CategoryQuerySet)()
+    all_objects = CategoryQuerySet.as_manager()
+
+    history_fields = ('name',)
 
     class Meta:
         verbose_name_plural = "Categories"
+        ordering = ['rank', 'id']
+        indexes = [
+            models.Index(fields=['restaurant', 'rank'], condition=Q(deleted_at__isnull=True), name='category_alive_rank_idx'),
+        ]
 
     def __str__(self):
         return f'{self.restaurant.name} - {self.name}'
     
-class MenuItem(models.Model):
-    categories = models.ManyToManyField(Category, related_name='items')
+class MenuItemQuerySet(models.QuerySet):
+    def translated(self, language=None):
+        """
+        Afegeix `translated_name` i `translated_description`, amb el contingut original com a alternativa.
+        """
+        if not language:
+            return self.annotate(translated_name=F('name'), translated_description=F('description'))
+        return self.annotate(
+            translation=FilteredRelation('translations', condition=Q(translations__language=language)),
+            translated_name=Coalesce(NullIf('translation__name', Value('')), 'name'),
+            translated_description=Coalesce(
+                NullIf('translation__description', Value('')), 'description', output_field=models.TextField()
+            ),
+        )
+
+    def for_restaurant(self, restaurant_id):
+        """
+        Ítems que són en alguna categoria no esborrada del restaurant.
+        """
+        return self.filter(categories__restaurant_id=restaurant_id, categories__deleted_at__isnull=True).distinct()
+
+    def in_menu_order(self, restaurant_id):
+        """
+        Ordena els ítems per la primera de les seves categories del restaurant i, dins d'aquesta,
+        pel rang de l'ítem a la categoria.
+        """
+        links = MenuItemCategory.objects.filter(
+            menu_item=OuterRef('pk'), category__restaurant_id=restaurant_id, category__deleted_at__isnull=True
+        ).order_by('category__rank', 'category_id', 'rank')
+        return self.annotate(
+            category_rank=Subquery(links.values('category__rank')[:1]),
+            item_rank=Subquery(links.values('rank')[:1]),
+        ).order_by('category_rank', 'item_rank', 'pk')
+
+    def resolved(self, restaurant_id):
+        """
+        Afegeix `resolved_price` i `resolved_is_available`: els valors del local `restaurant_id`
+        si en té un `MenuItemOverride`, o els de l'ítem si no, i `resolved_stock`, l'estoc del local.
+        Es resol amb un LEFT JOIN.
+        """
+        return self.annotate(
+            location_override=FilteredRelation('overrides', condition=Q(overrides__restaurant_id=restaurant_id)),
+            resolved_price=Coalesce('location_override__price', 'price', output_field=models.DecimalField(
+                max_digits=5, decimal_places=2
+            )),
+            resolved_is_available=Coalesce(
+                'location_override__is_available', 'is_available', output_field=models.BooleanField()
+            ),
+            resolved_stock=F('location_override__stock'),
+        )
+
+    def with_translated_categories(self, language=None, restaurant_id=None):
+        # Amb `restaurant_id`, només les categories d'aquest local
+        categories = Category.objects.translated(language)
+        if restaurant_id is not None:
+            categories = categories.filter(restaurant_id=restaurant_id)
+        return self.prefetch_related(Prefetch('categories', queryset=categories))
+
+class MenuItem(SoftDeleteModel):
+    categories = models.ManyToManyField(Category, related_name='items', through='MenuItemCategory')
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=5, decimal_places=2)
     is_available = models.BooleanField(default=True)
+    tags = FlagsField(flags=MENU_TAGS)
+    allergens = FlagsField(flags=ALLERGENS)
+
+    objects = AliveManager.from_queryset(MenuItemQuerySet)()
+    all_objects = MenuItemQuerySet.as_manager()
+
+    history_fields = ('name', 'description', 'price', 'is_available', 'tags', 'allergens')
 
     class Meta:
         verbose_name = "Menu Item"
         verbose_name_plural = "Menu Items"
+        indexes = [
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True, is_available=True), name='menuitem_public_idx'),
+        ]
 
     def __str__(self):
         category_names = ", ".join([category.name for category in self.categories.all()])
@@ -58,4 +307,291 @@ class MenuItem(models.Model):
     
     def clean(self):
         if self.price <= 0:
-            raise ValidationError("Price must be greater than zero.")
\ No newline at end of file
+            raise ValidationError("Price must be greater than zero.")
+
+class MenuItemCategory(models.Model):
+    """
+    Relació entre ítems i categories amb la posició de l'ítem dins de la categoria.
+    """
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, db_column='menuitem_id')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    rank = models.BigIntegerField(default=next_rank)
+
+    class Meta:
+        db_table = 'menu_menuitem_categories'
+        unique_together = ('menu_item', 'category')
+        indexes = [
+            models.Index(fields=['category', 'rank'], name='menuitemcategory_rank_idx'),
+        ]
+
+class MenuItemOverride(models.Model):
+    """
+    Preu, disponibilitat i estoc d'un ítem en un local concret. Els camps buits de preu i disponibilitat
+    fan servir el valor de l'ítem; l'estoc sempre és del local.
+    """
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='item_overrides')
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name='overrides')
+    price = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    is_available = models.BooleanField(null=True, blank=True)
+    # Unitats disponibles al local; null vol dir que no es porta el compte. Es canvia amb `menu.inventory`
+    stock = models.PositiveIntegerField(null=True, blank=True)
+    # L'ítem no és disponible perquè s'ha exhaurit l'estoc (i no perquè ho hagi decidit el personal):
+    # en reposar-lo torna a estar disponible
+    sold_out = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        verbose_name = "Menu Item Override"
+        verbose_name_plural = "Menu Item Overrides"
+        unique_together = ('menu_item', 'restaurant')
+
+    def __str__(self):
+        return f'{self.menu_item.name} @ {self.restaurant.name}'
+
+    def clean(self):
+        if self.price is not None and self.price <= 0:
+            raise ValidationError("Price must be greater than zero.")
+
+class CategoryTranslation(models.Model):
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='translations')
+    language = models.CharField(max_length=10)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name = "Category Translation"
+        verbose_name_plural = "Category Translations"
+        unique_together = ('category', 'language')
+
+    def __str__(self):
+        return f'{self.category.name} [{self.language}] - {self.name}'
+
+class MenuItemTranslation(models.Model):
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name='translations')
+    language = models.CharField(max_length=10)
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Menu Item Translation"
+        verbose_name_plural = "Menu Item Translations"
+        unique_together = ('menu_item', 'language')
+
+    def __str__(self):
+        return f'{self.menu_item.name} [{self.language}] - {self.name}'
+
+class AvailabilityWindow(models.Model):
+    """
+    Franja horària en què una categoria o un ítem es mostra al menú públic, en l'hora local del restaurant.
+    Si `end_time` és anterior o igual a `start_time` la franja acaba l'endemà.
+    """
+    WEEKDAYS = [
+        (0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'),
+        (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday'),
+    ]
+
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='availability_windows')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='availability_windows')
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, null=True, blank=True, related_name='availability_windows')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        verbose_name = "Availability Window"
+        verbose_name_plural = "Availability Windows"
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(category__isnull=False, menu_item__isnull=True) | Q(category__isnull=True, menu_item__isnull=False),
+                name='availability_window_single_target',
+            ),
+        ]
+
+    def __str__(self):
+        target = self.category or self.menu_item
+        return f'{target.name} - {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}'
+
+    def clean(self):
+        if (self.category_id is None) == (self.menu_item_id is None):
+            raise ValidationError("An availability window must target either a category or a menu item.")
+
+class MenuChange(models.Model):
+    """
+    Historial de canvis (només s'hi afegeixen files) del menú d'un restaurant.
+
+    `diff` és compacte: a `create` conté els valors inicials, a `update` només els camps
+    canviats com a `{camp: [anterior, nou]}` i a `categories` els ids afegits i tretes
+    (`{"add": [...], "remove": [...]}`).
+    """
+    ACTIONS = [
+        ('create', 'Create'), ('update', 'Update'), ('delete', 'Delete'),
+        ('restore', 'Restore'), ('categories', 'Categories'),
+    ]
+    MODELS = [
+        ('restaurant', 'Restaurant'), ('category', 'Category'), ('menu_item', 'Menu Item'),
+        # `object_id` és l'ítem; l'override és el del restaurant del canvi
+        ('menu_item_override', 'Menu Item Override'),
+    ]
+
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='changes')
+    model = models.CharField(max_length=20, choices=MODELS)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    diff = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Menu Change"
+        verbose_name_plural = "Menu Changes"
+        indexes = [
+            models.Index(fields=['restaurant', 'created_at'], name='menuchange_restaurant_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_model_display()} {self.object_id} - {self.action}'
+
+class MenuDelta(models.Model):
+    """
+    Registre de la sincronització incremental del menú públic: cada escriptura que canvia una
+    categoria o un ítem d'un restaurant hi afegeix una fila amb `seq`, la seqüència del restaurant.
+    La fila `FLOOR` de cada restaurant porta en `seq` l'última seqüència repartida i en `object_id`
+    la més nova que s'ha esborrat en compactar (`sync.compact()`). `sync.record_changes` la bloqueja
+    fins al final de la transacció, de manera que `seq` segueix l'ordre en què es confirmen les
+    escriptures (l'`id` segueix el dels INSERT, que pot ser un altre).
+    """
+    CATEGORY = 1
+    MENU_ITEM = 2
+    FLOOR = 3
+    KINDS = [(CATEGORY, 'Category'), (MENU_ITEM, 'Menu Item'), (FLOOR, 'Floor')]
+
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='menu_deltas')
+    kind = models.PositiveSmallIntegerField(choices=KINDS)
+    object_id = models.BigIntegerField()
+    seq = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(default=django_timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant', 'seq'], name='menudelta_restaurant_seq_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant'], condition=Q(kind=3), name='menudelta_one_floor'),  # FLOOR
+        ]
+
+class MenuEvent(models.Model):
+    """
+    Esdeveniment d'analítica en brut, escrit per lots des de `menu.analytics`. `roll_up()` l'agrega a
+    `DailyMenuStat` i l'esborra. `restaurant_id` no és clau forana perquè un id invàlid no faci fallar tot el lot.
+    """
+    MENU_VIEW = 1
+    ITEM_VIEW = 2
+    CATEGORY_OPEN = 3
+    KINDS = [(MENU_VIEW, 'Menu view'), (ITEM_VIEW, 'Item view'), (CATEGORY_OPEN, 'Category open')]
+
+    restaurant_id = models.BigIntegerField()
+    kind = models.PositiveSmallIntegerField(choices=KINDS)
+    object_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Menu Event"
+        verbose_name_plural = "Menu Events"
+
+class DailyMenuStat(models.Model):
+    """
+    Nombre d'esdeveniments d'un tipus per restaurant, dia i objecte (0 per a les visites al menú).
+    """
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    kind = models.PositiveSmallIntegerField(choices=MenuEvent.KINDS)
+    object_id = models.BigIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily Menu Stat"
+        verbose_name_plural = "Daily Menu Stats"
+        unique_together = ('restaurant', 'date', 'kind', 'object_id')
+
+    def __str__(self):
+        return f'{self.restaurant_id} {self.date} {self.get_kind_display()} {self.object_id}: {self.count}'
+
+class Order(models.Model):
+    """
+    Comanda feta pels clients des de la taula. El total i les línies guarden el preu del moment,
+    de manera que els canvis posteriors del menú no l'afecten.
+    """
+    PENDING = 'pending'
+    ACCEPTED = 'accepted'
+    SERVED = 'served'
+    CANCELLED = 'cancelled'
+    STATUSES = [(PENDING, 'Pending'), (ACCEPTED, 'Accepted'), (SERVED, 'Served'), (CANCELLED, 'Cancelled')]
+    OPEN_STATUSES = [PENDING, ACCEPTED]
+
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='orders')
+    table = models.CharField(max_length=32, blank=True)
+    note = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(default=django_timezone.now)
+
+    class Meta:
+        verbose_name = "Order"
+        verbose_name_plural = "Orders"
+        indexes = [
+            # Cua de comandes: `WHERE restaurant_id = ? AND status IN (...) AND id > ? ORDER BY id`
+            models.Index(fields=['restaurant', 'status', 'id'], name='order_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.restaurant_id} #{self.pk} ({self.table}): {self.total}'
+
+class OrderLine(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    # El nom i el preu es copien: l'ítem es pot canviar o esborrar després
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.SET_NULL, null=True, related_name='order_lines')
+    name = models.CharField(max_length=255)
+    unit_price = models.DecimalField(max_digits=5, decimal_places=2)
+    quantity = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = "Order Line"
+        verbose_name_plural = "Order Lines"
+
+class TenantShard(models.Model):
+    """
+    Directori de tenants: base de dades (àlies de `DATABASES`) on són les dades de cada restaurant.
+    Els restaurants que no hi surten són a `default`. És global, com els comptes (`menu.sharding`).
+    """
+    restaurant_id = models.BigIntegerField(primary_key=True)
+    alias = models.CharField(max_length=100)
+    # Mentre es trasllada a una altra base de dades no s'hi pot escriure
+    read_only = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "Tenant Shard"
+        verbose_name_plural = "Tenant Shards"
+
+    def __str__(self):
+        return f'{self.restaurant_id}: {self.alias}'
+
+class RequestProfile(models.Model):
+    """
+    Perfil d'una petició que staff ha demanat amb la capçalera `X-Profile` (`menu.profiling`):
+    l'informe en text i les estadístiques de cProfile en format `pstats` (marshal).
+    """
+    created_at = models.DateTimeField(default=django_timezone.now)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField()
+    sql_ms = models.FloatField()
+    serializers_ms = models.FloatField()
+    report = models.TextField()
+    stats = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Request Profile"
+        verbose_name_plural = "Request Profiles"
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration_ms:.0f} ms)'
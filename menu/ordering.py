@@ -0,0 +1,66 @@
+import time
+
+from django.db import transaction
+from django.db.models import Q
+
+RANK_GAP = 2 ** 16
+
+
+def next_rank():
+    """
+    Rang per defecte: creix amb el temps, de manera que els objectes nous queden al final
+    sense haver de consultar el rang més alt, i deixa espai entre rangs consecutius.
+    """
+    return time.time_ns() // 1000
+
+
+def rank_between(previous_rank, following_rank):
+    """
+    Rang entre dos veïns (None vol dir que no n'hi ha). Retorna None si no queda espai.
+    """
+    if previous_rank is None and following_rank is None:
+        return next_rank()
+    if previous_rank is None:
+        return following_rank - RANK_GAP
+    if following_rank is None:
+        return previous_rank + RANK_GAP
+    if following_rank - previous_rank > 1:
+        return (previous_rank + following_rank) // 2
+    return None
+
+
+def rebalance(siblings):
+    """
+    Torna a repartir els rangs d'una llista amb separació `RANK_GAP`. Només cal quan dos veïns
+    tenen rangs consecutius, així que és poc freqüent.
+    """
+    objs = list(siblings.order_by('rank', 'pk'))
+    for position, obj in enumerate(objs, start=1):
+        obj.rank = position * RANK_GAP
+    siblings.model.objects.bulk_update(objs, ['rank'])
+
+
+def move(siblings, key_field, key, after_key=None):
+    """
+    Col·loca l'element `key` de `siblings` just després de `after_key` (o al principi si és None).
+    Normalment només s'actualitza una fila.
+    """
+    with transaction.atomic(using=siblings.db):
+        siblings = siblings.order_by('rank', 'pk')
+        others = siblings.exclude(**{key_field: key})
+
+        for _attempt in range(2):
+            if after_key is None:
+                previous_rank = None
+                following = others.values_list('rank', flat=True).first()
+            else:
+                previous = others.filter(**{key_field: after_key}).values('rank', 'pk').get()
+                previous_rank = previous['rank']
+                following = others.filter(
+                    Q(rank__gt=previous_rank) | Q(rank=previous_rank, pk__gt=previous['pk'])
+                ).values_list('rank', flat=True).first()
+
+            rank = rank_between(previous_rank, following)
+            if rank is not None:
+                return siblings.filter(**{key_field: key}).update(rank=rank)
+            rebalance(siblings)
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db import transaction
+
+from .availability import get_schedule
+from .inventory import OutOfStock, consume
+from .models import Category, MenuItem, Order, OrderLine
+from .sharding import tenant_db
+from . import metrics
+
+ORDER_MAX_LINES = getattr(settings, 'MENU_ORDER_MAX_LINES', 50)
+ORDER_QUEUE_PAGE_SIZE = getattr(settings, 'MENU_ORDER_QUEUE_PAGE_SIZE', 100)
+
+metrics.register('orders.submitted', 'orders.rejected')
+
+
+class OrderRejected(Exception):
+    """
+    La comanda no es pot acceptar tal com és: `unavailable` són els ítems que ja no es poden demanar
+    i `prices` els preus actuals dels que han canviat respecte del que ha vist el client.
+    """
+
+    def __init__(self, unavailable=(), prices=None):
+        super().__init__("Some items are unavailable or have changed price.")
+        self.unavailable = sorted(unavailable)
+        self.prices = prices or {}
+
+
+def orderable_items(restaurant_id, item_ids):
+    """
+    Nom, preu i estoc del local dels ítems de `item_ids` que ara es poden demanar (els mateixos que
+    mostra el menú públic), amb una sola consulta a més de la de les franges horàries.
+    """
+    schedule = get_schedule(restaurant_id)
+    if schedule.inactive_category_ids:
+        categories = Category.objects.filter(restaurant_id=restaurant_id).exclude(pk__in=schedule.inactive_category_ids)
+        menu_items = MenuItem.objects.filter(categories__in=categories)
+    else:
+        menu_items = MenuItem.objects.for_restaurant(restaurant_id)
+    rows = menu_items.resolved(restaurant_id).filter(pk__in=item_ids, resolved_is_available=True) \
+        .exclude(pk__in=schedule.inactive_item_ids).distinct() \
+        .values_list('pk', 'name', 'resolved_price', 'resolved_stock')
+    return {pk: (name, price, stock) for pk, name, price, stock in rows}
+
+
+def submit_order(restaurant_id, lines, table='', note=''):
+    """
+    Valida les línies (`{"id", "quantity", "price"}`, amb `price` opcional) contra el menú actual i
+    desa la comanda amb les línies en una transacció curta: l'estoc dels ítems que en porten es
+    descompta en ordre d'id, perquè les comandes simultànies no s'encallin entre elles.
+    Llança `OrderRejected` si algun ítem no es pot demanar o ha canviat de preu.
+    """
+    items = orderable_items(restaurant_id, [line['id'] for line in lines])
+    unavailable = [line['id'] for line in lines if line['id'] not in items]
+    prices = {
+        line['id']: items[line['id']][1] for line in lines
+        if line['id'] in items and line.get('price') is not None and line['price'] != items[line['id']][1]
+    }
+    if unavailable or prices:
+        metrics.increment('orders.rejected')
+        raise OrderRejected(unavailable, prices)
+
+    try:
+        with transaction.atomic(using=tenant_db()):
+            for line in sorted(lines, key=lambda line: line['id']):
+                if items[line['id']][2] is not None:
+                    try:
+                        consume(restaurant_id, line['id'], line['quantity'])
+                    except OutOfStock:
+                        raise OrderRejected([line['id']])
+            order = Order.objects.create(
+                restaurant_id=restaurant_id, table=table, note=note,
+                total=sum(items[line['id']][1] * line['quantity'] for line in lines),
+            )
+            OrderLine.objects.bulk_create([
+                OrderLine(order=order, menu_item_id=line['id'], name=items[line['id']][0],
+                          unit_price=items[line['id']][1], quantity=line['quantity'])
+                for line in lines
+            ])
+    except OrderRejected:
+        metrics.increment('orders.rejected')
+        raise
+    metrics.increment('orders.submitted')
+    return order
+
+
+def order_queue(restaurant_id, statuses=Order.OPEN_STATUSES, after=None, limit=ORDER_QUEUE_PAGE_SIZE):
+    """
+    Comandes del restaurant en ordre d'arribada, paginades per clau (`id > after`) de manera que
+    el cost no depèn de quantes n'hi ha al davant. Les línies es carreguen amb una segona consulta.
+    """
+    orders = Order.objects.filter(restaurant_id=restaurant_id, status__in=statuses).order_by('id')
+    if after:
+        orders = orders.filter(id__gt=after)
+    return list(orders.prefetch_related('lines')[:limit])
@@ -0,0 +1,116 @@
+from collections import defaultdict
+from decimal import Context, Decimal
+
+from django.db.models import F, FilteredRelation, Q, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from .models import Category, MenuItem, MenuItemCategory
+
+# Camí ràpid de lectura: les respostes es construeixen amb `values_list()` en lloc dels serializers.
+# Cada funció ha de generar exactament el mateix que el serializer equivalent (claus, ordre i format).
+
+_price_field = MenuItem._meta.get_field('price')
+PRICE_QUANTUM = Decimal(10) ** -_price_field.decimal_places
+PRICE_CONTEXT = Context(prec=_price_field.max_digits)
+_tags_field = MenuItem._meta.get_field('tags')
+_allergens_field = MenuItem._meta.get_field('allergens')
+
+
+def format_price(value):
+    """
+    Preu com el mostra `serializers.DecimalField` (cadena amb tots els decimals).
+    """
+    return f'{value.quantize(PRICE_QUANTUM, context=PRICE_CONTEXT):f}'
+
+
+def file_url(value, request=None):
+    """
+    URL d'un fitxer com el mostra `serializers.ImageField(use_url=True)`.
+    """
+    if not value:
+        return None
+    return request.build_absolute_uri(value.url) if request is not None else value.url
+
+
+def item_categories(item_ids, language=None, restaurant_id=None):
+    """
+    `{item_id: [(category_id, name), ...]}` amb les categories no esborrades de cada ítem,
+    en l'ordre de `Category.Meta.ordering` i amb el nom traduït a `language`. Amb `restaurant_id`,
+    només les d'aquest local (un ítem compartit també és a categories d'altres locals de la cadena).
+    """
+    links = MenuItemCategory.objects.filter(menu_item_id__in=item_ids, category__deleted_at__isnull=True)
+    if restaurant_id is not None:
+        links = links.filter(category__restaurant_id=restaurant_id)
+    if language:
+        links = links.annotate(
+            translation=FilteredRelation(
+                'category__translations', condition=Q(category__translations__language=language)
+            ),
+            category_name=Coalesce(NullIf('translation__name', Value('')), 'category__name'),
+        )
+    else:
+        links = links.annotate(category_name=F('category__name'))
+
+    categories = defaultdict(list)
+    for item_id, category_id, name in links.order_by('category__rank', 'category_id') \
+            .values_list('menu_item_id', 'category_id', 'category_name'):
+        categories[item_id].append((category_id, name))
+    return categories
+
+
+def category_rows(categories):
+    """
+    Equivalent a `CategorySerializer`/`PublicCategorySerializer` per a un queryset amb `translated()`.
+    """
+    return [{'id': pk, 'name': name} for pk, name in categories.values_list('pk', 'translated_name')]
+
+
+def menu_item_rows(menu_items, language=None, resolved=False, restaurant_id=None):
+    """
+    Equivalent a `MenuItemSerializer` per a un queryset amb `translated()`, i amb `resolved=True` i un queryset
+    amb `translated()` i `resolved()` (preu i disponibilitat del local), al que fa amb aquest queryset o a
+    `PublicMenuItemSerializer` (que també passa `restaurant_id`, per donar només les categories del local).
+    Fa dues consultes: els ítems i les seves categories.
+    """
+    price, is_available = ('resolved_price', 'resolved_is_available') if resolved else ('price', 'is_available')
+    rows = list(menu_items.values_list(
+        'pk', 'translated_name', 'translated_description', price, is_available, 'tags', 'allergens'
+    ))
+    categories = item_categories([row[0] for row in rows], language, restaurant_id)
+    return [
+        {
+            'id': pk,
+            'name': name,
+            'description': description,
+            'price': format_price(price),
+            'is_available': is_available,
+            'tags': _tags_field.to_names(tags),
+            'allergens': _allergens_field.to_names(allergens),
+            'categories': [category_id for category_id, _name in categories[pk]],
+            'category_names': [category_name for _id, category_name in categories[pk]],
+        }
+        for pk, name, description, price, is_available, tags, allergens in rows
+    ]
+
+
+def public_restaurant_payload(restaurant, request=None, language=None):
+    """
+    Equivalent a `PublicRestaurantSerializer`.
+    """
+    return {
+        'id': restaurant.id,
+        'name': restaurant.name,
+        'address': restaurant.address,
+        'hours': restaurant.hours,
+        'phone': restaurant.phone,
+        'timezone': restaurant.timezone,
+        'latitude': restaurant.latitude,
+        'longitude': restaurant.longitude,
+        'logo': file_url(restaurant.logo, request),
+        'categories': category_rows(Category.objects.filter(restaurant=restaurant).translated(language)),
+        'menuItems': menu_item_rows(
+            MenuItem.objects.for_restaurant(restaurant.id).in_menu_order(restaurant.id).resolved(restaurant.id)
+            .translated(language),
+            language, resolved=True, restaurant_id=restaurant.id,
+        ),
+    }
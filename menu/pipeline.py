@@ -0,0 +1,93 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import csrf
+from rest_framework.negotiation import BaseContentNegotiation
+
+from .renderers import FastJSONRenderer
+
+# Rutes de les accions amb `public=True` (vegeu `PublicEndpointMixin`)
+PUBLIC_PATH = re.compile(r'^/api/restaurants/\d+/(public|menu/changes|categories/public|menuItems/public(/facets)?)/$')
+PUBLIC_METHODS = ('GET', 'HEAD')
+
+
+def lean_public_enabled():
+    # Es llegeix a cada petició perquè `bench_public_api` pugui comparar els dos camins
+    return getattr(settings, 'MENU_LEAN_PUBLIC', True)
+
+
+def is_lean_public(request):
+    if request.method not in PUBLIC_METHODS or not lean_public_enabled():
+        return False
+    # També els fitxers de MEDIA_URL (logos) quan els serveix Django
+    return PUBLIC_PATH.match(request.path_info) is not None or request.path_info.startswith(settings.MEDIA_URL)
+
+
+def public_first(patterns):
+    """
+    Posa primer les rutes de les accions amb `public=True`, perquè es resolguin sense provar totes les altres.
+    """
+    return sorted(patterns, key=lambda pattern: not getattr(pattern.callback, 'initkwargs', {}).get('public'))
+
+
+class PublicNegotiation(BaseContentNegotiation):
+    """
+    Sense negociació: sempre el primer renderer, sense mirar `Accept` ni `?format=`.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class PublicEndpointMixin:
+    """
+    Les accions amb `public=True` (el menú públic, anònim) no autentiquen, no negocien el format i
+    sempre responen JSON amb `FastJSONRenderer`. Els límits de peticions s'hi continuen aplicant.
+    """
+    public = False
+
+    def is_lean(self):
+        return self.public and lean_public_enabled()
+
+    def get_authenticators(self):
+        return [] if self.is_lean() else super().get_authenticators()
+
+    def get_renderers(self):
+        return [FastJSONRenderer()] if self.is_lean() else super().get_renderers()
+
+    def get_content_negotiator(self):
+        return PublicNegotiation() if self.is_lean() else super().get_content_negotiator()
+
+
+class SkipOnPublicMixin:
+    """
+    El middleware no fa res a les peticions públiques (`PUBLIC_PATH` i MEDIA_URL): no hi ha sessió,
+    usuari ni missatges que calgui carregar.
+    """
+
+    def __call__(self, request):
+        if is_lean_public(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkipOnPublicMixin, sessions_middleware.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipOnPublicMixin, csrf.CsrfViewMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(SkipOnPublicMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SkipOnPublicMixin, messages_middleware.MessageMiddleware):
+    pass
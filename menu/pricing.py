@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, Exists, ExpressionWrapper, F, OuterRef, Value, When
+from django.db.models.functions import Round
+
+from .events import make_event
+from .history import record_field_changes
+from .inventory import location_overrides
+from .models import Category, MenuItem, MenuDelta, history_value
+from .signals import item_restaurant_ids, menu_changed
+from .sync import record_changes
+
+PRICE_FIELD = MenuItem._meta.get_field('price')
+# 999.99 amb max_digits=5 i decimal_places=2
+MAX_PRICE = Decimal(10) ** (PRICE_FIELD.max_digits - PRICE_FIELD.decimal_places) - Decimal(10) ** -PRICE_FIELD.decimal_places
+
+
+class InvalidPrices(Exception):
+    """
+    Algun preu quedaria a zero o per sota, o no hi cabria al camp. `ids` són els ítems afectats.
+    """
+
+    def __init__(self, ids):
+        super().__init__(f"Prices must stay above zero and at most {MAX_PRICE}.")
+        self.ids = ids
+
+
+def price_expression(percent=None, amount=None, price='price'):
+    """
+    Preu nou calculat a la base de dades a partir del camp `price`: `percent` (p. ex. 5 o -10) arrodonit
+    als cèntims, o `amount` sumat. Amb SQLite el producte es fa en coma flotant; amb PostgreSQL és exacte.
+    """
+    if percent is not None:
+        expression = Round(F(price) * (1 + percent / 100), PRICE_FIELD.decimal_places)
+    else:
+        expression = F(price) + amount
+    # Més dígits que el camp, perquè els preus fora de rang es puguin llegir i rebutjar
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=12, decimal_places=PRICE_FIELD.decimal_places))
+
+
+def prices_changed(changes):
+    """
+    Historial, registre de sincronització, cache i esdeveniments dels canvis de preu `[(id, anterior, nou)]`
+    fets amb `QuerySet.update()`, a tots els locals on són els ítems. La cache s'invalida un sol cop.
+    """
+    changes = [(pk, history_value(PRICE_FIELD, old), history_value(PRICE_FIELD, new)) for pk, old, new in changes]
+    restaurant_ids = item_restaurant_ids([pk for pk, _old, _new in changes])
+    record_field_changes(restaurant_ids, 'menu_item', 'price', changes)
+    record_changes([(restaurant_id, pk) for restaurant_id in restaurant_ids for pk, _old, _new in changes], MenuDelta.MENU_ITEM)
+    menu_changed(restaurant_ids, [make_event('item.price', id=pk, price=new) for pk, _old, new in changes])
+
+
+def location_prices_changed(restaurant_id, changes):
+    """
+    Com `prices_changed`, per als preus propis del local `restaurant_id` (`MenuItemOverride`): els altres
+    locals dels ítems no canvien. L'anterior és None si el local feia servir el preu de l'ítem.
+    """
+    changes = [(pk, history_value(PRICE_FIELD, old), history_value(PRICE_FIELD, new)) for pk, old, new in changes]
+    record_field_changes({restaurant_id}, 'menu_item_override', 'price', changes)
+    record_changes([(restaurant_id, pk) for pk, _old, _new in changes], MenuDelta.MENU_ITEM)
+    menu_changed({restaurant_id}, [make_event('item.price', id=pk, price=new) for pk, _old, new in changes])
+
+
+def adjust_prices(restaurant_id, categories, percent=None, amount=None):
+    """
+    Canvia el preu al restaurant de tots els ítems de les seves categories `categories` i retorna
+    `[(id, anterior, nou)]` dels que han canviat. Si algun preu quedaria fora de rang, llança
+    `InvalidPrices` sense canviar-ne cap.
+
+    Els ítems que només són a aquest restaurant canvien de preu amb un sol UPDATE. Els compartits amb
+    altres locals de la cadena, i els que ja tenen un preu propi al local, canvien el preu del local
+    (`MenuItemOverride.price`) a partir del preu que hi tenen, de manera que els altres locals no canvien.
+    """
+    menu_items = MenuItem.objects.filter(
+        categories__restaurant_id=restaurant_id, categories__in=categories, categories__deleted_at__isnull=True
+    )
+    shared = Exists(Category.objects.filter(items=OuterRef('pk')).exclude(restaurant_id=restaurant_id))
+    with transaction.atomic(using=menu_items.db):
+        rows = list(
+            MenuItem.objects.select_for_update(of=('self',)).filter(pk__in=menu_items.values('pk'))
+            .resolved(restaurant_id).annotate(shared=shared, new_price=price_expression(percent, amount, 'resolved_price'))
+            .values_list('pk', 'shared', 'location_override__price', 'resolved_price', 'new_price')
+        )
+        invalid = [pk for pk, _shared, _own, _old, new in rows if not 0 < new <= MAX_PRICE]
+        if invalid:
+            raise InvalidPrices(sorted(invalid))
+        changes = [(pk, old, new) for pk, _shared, _own, old, new in rows if new != old]
+        # Preu propi actual del local (None si fa servir el de l'ítem) dels ítems que el canvien
+        location_prices = {pk: own for pk, shared, own, _old, _new in rows if shared or own is not None}
+
+        item_changes = [change for change in changes if change[0] not in location_prices]
+        if item_changes:
+            MenuItem.objects.filter(pk__in=[pk for pk, _old, _new in item_changes]) \
+                .update(price=price_expression(percent, amount))
+            prices_changed(item_changes)
+        location_changes = [change for change in changes if change[0] in location_prices]
+        if location_changes:
+            location_overrides(restaurant_id, [pk for pk, _old, _new in location_changes]).update(price=Case(
+                *[When(menu_item_id=pk, then=Value(new)) for pk, _old, new in location_changes],
+                output_field=DecimalField(max_digits=PRICE_FIELD.max_digits, decimal_places=PRICE_FIELD.decimal_places),
+            ))
+            location_prices_changed(restaurant_id, [(pk, location_prices[pk], new) for pk, _old, new in location_changes])
+    return changes
@@ -0,0 +1,154 @@
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+# Valors de la capçalera o el paràmetre que activen el perfil (`0`, `false`, etc. no)
+PROFILE_ON = {'1', 'true'}
+# Perfils que es conserven (els més recents)
+PROFILE_KEEP = getattr(settings, 'MENU_PROFILE_KEEP', 200)
+# Funcions de l'informe, per temps acumulat
+PROFILE_TOP = getattr(settings, 'MENU_PROFILE_TOP', 40)
+
+# Fitxers de cada etapa. El temps d'una etapa és l'acumulat de les crides que hi entren des de
+# fora, de manera que inclou les consultes que s'hi fan (p. ex. un queryset avaluat en serialitzar)
+STAGES = {
+    'serializers': ('rest_framework/serializers.py', 'menu/serializers.py', 'menu/payloads.py'),
+    'rendering': ('rest_framework/renderers.py', 'menu/renderers.py'),
+}
+
+
+class SQLRecorder:
+    """
+    `execute_wrapper` que apunta l'àlies, la durada (ms) i el SQL de cada consulta.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((context['connection'].alias, (time.perf_counter() - start) * 1000, sql))
+
+
+def stage_times(stats):
+    """
+    Mil·lisegons de cada etapa de `STAGES` segons les estadístiques de cProfile (`pstats.Stats.stats`).
+    """
+    times = {}
+    for stage, files in STAGES.items():
+        def in_stage(function):
+            return function[0].replace('\\', '/').endswith(files)
+        times[stage] = 1000 * sum(
+            cumulative for function, (_calls, _primitive, _own, cumulative, callers) in stats.items()
+            if in_stage(function) and not any(in_stage(caller) for caller in callers)
+        )
+    return times
+
+
+def staff_user(request):
+    """
+    L'usuari staff de la petició, per sessió o per token, o None.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        user = authenticated[0] if authenticated else None
+    return user if user is not None and user.is_staff else None
+
+
+def build_report(request, response, duration_ms, stats, stages, queries):
+    out = io.StringIO()
+    sql_ms = sum(milliseconds for _alias, milliseconds, _sql in queries)
+    out.write(f"{request.method} {request.get_full_path()} -> {response.status_code}\n")
+    out.write(f"total: {duration_ms:.1f} ms\n")
+    out.write(f"sql: {len(queries)} consultes, {sql_ms:.1f} ms\n")
+    for stage, milliseconds in stages.items():
+        out.write(f"{stage}: {milliseconds:.1f} ms\n")
+
+    repeated = [(count, sql) for sql, count in Counter(sql for _alias, _ms, sql in queries).most_common() if count > 1]
+    if repeated:
+        out.write("\nconsultes repetides\n")
+        for count, sql in repeated:
+            out.write(f"  {count}x {sql}\n")
+    out.write("\nconsultes\n")
+    for alias, milliseconds, sql in queries:
+        out.write(f"  [{alias}] {milliseconds:.2f} ms  {sql}\n")
+
+    out.write("\nperfil (temps acumulat)\n")
+    stats.stream = out
+    stats.sort_stats('cumulative').print_stats(PROFILE_TOP)
+    return out.getvalue()
+
+
+def profile_request(request, user, get_response):
+    """
+    Executa la petició amb cProfile i apuntant les consultes de totes les bases de dades, i en
+    desa el perfil. La resposta porta l'id del perfil a `X-Profile-Id`. De les respostes en
+    streaming només es mesura fins a les capçaleres.
+    """
+    from .models import RequestProfile
+
+    recorder = SQLRecorder()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    stats = pstats.Stats(profiler)
+    stages = stage_times(stats.stats)
+    profile = RequestProfile.objects.create(
+        user=user, method=request.method, path=request.get_full_path()[:500], status_code=response.status_code,
+        duration_ms=duration_ms, sql_count=len(recorder.queries),
+        sql_ms=sum(milliseconds for _alias, milliseconds, _sql in recorder.queries),
+        serializers_ms=stages['serializers'],
+        report=build_report(request, response, duration_ms, stats, stages, recorder.queries),
+        stats=marshal.dumps(stats.stats),
+    )
+    RequestProfile.objects.filter(pk__lte=profile.pk - PROFILE_KEEP).delete()
+    response['X-Profile-Id'] = str(profile.pk)
+    return response
+
+
+class RequestProfilingMiddleware:
+    """
+    Perfila les peticions de staff que porten la capçalera `X-Profile: 1` o el paràmetre
+    `?_profile=1` (o `true`). A la resta de peticions només se'n comprova la capçalera i la query string.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.META.get(PROFILE_HEADER) and PROFILE_PARAM not in request.META.get('QUERY_STRING', ''):
+            return self.get_response(request)
+        flag = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM, '')
+        if flag.strip().lower() not in PROFILE_ON:
+            return self.get_response(request)
+        user = staff_user(request)
+        if user is None:
+            return self.get_response(request)
+        return profile_request(request, user, self.get_response)
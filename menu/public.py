@@ -0,0 +1,50 @@
+from .availability import get_schedule
+from .cache import get_or_build_public_menu
+from .facets import menu_facets
+from .models import Category, MenuItem
+from .payloads import category_rows, menu_item_rows
+
+# Dades del menú públic servides des de la cache. Les fan servir les vistes públiques i
+# l'escalfament dels workers (`health.warm_up`), de manera que les dues omplen les mateixes entrades.
+
+
+def public_categories(restaurant_id, language=None):
+    """
+    Categories del menú públic que ara són actives segons les franges horàries.
+    """
+    def build():
+        schedule = get_schedule(restaurant_id)
+        categories = Category.objects.filter(restaurant_id=restaurant_id) \
+            .exclude(pk__in=schedule.inactive_category_ids).translated(language)
+        return category_rows(categories), schedule.seconds_until_transition()
+
+    return get_or_build_public_menu(restaurant_id, 'categories', language, build)
+
+
+def public_menu_items(restaurant_id, language=None):
+    """
+    Ítems disponibles del menú públic, amb el preu i la disponibilitat del local.
+    """
+    def build():
+        schedule = get_schedule(restaurant_id)
+        if schedule.inactive_category_ids:
+            categories = Category.objects.filter(restaurant_id=restaurant_id).exclude(pk__in=schedule.inactive_category_ids)
+            menu_items = MenuItem.objects.filter(categories__in=categories)
+        else:
+            menu_items = MenuItem.objects.for_restaurant(restaurant_id)
+        menu_items = menu_items.resolved(restaurant_id).filter(resolved_is_available=True) \
+            .exclude(pk__in=schedule.inactive_item_ids).distinct() \
+            .in_menu_order(restaurant_id).translated(language)
+        return menu_item_rows(menu_items, language, resolved=True, restaurant_id=restaurant_id), schedule.seconds_until_transition()
+
+    return get_or_build_public_menu(restaurant_id, 'menuItems', language, build)
+
+
+def public_facets(restaurant_id):
+    """
+    Recomptes per als filtres del menú públic, calculats a partir dels ítems de la cache.
+    """
+    def build():
+        return menu_facets(public_menu_items(restaurant_id)), get_schedule(restaurant_id).seconds_until_transition()
+
+    return get_or_build_public_menu(restaurant_id, 'menuFacets', None, build)
@@ -0,0 +1,32 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` amb orjson. Genera els mateixos bytes que el de DRF: sortida compacta en UTF-8,
+    \\u2028 i \\u2029 escapats, i els tipus que orjson no serialitza igual (Decimal, dates, cadenes
+    diferides...) passen per l'encoder de DRF. Només els floats en notació exponencial s'escriuen
+    diferent (`1e16` en lloc de `1e+16`), amb el mateix valor. Amb sagnat (`indent=`, API navegable)
+    o si orjson no pot codificar les dades, es fa servir el renderer de DRF.
+    """
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
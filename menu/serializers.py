@@ -1,24 +1,161 @@
+from decimal import Decimal
+
+from django.db.models import Q
 from rest_framework import serializers
-from .models import Restaurant, RestaurantUser, Category, MenuItem
+from rest_framework.relations import MANY_RELATION_KWARGS
+from .models import Restaurant, RestaurantUser, Category, MenuItem, CategoryTranslation, MenuItemTranslation
+from .models import AvailabilityWindow, MenuChange, MenuItemOverride, Order, OrderLine, MENU_TAGS, ALLERGENS
+from .i18n import normalize_language
+from .analytics import ANALYTICS_MAX_EVENTS, EVENT_KINDS
+from .geo import NEARBY_MAX_RADIUS_KM
+from .orders import ORDER_MAX_LINES
+
+HISTORY_PAGE_SIZE = 100
+
+class FlagListField(serializers.Field):
+    """
+    Llista de noms d'un `FlagsField` del model (p. ex. `["vegan", "spicy"]`).
+    """
+    default_error_messages = {
+        'not_a_list': 'Expected a list of names but got type "{input_type}".',
+        'invalid_choice': '"{input}" is not a valid choice.',
+    }
+
+    def __init__(self, model_field, **kwargs):
+        self.model_field = model_field
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return self.model_field.to_names(value)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, (list, tuple)):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        for name in data:
+            if name not in self.model_field.flags:
+                self.fail('invalid_choice', input=name)
+        return self.model_field.to_mask(data)
+
+
+class CategoryIdsField(serializers.ManyRelatedField):
+    """
+    Llista d'ids de categories resolta amb una sola consulta `IN` sobre el queryset del camp fill
+    (`ManyRelatedField` en fa una per id).
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        ids = []
+        for value in data:
+            try:
+                if isinstance(value, bool):
+                    raise TypeError
+                ids.append(int(value))
+            except (TypeError, ValueError):
+                self.child_relation.fail('incorrect_type', data_type=type(value).__name__)
+        ids = list(dict.fromkeys(ids))
+        categories = self.child_relation.get_queryset().in_bulk(ids)
+        for pk in ids:
+            if pk not in categories:
+                self.child_relation.fail('does_not_exist', pk_value=pk)
+        return [categories[pk] for pk in ids]
+
+
+class RestaurantCategoryField(serializers.PrimaryKeyRelatedField):
+    """
+    Categoria del restaurant de la URL (`restaurant_id` de la vista) o d'un altre local de la seva
+    cadena. Sense vista, qualsevol categoria.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=Category.objects.all(), **kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        list_kwargs.update({key: value for key, value in kwargs.items() if key in MANY_RELATION_KWARGS})
+        return CategoryIdsField(**list_kwargs)
+
+    @property
+    def restaurant_id(self):
+        return getattr(self.context.get('view'), 'kwargs', {}).get('restaurant_id')
+
+    def get_queryset(self):
+        restaurant_id = self.restaurant_id
+        if restaurant_id is None:
+            return super().get_queryset()
+        restaurants = Restaurant.all_objects.filter(Q(pk=restaurant_id) | Q(brand__restaurants=restaurant_id))
+        return Category.objects.filter(restaurant__in=restaurants)
+
 
 class MenuItemSerializer(serializers.ModelSerializer):
-    categories = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Category.objects.all()
-    )
+    categories = RestaurantCategoryField(many=True)
     category_names = serializers.SerializerMethodField()
+    tags = FlagListField(MenuItem._meta.get_field('tags'))
+    allergens = FlagListField(MenuItem._meta.get_field('allergens'))
 
     class Meta:
         model = MenuItem
-        fields = ['id', 'name', 'description', 'price', 'is_available', 'categories', 'category_names']
+        fields = ['id', 'name', 'description', 'price', 'is_available', 'tags', 'allergens', 'categories', 'category_names']
 
     def get_category_names(self, obj):
         return [category.name for category in obj.categories.all()]
-    
+
+    def to_representation(self, instance):
+        # Preu i disponibilitat del local, com al menú públic: de `resolved()` si el queryset els porta
+        # o, per a un sol ítem, de l'override del restaurant de la URL
+        data = super().to_representation(instance)
+        if hasattr(instance, 'resolved_price'):
+            price, is_available = instance.resolved_price, instance.resolved_is_available
+        else:
+            restaurant_id = self.fields['categories'].child_relation.restaurant_id
+            if restaurant_id is None:
+                return data
+            price, is_available = MenuItem.all_objects.resolved(restaurant_id).filter(pk=instance.pk) \
+                .values_list('resolved_price', 'resolved_is_available').get()
+        data['price'] = self.fields['price'].to_representation(price)
+        data['is_available'] = is_available
+        return data
+
     def validate_price(self, value):
         if value <= 0:
             raise serializers.ValidationError("Price must be greater than zero.")
         return value
 
+    def validate_categories(self, value):
+        # Un ítem només es pot compartir entre locals de la mateixa cadena (amb un restaurant a la URL,
+        # el camp ja només accepta categories de la seva cadena)
+        restaurant_ids = {category.restaurant_id for category in value}
+        if len(restaurant_ids) > 1 and self.fields['categories'].child_relation.restaurant_id is None:
+            brand_ids = set(Restaurant.objects.filter(pk__in=restaurant_ids).values_list('brand_id', flat=True))
+            if len(brand_ids) > 1 or None in brand_ids:
+                raise serializers.ValidationError("Categories of different restaurants must belong to the same brand.")
+        return value
+
+    def create(self, validated_data):
+        categories = validated_data.pop('categories', [])
+        instance = super().create(validated_data)
+        if categories:
+            instance.categories.add(*categories)
+        return instance
+
+    def update(self, instance, validated_data):
+        # Només s'afegeixen i es treuen els enllaços que canvien (cada canvi va a l'historial i al registre de sincronització)
+        categories = validated_data.pop('categories', None)
+        instance = super().update(instance, validated_data)
+        if categories is not None:
+            current = set(instance.categories.values_list('pk', flat=True))
+            wanted = {category.pk for category in categories}
+            if current - wanted:
+                instance.categories.remove(*(current - wanted))
+            if wanted - current:
+                instance.categories.add(*(wanted - current))
+        return instance
+
 
 class CategorySerializer(serializers.ModelSerializer):
 
@@ -34,7 +171,8 @@ class RestaurantSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Restaurant
-        fields = ['id', 'name', 'address', 'hours', 'phone', 'logo', 'categories', 'menuItems']
+        fields = ['id', 'name', 'address', 'hours', 'phone', 'timezone', 'latitude', 'longitude', 'logo',
+                  'categories', 'menuItems']
 
     def validate_name(self, value):
         if not value:
@@ -42,10 +180,261 @@ class RestaurantSerializer(serializers.ModelSerializer):
         return value
 
     def get_menuItems(self, obj):
-        menu_items = MenuItem.objects.filter(categories__restaurant=obj).distinct()
+        menu_items = MenuItem.objects.for_restaurant(obj.id).in_menu_order(obj.id).resolved(obj.id)
         return MenuItemSerializer(menu_items, many=True).data
 
 
+class PublicMenuItemSerializer(MenuItemSerializer):
+    """
+    Serializer de lectura per al menú públic. Espera un queryset amb `translated()`,
+    `resolved()` i `with_translated_categories()` del local.
+    """
+    name = serializers.CharField(source='translated_name', read_only=True)
+    description = serializers.CharField(source='translated_description', read_only=True)
+    price = serializers.DecimalField(source='resolved_price', max_digits=5, decimal_places=2, read_only=True)
+    is_available = serializers.BooleanField(source='resolved_is_available', read_only=True)
+
+    def get_category_names(self, obj):
+        return [category.translated_name for category in obj.categories.all()]
+
+
+class PublicCategorySerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='translated_name', read_only=True)
+
+    class Meta:
+        model = Category
+        fields = ['id', 'name']
+
+
+class PublicRestaurantSerializer(RestaurantSerializer):
+    categories = serializers.SerializerMethodField()
+
+    def get_categories(self, obj):
+        language = self.context.get('language')
+        categories = Category.objects.filter(restaurant=obj).translated(language)
+        return PublicCategorySerializer(categories, many=True).data
+
+    def get_menuItems(self, obj):
+        language = self.context.get('language')
+        menu_items = MenuItem.objects.for_restaurant(obj.id).in_menu_order(obj.id).resolved(obj.id) \
+            .translated(language).with_translated_categories(language, obj.id)
+        return PublicMenuItemSerializer(menu_items, many=True).data
+
+
+class CategoryTranslationSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = CategoryTranslation
+        fields = ['language', 'name']
+
+    def validate_language(self, value):
+        language = normalize_language(value)
+        if not language:
+            raise serializers.ValidationError("Unsupported language.")
+        return language
+
+
+class MenuItemTranslationSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = MenuItemTranslation
+        fields = ['language', 'name', 'description']
+
+    def validate_language(self, value):
+        language = normalize_language(value)
+        if not language:
+            raise serializers.ValidationError("Unsupported language.")
+        return language
+
+
+class MenuItemOverrideSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = MenuItemOverride
+        fields = ['price', 'is_available']
+
+    def validate_price(self, value):
+        if value is not None and value <= 0:
+            raise serializers.ValidationError("Price must be greater than zero.")
+        return value
+
+
+class AvailabilityWindowSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = AvailabilityWindow
+        fields = ['id', 'category', 'menu_item', 'weekday', 'start_time', 'end_time']
+
+    def validate(self, data):
+        category = data.get('category', getattr(self.instance, 'category', None))
+        menu_item = data.get('menu_item', getattr(self.instance, 'menu_item', None))
+        if (category is None) == (menu_item is None):
+            raise serializers.ValidationError("An availability window must target either a category or a menu item.")
+
+        restaurant_id = self.context.get('restaurant_id')
+        if category is not None and category.restaurant_id != restaurant_id:
+            raise serializers.ValidationError({"category": "Category does not belong to this restaurant."})
+        if menu_item is not None and not menu_item.categories.filter(restaurant_id=restaurant_id).exists():
+            raise serializers.ValidationError({"menu_item": "Menu item does not belong to this restaurant."})
+        return data
+
+
+class BulkAvailabilitySerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    categories = serializers.ListField(child=serializers.IntegerField(), required=False)
+    is_available = serializers.BooleanField()
+
+    def validate(self, data):
+        if not data.get('ids') and not data.get('categories'):
+            raise serializers.ValidationError("Provide menu item ids or categories.")
+        return data
+
+
+class BulkPriceSerializer(serializers.Serializer):
+    categories = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    percent = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=Decimal('-99.99'), required=False)
+    amount = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+
+    def validate(self, data):
+        if ('percent' in data) == ('amount' in data):
+            raise serializers.ValidationError("Provide either percent or amount.")
+        return data
+
+
+class StockSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    stock = serializers.IntegerField(min_value=0, max_value=2147483647, allow_null=True)
+    is_available = serializers.BooleanField(read_only=True)
+
+
+class ConsumeSerializer(serializers.Serializer):
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class MoveSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    after = serializers.IntegerField(allow_null=True, required=False, default=None)
+
+
+class ReorderSerializer(serializers.Serializer):
+    """
+    Llista de moviments: cada element `id` es col·loca just després de `after` (o al principi si és null).
+    """
+    moves = MoveSerializer(many=True, allow_empty=False)
+
+
+class MenuItemReorderSerializer(ReorderSerializer):
+    category = serializers.IntegerField()
+
+
+class MenuChangeSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = MenuChange
+        fields = ['id', 'model', 'object_id', 'action', 'diff', 'created_at']
+
+
+class HistoryQuerySerializer(serializers.Serializer):
+    before = serializers.IntegerField(min_value=1, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=HISTORY_PAGE_SIZE, default=HISTORY_PAGE_SIZE)
+
+
+class RestoreMenuSerializer(serializers.Serializer):
+    at = serializers.DateTimeField()
+
+
+class AnalyticsEventSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=list(EVENT_KINDS))
+    id = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, data):
+        if data['type'] != 'menu_view' and 'id' not in data:
+            raise serializers.ValidationError({"id": "This event type requires an id."})
+        return data
+
+
+class AnalyticsBatchSerializer(serializers.Serializer):
+    events = AnalyticsEventSerializer(many=True, allow_empty=False, max_length=ANALYTICS_MAX_EVENTS)
+
+
+class OrderLineInputSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, max_value=99, default=1)
+    # Preu que ha vist el client; si no coincideix amb l'actual, la comanda es rebutja
+    price = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+
+
+class OrderSubmitSerializer(serializers.Serializer):
+    table = serializers.CharField(max_length=32, allow_blank=True, default='')
+    note = serializers.CharField(max_length=500, allow_blank=True, default='')
+    lines = OrderLineInputSerializer(many=True, allow_empty=False, max_length=ORDER_MAX_LINES)
+
+    def validate_lines(self, value):
+        ids = [line['id'] for line in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each item can only appear once.")
+        return value
+
+
+class OrderLineSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = OrderLine
+        fields = ['menu_item', 'name', 'unit_price', 'quantity']
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    lines = OrderLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'table', 'note', 'status', 'total', 'created_at', 'lines']
+        read_only_fields = ['id', 'table', 'note', 'total', 'created_at']
+
+
+class OrderQueueSerializer(serializers.Serializer):
+    after = serializers.IntegerField(min_value=0, required=False)
+    status = serializers.MultipleChoiceField(choices=Order.STATUSES, required=False)
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(min_value=0.1, max_value=NEARBY_MAX_RADIUS_KM, default=5)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class StatsQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, required=False)
+
+
+class PublicMenuFilterSerializer(serializers.Serializer):
+    """
+    Filtres del menú públic: `?max_price=12&tags=vegetarian,spicy&exclude_allergens=gluten,milk`.
+    """
+    max_price = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=Decimal(0), required=False)
+    tags = serializers.CharField(required=False, allow_blank=True)
+    exclude_allergens = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_names(self, value, choices):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in choices]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown values: {', '.join(unknown)}.")
+        return names
+
+    def validate_tags(self, value):
+        return self.validate_names(value, MENU_TAGS)
+
+    def validate_exclude_allergens(self, value):
+        return self.validate_names(value, ALLERGENS)
+
+
 class RestaurantUserSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email', read_only=True)
     restaurant_name = serializers.CharField(source='restaurant.name', read_only=True)
@@ -0,0 +1,198 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import JsonResponse
+
+SHARD_CACHE_TIMEOUT = getattr(settings, 'MENU_SHARD_CACHE_TIMEOUT', 60 * 5)
+# Cada base de dades dona ids nous a partir de la seva posició a DATABASES per aquest bloc, de manera
+# que un restaurant es pot traslladar conservant els ids. Amb PostgreSQL, les files copiades no mouen
+# la seqüència; amb SQLite (proves locals) els ids nous continuen després del més alt de la taula.
+SHARD_ID_BLOCK = getattr(settings, 'MENU_SHARD_ID_BLOCK', 10 ** 12)
+
+# Dades globals, sempre a `default`: comptes, sessions, el directori de tenants, la relació entre
+# usuaris i restaurants (cal per iniciar la sessió abans de saber el tenant), els esdeveniments
+# d'analítica en brut (els lots barregen restaurants) i els perfils de peticions
+GLOBAL_APPS = {'admin', 'auth', 'authtoken', 'contenttypes', 'sessions'}
+GLOBAL_MODELS = {'tenantshard', 'restaurantuser', 'menuevent', 'requestprofile'}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+_current_shard = contextvars.ContextVar('menu_shard', default=None)
+
+
+def shard_aliases():
+    return list(settings.DATABASES)
+
+
+def is_global(model):
+    meta = model._meta
+    return meta.app_label in GLOBAL_APPS or (meta.app_label == 'menu' and meta.model_name in GLOBAL_MODELS)
+
+
+def tenant_db():
+    """
+    Base de dades del tenant actual (`default` fora de cap petició o `use_shard`).
+    """
+    return _current_shard.get() or DEFAULT_DB_ALIAS
+
+
+def _shard_key(restaurant_id):
+    return f'shard:{restaurant_id}'
+
+
+def get_tenant_shard(restaurant_id, cached=True):
+    """
+    `(alias, read_only)` del restaurant segons el directori, guardat a la cache. Els restaurants
+    que no hi són estan a `default`. Amb una sola base de dades no es consulta res.
+
+    Les escriptures el llegeixen amb `cached=False`: si la cache no és compartida, un altre
+    worker podria tenir encara l'entrada d'abans d'un trasllat i escriure a l'origen.
+    """
+    if len(settings.DATABASES) == 1:
+        return DEFAULT_DB_ALIAS, False
+    key = _shard_key(restaurant_id)
+    entry = cache.get(key) if cached else None
+    if entry is None:
+        from .models import TenantShard
+        row = TenantShard.objects.filter(restaurant_id=restaurant_id).values_list('alias', 'read_only').first()
+        entry = tuple(row) if row else (DEFAULT_DB_ALIAS, False)
+        cache.set(key, entry, SHARD_CACHE_TIMEOUT)
+    return entry
+
+
+def forget_tenant_shards(restaurant_ids):
+    cache.delete_many([_shard_key(restaurant_id) for restaurant_id in restaurant_ids])
+
+
+@contextmanager
+def use_shard(alias):
+    """
+    Les consultes dels models de tenant van a `alias` dins del bloc.
+    """
+    token = _current_shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_shard.reset(token)
+
+
+def use_tenant(restaurant_id):
+    return use_shard(get_tenant_shard(restaurant_id)[0])
+
+
+def each_shard():
+    """
+    Recorre totes les bases de dades dins de `use_shard`, per a les tasques que passen per tots els tenants.
+    """
+    for alias in shard_aliases():
+        with use_shard(alias):
+            yield alias
+
+
+class TenantRouter:
+    """
+    Envia els models globals a `default` i la resta a la base de dades del tenant actual, o a la
+    de l'objecte de tenant amb què es consulta una relació. Totes les bases de dades tenen l'esquema sencer.
+    """
+
+    def db_for_read(self, model, **hints):
+        if is_global(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and not is_global(type(instance)) and instance._state.db:
+            return instance._state.db
+        return tenant_db()
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les claus foranes cap als models globals creuen bases de dades (sense restricció a la taula)
+        if is_global(type(obj1)) or is_global(type(obj2)):
+            return True
+        return None
+
+
+class TenantShardMiddleware:
+    """
+    Fixa la base de dades del tenant a partir del restaurant de la URL (`tenant_url_kwarg` de la
+    vista, per defecte `restaurant_id`). Mentre es trasllada, les escriptures responen 503. Les
+    lectures fan servir el directori de la cache; les escriptures el consulten sempre.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_shard.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_shard.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        restaurant_id = view_kwargs.get(getattr(view_class, 'tenant_url_kwarg', 'restaurant_id'))
+        try:
+            restaurant_id = int(restaurant_id)
+        except (TypeError, ValueError):
+            return None
+        alias, read_only = get_tenant_shard(restaurant_id, cached=request.method in SAFE_METHODS)
+        _current_shard.set(alias)
+        if read_only and request.method not in SAFE_METHODS:
+            response = JsonResponse({'error': "The restaurant is being moved, try again shortly."}, status=503)
+            response['Retry-After'] = '30'
+            return response
+        return None
+
+
+def reserve_id_range(sender=None, using=DEFAULT_DB_ALIAS, apps=None, **kwargs):
+    """
+    Avança les seqüències de les taules de tenant de `using` fins al seu bloc d'ids. Es connecta a
+    `post_migrate`; només fa res amb SQLite i PostgreSQL, i a partir de la segona base de dades.
+    """
+    base = shard_aliases().index(using) * SHARD_ID_BLOCK
+    if not base or apps is None:
+        return
+    connection = connections[using]
+    models = [model for model in apps.get_app_config('menu').get_models() if model._meta.auto_field and not is_global(model)]
+    with connection.cursor() as cursor:
+        for model in models:
+            table, column = model._meta.db_table, model._meta.pk.column
+            if connection.vendor == 'sqlite':
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s', [base, table, base])
+                cursor.execute(
+                    'INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s '
+                    'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)', [table, base, table]
+                )
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'SELECT setval(pg_get_serial_sequence(%s, %s), '
+                    f'GREATEST(%s, (SELECT COALESCE(MAX({connection.ops.quote_name(column)}), 0) '
+                    f'FROM {connection.ops.quote_name(table)})))', [table, column, base]
+                )
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Amb diverses bases de dades, les lectures fan servir el directori de la cache: si és per procés,
+    després d'un trasllat els altres workers llegeixen de l'origen fins que caduca l'entrada.
+    """
+    from django.core.checks import Warning
+    if len(settings.DATABASES) == 1:
+        return []
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Warning(
+        "DATABASE_SHARDS is set but the default cache is per process.",
+        hint="Use a shared cache (e.g. Redis or Memcached) so that every worker sees a restaurant move at once; "
+             f"until then reads may use the old database for up to {SHARD_CACHE_TIMEOUT} seconds.",
+        id='menu.W001',
+    )]
@@ -0,0 +1,213 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_nearby, invalidate_public_menu, invalidate_tenant_users
+from .history import record_save, record_categories
+from .events import get_broadcaster, item_events, make_event
+from .models import Restaurant, RestaurantUser, Category, MenuItem, CategoryTranslation, MenuItemTranslation
+from .models import AvailabilityWindow, MenuItemOverride, MenuDelta
+from .sharding import tenant_db
+from .sync import record_changes, record_category_changes
+
+
+# Camps que surten a la cerca de restaurants propers
+NEARBY_FIELDS = {'name', 'address', 'logo', 'latitude', 'longitude'}
+
+
+def item_restaurant_ids(item_ids):
+    return set(
+        Category.objects.filter(items__in=item_ids).values_list('restaurant_id', flat=True).distinct()
+    )
+
+
+# Esdeveniments d'un canvi de l'ítem que no arriben als locals amb aquest camp a l'override
+OVERRIDDEN_EVENTS = {'item.price': 'price', 'item.availability': 'is_available'}
+
+
+def item_location_events(item_id, restaurant_ids, events):
+    """
+    Reparteix els esdeveniments d'un canvi de l'ítem entre els locals on és: `[(restaurant_ids, events)]`.
+    Els que fixen el preu o la disponibilitat a l'override no reben `item.price` ni `item.availability`,
+    perquè al seu menú no canvien.
+    """
+    fields = sorted({OVERRIDDEN_EVENTS[event['type']] for event in events if event['type'] in OVERRIDDEN_EVENTS})
+    if not fields:
+        return [(restaurant_ids, events)]
+    overridden = {}
+    for restaurant_id, *values in MenuItemOverride.objects.filter(menu_item_id=item_id, restaurant_id__in=restaurant_ids) \
+            .values_list('restaurant_id', *fields):
+        overridden[restaurant_id] = frozenset(field for field, value in zip(fields, values) if value is not None)
+    groups = defaultdict(set)
+    for restaurant_id in restaurant_ids:
+        groups[overridden.get(restaurant_id, frozenset())].add(restaurant_id)
+    return [
+        (group, [event for event in events if OVERRIDDEN_EVENTS.get(event['type']) not in skipped])
+        for skipped, group in groups.items()
+    ]
+
+
+def menu_changed(restaurant_ids, events=None):
+    """
+    Invalida el menú públic dels restaurants afectats i envia `events` (per defecte
+    `menu.changed`) als clients connectats, un cop la transacció s'ha confirmat.
+    """
+    restaurant_ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id is not None}
+    if not restaurant_ids:
+        return
+    if events is None:
+        events = [make_event('menu.changed')]
+
+    # S'invalida abans i després del commit: abans perquè la mateixa transacció no llegeixi
+    # respostes velles, i després perquè una lectura concurrent no deixi a la cache dades anteriors al commit
+    for restaurant_id in restaurant_ids:
+        invalidate_public_menu(restaurant_id)
+
+    def invalidate():
+        broadcaster = get_broadcaster()
+        for restaurant_id in restaurant_ids:
+            invalidate_public_menu(restaurant_id)
+            for event in events:
+                broadcaster.publish(restaurant_id, event)
+
+    transaction.on_commit(invalidate, using=tenant_db())
+
+
+def users_changed(restaurant_ids):
+    restaurant_ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id is not None}
+    for restaurant_id in restaurant_ids:
+        invalidate_tenant_users(restaurant_id)
+
+    def invalidate():
+        for restaurant_id in restaurant_ids:
+            invalidate_tenant_users(restaurant_id)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Restaurant)
+def restaurant_saved(sender, instance, created, **kwargs):
+    action, diff = record_save(instance, created, [instance.pk])
+    if action is not None and (action != 'update' or set(diff) & NEARBY_FIELDS):
+        transaction.on_commit(invalidate_nearby, using=instance._state.db)
+    menu_changed({instance.pk})
+
+
+@receiver(post_delete, sender=Restaurant)
+def restaurant_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_nearby, using=instance._state.db)
+    menu_changed({instance.pk})
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    record_save(instance, created, [instance.restaurant_id])
+    record_category_changes(instance.restaurant_id, [instance.pk])
+    menu_changed({instance.restaurant_id})
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # Abans d'esborrar les relacions amb els ítems, que també canvien
+    record_category_changes(instance.restaurant_id, [instance.pk])
+    menu_changed({instance.restaurant_id})
+
+
+@receiver(post_save, sender=MenuItem)
+def menu_item_saved(sender, instance, created, **kwargs):
+    restaurant_ids = item_restaurant_ids([instance.pk])
+    if created and not restaurant_ids:
+        # Encara no té categories: la creació es registra quan se n'hi afegeixin
+        instance.history_pending_create = True
+    action, diff = record_save(instance, created, restaurant_ids)
+    if action is not None:
+        record_changes([(restaurant_id, instance.pk) for restaurant_id in restaurant_ids], MenuDelta.MENU_ITEM)
+        for group, events in item_location_events(instance.pk, restaurant_ids, item_events(instance.pk, action, diff)):
+            menu_changed(group, events)
+
+
+@receiver(pre_delete, sender=MenuItem)
+def menu_item_deleted(sender, instance, **kwargs):
+    # Les relacions amb categories s'esborren abans que l'ítem, per això es calculen aquí
+    restaurant_ids = item_restaurant_ids([instance.pk])
+    record_changes([(restaurant_id, instance.pk) for restaurant_id in restaurant_ids], MenuDelta.MENU_ITEM)
+    menu_changed(restaurant_ids, [make_event('item.deleted', id=instance.pk)])
+
+
+@receiver(m2m_changed, sender=MenuItem.categories.through)
+def menu_item_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    key = 'add' if action == 'post_add' else 'remove'
+    links = defaultdict(lambda: {'add': [], 'remove': []})
+    if reverse:
+        item_ids = pk_set if action != 'pre_clear' else instance.items.values_list('pk', flat=True)
+        for item_id in item_ids:
+            links[(instance.restaurant_id, item_id)][key].append(instance.pk)
+    else:
+        categories = Category.all_objects.filter(pk__in=pk_set) if action != 'pre_clear' else instance.categories.all()
+        for category_id, restaurant_id in categories.values_list('pk', 'restaurant_id'):
+            links[(restaurant_id, instance.pk)][key].append(category_id)
+
+        restaurant_ids = {restaurant_id for restaurant_id, _item_id in links}
+        if getattr(instance, 'history_pending_create', False) and restaurant_ids:
+            instance.history_pending_create = False
+            action, diff = record_save(instance, True, restaurant_ids)
+            menu_changed(restaurant_ids, item_events(instance.pk, action, diff))
+
+    record_categories(links)
+    record_changes(links, MenuDelta.MENU_ITEM)
+    menu_changed({restaurant_id for restaurant_id, _item_id in links})
+
+
+@receiver([post_save, post_delete], sender=CategoryTranslation)
+def category_translation_changed(sender, instance, **kwargs):
+    restaurant_ids = set(Category.objects.filter(pk=instance.category_id).values_list('restaurant_id', flat=True))
+    for restaurant_id in restaurant_ids:
+        record_category_changes(restaurant_id, [instance.category_id])
+    menu_changed(restaurant_ids)
+
+
+@receiver([post_save, post_delete], sender=MenuItemTranslation)
+def menu_item_translation_changed(sender, instance, **kwargs):
+    restaurant_ids = item_restaurant_ids([instance.menu_item_id])
+    record_changes([(restaurant_id, instance.menu_item_id) for restaurant_id in restaurant_ids], MenuDelta.MENU_ITEM)
+    menu_changed(restaurant_ids)
+
+
+@receiver([post_save, post_delete], sender=MenuItemOverride)
+def menu_item_override_changed(sender, instance, **kwargs):
+    # Només afecta el local de l'override; els canvis de l'ítem invaliden tots els locals on és
+    record_changes([(instance.restaurant_id, instance.menu_item_id)], MenuDelta.MENU_ITEM)
+    menu_changed({instance.restaurant_id})
+
+
+@receiver([post_save, post_delete], sender=AvailabilityWindow)
+def availability_window_changed(sender, instance, **kwargs):
+    # Si la franja s'esborra, el seu objecte torna a sortir sempre al menú
+    if instance.category_id:
+        record_category_changes(instance.restaurant_id, [instance.category_id])
+    else:
+        record_changes([(instance.restaurant_id, instance.menu_item_id)], MenuDelta.MENU_ITEM)
+    menu_changed({instance.restaurant_id})
+
+
+@receiver(pre_save, sender=RestaurantUser)
+def restaurant_user_moved(sender, instance, **kwargs):
+    if instance.pk:
+        users_changed(RestaurantUser.objects.filter(pk=instance.pk).values_list('restaurant_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=RestaurantUser)
+def restaurant_user_changed(sender, instance, **kwargs):
+    users_changed({instance.restaurant_id})
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields != frozenset({'last_login'}):
+        users_changed(RestaurantUser.objects.filter(user=instance).values_list('restaurant_id', flat=True))
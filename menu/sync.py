@@ -0,0 +1,130 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import AvailabilityWindow, MenuItemCategory, MenuDelta
+from .public import public_categories, public_menu_items
+from .sharding import each_shard, tenant_db
+
+SYNC_RETENTION_DAYS = getattr(settings, 'MENU_SYNC_RETENTION_DAYS', 30)
+
+
+def record_changes(pairs, kind):
+    """
+    Afegeix al registre de sincronització els objectes `pairs` (`(restaurant_id, object_id)`)
+    de tipus `kind`. Es crida a la mateixa transacció que l'escriptura: la fila `FLOOR` de cada
+    restaurant, que porta la seqüència, queda bloquejada fins que es confirma, de manera que cap
+    altre escriptor no pot agafar una seqüència més nova i confirmar-la abans (un client que
+    l'hagués llegit es perdria aquesta).
+    """
+    objects = defaultdict(set)
+    for restaurant_id, object_id in pairs:
+        if restaurant_id is not None:
+            objects[int(restaurant_id)].add(object_id)
+    if not objects:
+        return
+    rows = []
+    with transaction.atomic(using=tenant_db()):
+        # Sempre en el mateix ordre, perquè dos escriptors amb diversos restaurants no s'encallin
+        for restaurant_id in sorted(objects):
+            floor, _created = MenuDelta.objects.select_for_update().get_or_create(
+                restaurant_id=restaurant_id, kind=MenuDelta.FLOOR, defaults={'object_id': 0}
+            )
+            object_ids = sorted(objects[restaurant_id])
+            MenuDelta.objects.filter(pk=floor.pk).update(seq=floor.seq + len(object_ids))
+            rows.extend(
+                MenuDelta(restaurant_id=restaurant_id, kind=kind, object_id=object_id, seq=floor.seq + position)
+                for position, object_id in enumerate(object_ids, start=1)
+            )
+        MenuDelta.objects.bulk_create(rows)
+
+
+def record_category_changes(restaurant_id, category_ids):
+    """
+    Apunta les categories i els seus ítems, que en porten el nom i poden entrar o sortir del menú amb elles.
+    """
+    item_ids = MenuItemCategory.objects.filter(category_id__in=category_ids).values_list('menu_item_id', flat=True)
+    record_changes([(restaurant_id, category_id) for category_id in category_ids], MenuDelta.CATEGORY)
+    record_changes([(restaurant_id, item_id) for item_id in item_ids], MenuDelta.MENU_ITEM)
+
+
+def scheduled_ids(restaurant_id):
+    """
+    Categories i ítems que depenen de les franges horàries del restaurant (els ítems de les
+    categories amb franges inclosos). Poden aparèixer o desaparèixer sense cap escriptura.
+    """
+    category_ids, item_ids = set(), set()
+    for category_id, menu_item_id in AvailabilityWindow.objects.filter(restaurant_id=restaurant_id) \
+            .values_list('category_id', 'menu_item_id'):
+        if category_id:
+            category_ids.add(category_id)
+        else:
+            item_ids.add(menu_item_id)
+    if category_ids:
+        item_ids.update(MenuItemCategory.objects.filter(category_id__in=category_ids).values_list('menu_item_id', flat=True))
+    return category_ids, item_ids
+
+
+def _section(rows, changed_ids):
+    present = {row['id'] for row in rows}
+    return {
+        'upserts': [row for row in rows if row['id'] in changed_ids],
+        'deleted': sorted(changed_ids - present),
+        'order': [row['id'] for row in rows],
+    }
+
+
+def menu_delta(restaurant_id, since, language=None):
+    """
+    Canvis del menú públic des de la seqüència `since`. Les files modificades surten com al menú
+    públic (des de la cache) i les que ja no hi són com a ids esborrats; `order` és l'ordre actual.
+    Si `since` no és vàlid o el registre s'ha compactat per sobre seu, retorna `resync` i el
+    client ha de tornar a descarregar el menú sencer.
+    """
+    entries = MenuDelta.objects.filter(restaurant_id=restaurant_id)
+    # Només es veu la seqüència de les escriptures confirmades, i s'hi confirmen en ordre
+    latest, floor = entries.filter(kind=MenuDelta.FLOOR).values_list('seq', 'object_id').first() or (0, 0)
+    if not since or since < floor or since > latest:
+        return {'seq': latest, 'resync': True}
+
+    changed = {MenuDelta.CATEGORY: set(), MenuDelta.MENU_ITEM: set()}
+    for kind, object_id in entries.filter(seq__gt=since).exclude(kind=MenuDelta.FLOOR).values_list('kind', 'object_id'):
+        changed[kind].add(object_id)
+    category_ids, item_ids = scheduled_ids(restaurant_id)
+    return {
+        'seq': latest,
+        'resync': False,
+        'categories': _section(public_categories(restaurant_id, language), changed[MenuDelta.CATEGORY] | category_ids),
+        'menuItems': _section(public_menu_items(restaurant_id, language), changed[MenuDelta.MENU_ITEM] | item_ids),
+    }
+
+
+def compact(until=None):
+    """
+    Compacta el registre de totes les bases de dades: de cada objecte només se'n queda l'última fila
+    (la resta no aporta res) i s'esborren les anteriors a `until` (per defecte, de fa
+    `SYNC_RETENTION_DAYS` dies), apuntant-ho a la fila `FLOOR` del restaurant. Retorna el nombre
+    de files esborrades.
+    """
+    if until is None:
+        until = timezone.now() - datetime.timedelta(days=SYNC_RETENTION_DAYS)
+    deleted = 0
+    for alias in each_shard():
+        with transaction.atomic(using=alias):
+            changes = MenuDelta.objects.exclude(kind=MenuDelta.FLOOR)
+            newer = changes.filter(restaurant_id=OuterRef('restaurant_id'), kind=OuterRef('kind'),
+                                   object_id=OuterRef('object_id'), seq__gt=OuterRef('seq'))
+            duplicates, _ = changes.filter(Exists(newer)).delete()
+
+            expired = changes.filter(created_at__lt=until)
+            for row in expired.values('restaurant_id').annotate(floor=Max('seq')).order_by():
+                # Cada restaurant amb canvis ja té la fila `FLOOR` (`record_changes`)
+                MenuDelta.objects.filter(restaurant_id=row['restaurant_id'], kind=MenuDelta.FLOOR,
+                                         object_id__lt=row['floor']).update(object_id=row['floor'])
+            expired_count, _ = expired.delete()
+        deleted += duplicates + expired_count
+    return deleted
@@ -0,0 +1,309 @@
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.db import transaction
+
+from .cache import invalidate_nearby, invalidate_public_menu, invalidate_tenant_users
+from .models import Restaurant, RestaurantUser, Category, MenuItem, MenuItemCategory, MenuItemOverride
+from .models import CategoryTranslation, MenuItemTranslation, AvailabilityWindow, MenuChange, MenuEvent, DailyMenuStat
+from .models import Brand, MenuDelta, Order, OrderLine, TenantShard
+from .sharding import each_shard, forget_tenant_shards, get_tenant_shard, shard_aliases, tenant_db, use_shard, use_tenant
+
+logger = logging.getLogger(__name__)
+
+PURGE_CHUNK_SIZE = getattr(settings, 'MENU_PURGE_CHUNK_SIZE', 1000)
+
+
+class Timer:
+    """
+    Apunta les files afectades i el temps de cada pas per poder-ho mostrar en acabar.
+    """
+
+    def __init__(self):
+        self.steps = []
+
+    def step(self, label, run):
+        start = time.perf_counter()
+        rows = run()
+        self.steps.append((label, rows, time.perf_counter() - start))
+        return rows
+
+    @property
+    def total(self):
+        return sum(seconds for _label, _rows, seconds in self.steps)
+
+    def report(self):
+        lines = [f'{label}: {rows} ({seconds:.2f}s)' for label, rows, seconds in self.steps]
+        lines.append(f'total: {self.total:.2f}s')
+        return lines
+
+
+def delete_in_chunks(queryset, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Esborra les files de `queryset` amb DELETE directes de com a molt `chunk_size` files, cadascun
+    en una transacció curta. No carrega objectes ni envia senyals: cal haver esborrat abans les files
+    que hi fan referència. Retorna el nombre de files esborrades.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        with transaction.atomic(using=queryset.db):
+            pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                return deleted
+            deleted += model._base_manager.filter(pk__in=pks)._raw_delete(queryset.db)
+
+
+def tenant_querysets(restaurant_ids):
+    """
+    Dades de tenant dels restaurants `restaurant_ids` a la base de dades actual, en un ordre en què
+    es poden inserir (les files referenciades abans). Els ids de les cadenes i dels ítems es llegeixen
+    ara, perquè els conjunts no canviïn quan s'esborren les files que hi apunten.
+    """
+    restaurants = Restaurant.all_objects.filter(pk__in=restaurant_ids)
+    brand_ids = list(restaurants.exclude(brand=None).values_list('brand_id', flat=True).distinct())
+    categories = Category.all_objects.filter(restaurant_id__in=restaurant_ids)
+    item_ids = list(MenuItemCategory.objects.filter(category__in=categories).values_list('menu_item_id', flat=True).distinct())
+    return [
+        Brand.objects.filter(pk__in=brand_ids),
+        restaurants,
+        categories,
+        CategoryTranslation.objects.filter(category__in=categories),
+        MenuItem.all_objects.filter(pk__in=item_ids),
+        MenuItemTranslation.objects.filter(menu_item__in=item_ids),
+        MenuItemCategory.objects.filter(category__in=categories),
+        MenuItemOverride.objects.filter(restaurant_id__in=restaurant_ids),
+        AvailabilityWindow.objects.filter(restaurant_id__in=restaurant_ids),
+        MenuChange.objects.filter(restaurant_id__in=restaurant_ids),
+        DailyMenuStat.objects.filter(restaurant_id__in=restaurant_ids),
+        MenuDelta.objects.filter(restaurant_id__in=restaurant_ids),
+        Order.objects.filter(restaurant_id__in=restaurant_ids),
+        OrderLine.objects.filter(order__restaurant_id__in=restaurant_ids),
+    ]
+
+
+def restaurant_querysets(restaurant_id):
+    """
+    Dades d'un restaurant per exportar, en un ordre que `loaddata` pot carregar.
+    Inclou els ítems del restaurant encara que també siguin a altres locals de la cadena.
+    """
+    return [queryset for queryset in tenant_querysets([restaurant_id]) if queryset.model not in (Brand, MenuDelta)]
+
+
+def export_restaurant(restaurant_id, stream, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Escriu les dades del restaurant a `stream` en format JSON Lines de Django (`loaddata`), sense
+    carregar-les totes a memòria. Els comptes d'usuari i el fitxer del logo no s'hi inclouen.
+    """
+    rows = 0
+    with use_tenant(restaurant_id):
+        for queryset in restaurant_querysets(restaurant_id):
+            objects = queryset.order_by('pk').iterator(chunk_size=chunk_size)
+            serializers.serialize('jsonl', objects, stream=stream)
+            rows += queryset.count()
+    return rows
+
+
+def delete_orphan_items(item_ids=None, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Esborra els ítems que no són a cap categoria (entre `item_ids`, o tots) de la base de dades actual
+    amb les seves traduccions, overrides i franges horàries. Les línies de comanda que hi apunten es
+    queden sense ítem.
+    """
+    orphans = MenuItem.all_objects.filter(categories__isnull=True)
+    if item_ids is not None:
+        orphans = orphans.filter(pk__in=item_ids)
+    orphan_ids = list(orphans.values_list('pk', flat=True))
+
+    for start in range(0, len(orphan_ids), chunk_size):
+        chunk = orphan_ids[start:start + chunk_size]
+        with transaction.atomic(using=tenant_db()):
+            for model in (MenuItemTranslation, MenuItemOverride, AvailabilityWindow):
+                model.objects.filter(menu_item__in=chunk)._raw_delete(model.objects.db)
+            OrderLine.objects.filter(menu_item__in=chunk).update(menu_item=None)
+            MenuItem.all_objects.filter(pk__in=chunk, categories__isnull=True)._raw_delete(MenuItem.all_objects.db)
+    return len(orphan_ids)
+
+
+def delete_orphan_logos():
+    """
+    Esborra els fitxers de logo que ja no fa servir cap restaurant de cap base de dades.
+    """
+    field = Restaurant._meta.get_field('logo')
+    directory = field.upload_to.rstrip('/')
+    try:
+        _directories, files = field.storage.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    used = set()
+    for _alias in each_shard():
+        used.update(Restaurant.all_objects.exclude(logo='').exclude(logo__isnull=True).values_list('logo', flat=True))
+    deleted = 0
+    for name in files:
+        path = f'{directory}/{name}'
+        if path not in used:
+            field.storage.delete(path)
+            deleted += 1
+    return deleted
+
+
+def tenant_group(restaurant_id):
+    """
+    El restaurant i els que hi comparteixen dades (els de la mateixa cadena i els que tenen ítems en
+    comú), que han de ser a la mateixa base de dades. Es consulta la base de dades actual.
+    """
+    group, pending = set(), {restaurant_id}
+    while pending:
+        group |= pending
+        brands = Restaurant.all_objects.filter(pk__in=pending).values('brand')
+        items = MenuItemCategory.objects.filter(category__restaurant_id__in=pending).values('menu_item')
+        pending = (
+            set(Restaurant.all_objects.filter(brand__in=brands).values_list('pk', flat=True))
+            | set(Category.all_objects.filter(items__in=items).values_list('restaurant_id', flat=True))
+        ) - group
+    return sorted(group)
+
+
+def copy_in_chunks(queryset, target, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Copia les files de `queryset` a la base de dades `target` amb els mateixos ids, per lots
+    ordenats per clau primària i amb una transacció curta per lot. No envia senyals.
+    Retorna el nombre de files copiades.
+    """
+    manager = queryset.model._base_manager.using(target)
+    queryset = queryset.order_by('pk')
+    copied, last_pk = 0, None
+    while True:
+        rows = list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:chunk_size])
+        if not rows:
+            return copied
+        with transaction.atomic(using=target):
+            manager.bulk_create(rows)
+        copied += len(rows)
+        last_pk = rows[-1].pk
+
+
+def set_tenant_shard(restaurant_ids, alias, read_only=False):
+    for restaurant_id in restaurant_ids:
+        TenantShard.objects.update_or_create(restaurant_id=restaurant_id, defaults={'alias': alias, 'read_only': read_only})
+    forget_tenant_shards(restaurant_ids)
+
+
+def move_restaurant(restaurant_id, target, chunk_size=PURGE_CHUNK_SIZE, grace=0, timer=None):
+    """
+    Trasllada el restaurant, amb els que hi comparteixen dades (`tenant_group`), a la base de dades
+    `target`: els marca com a només lectura, espera `grace` segons que acabin les escriptures en curs,
+    en copia les dades per lots conservant els ids, comprova que hi són totes, apunta el directori a
+    `target` i esborra les files de l'origen. Si la còpia falla, s'esborra el que s'hagi copiat i
+    es tornen a poder escriure a l'origen. Retorna els ids traslladats.
+    """
+    timer = timer or Timer()
+    if target not in settings.DATABASES:
+        raise ValueError(f"Unknown database: {target}")
+    source = get_tenant_shard(restaurant_id, cached=False)[0]
+    if source == target:
+        raise ValueError(f"Restaurant {restaurant_id} is already in {target}.")
+    with use_shard(source):
+        if not Restaurant.all_objects.filter(pk=restaurant_id).exists():
+            raise ValueError(f"Unknown restaurant: {restaurant_id}")
+        restaurant_ids = tenant_group(restaurant_id)
+
+    set_tenant_shard(restaurant_ids, source, read_only=True)
+    time.sleep(grace)
+
+    querysets = []
+    try:
+        with use_shard(source):
+            querysets = tenant_querysets(restaurant_ids)
+            for queryset in querysets:
+                timer.step(f'copy {queryset.model._meta.verbose_name_plural}',
+                           lambda: copy_in_chunks(queryset, target, chunk_size))
+            for queryset in querysets:
+                if queryset.count() != queryset.using(target).count():
+                    raise RuntimeError(f"{queryset.model._meta.verbose_name_plural} were not fully copied to {target}.")
+    except Exception:
+        for queryset in reversed(querysets):
+            delete_in_chunks(queryset.using(target), chunk_size)
+        set_tenant_shard(restaurant_ids, source)
+        raise
+
+    set_tenant_shard(restaurant_ids, target)
+    with use_shard(source):
+        for queryset in reversed(querysets):
+            timer.step(f'delete {queryset.model._meta.verbose_name_plural} from {source}',
+                       lambda: delete_in_chunks(queryset, chunk_size))
+    for moved_id in restaurant_ids:
+        invalidate_public_menu(moved_id)
+        invalidate_tenant_users(moved_id)
+    invalidate_nearby()
+    logger.info('Moved restaurants %s from %s to %s: %s', restaurant_ids, source, target, '; '.join(timer.report()))
+    return restaurant_ids
+
+
+def purge_restaurant(restaurant_id, delete_users=False, chunk_size=PURGE_CHUNK_SIZE, timer=None):
+    """
+    Esborra un restaurant i totes les seves dades amb DELETE per lots i transaccions curtes, de manera
+    que no es bloquegen taules durant gaire estona. Els ítems compartits amb altres locals es conserven;
+    els que es queden sense cap categoria s'esborren. Els comptes dels usuaris del restaurant es conserven
+    (sense restaurant), perquè l'exportació no els inclou; amb `delete_users` s'esborren (excepte staff).
+    """
+    timer = timer or Timer()
+    with use_tenant(restaurant_id):
+        restaurant = Restaurant.all_objects.get(pk=restaurant_id)
+        logo = restaurant.logo.name
+        categories = Category.all_objects.filter(restaurant_id=restaurant_id)
+        links = MenuItemCategory.objects.filter(category__in=categories)
+        item_ids = list(links.values_list('menu_item_id', flat=True).distinct())
+
+        def chunked(queryset):
+            return lambda: delete_in_chunks(queryset, chunk_size)
+
+        timer.step('item links', chunked(links))
+        timer.step('category translations', chunked(CategoryTranslation.objects.filter(category__in=categories)))
+        timer.step('availability windows', chunked(
+            AvailabilityWindow.objects.filter(restaurant_id=restaurant_id) | AvailabilityWindow.objects.filter(category__in=categories)
+        ))
+        timer.step('overrides', chunked(MenuItemOverride.objects.filter(restaurant_id=restaurant_id)))
+        timer.step('history', chunked(MenuChange.objects.filter(restaurant_id=restaurant_id)))
+        timer.step('analytics', lambda: (
+            delete_in_chunks(DailyMenuStat.objects.filter(restaurant_id=restaurant_id), chunk_size)
+            + delete_in_chunks(MenuEvent.objects.filter(restaurant_id=restaurant_id), chunk_size)
+        ))
+        timer.step('sync log', chunked(MenuDelta.objects.filter(restaurant_id=restaurant_id)))
+        timer.step('orders', lambda: (
+            delete_in_chunks(OrderLine.objects.filter(order__restaurant_id=restaurant_id), chunk_size)
+            + delete_in_chunks(Order.objects.filter(restaurant_id=restaurant_id), chunk_size)
+        ))
+        timer.step('categories', chunked(categories))
+        timer.step('orphan items', lambda: delete_orphan_items(item_ids, chunk_size))
+
+        def unlink_users():
+            members = RestaurantUser.objects.filter(restaurant_id=restaurant_id)
+            deleted = 0
+            if delete_users:
+                # Pocs comptes per restaurant: el delete de l'ORM esborra també tokens, sessions, etc.
+                users = members.filter(user__is_staff=False, user__is_superuser=False).values('user')
+                deleted = User.objects.filter(pk__in=users).delete()[0]
+            return deleted + members.update(restaurant=None)
+
+        timer.step('users', unlink_users)
+
+        def delete_restaurant():
+            with transaction.atomic(using=tenant_db()):
+                deleted = Restaurant.all_objects.filter(pk=restaurant_id)._raw_delete(Restaurant.all_objects.db)
+                if logo and not any(Restaurant.all_objects.using(alias).filter(logo=logo).exists() for alias in shard_aliases()):
+                    storage = Restaurant._meta.get_field('logo').storage
+                    transaction.on_commit(lambda: storage.delete(logo), using=tenant_db())
+            return deleted
+
+        timer.step('restaurant', delete_restaurant)
+        TenantShard.objects.filter(restaurant_id=restaurant_id).delete()
+        forget_tenant_shards([restaurant_id])
+        invalidate_public_menu(restaurant_id)
+        invalidate_tenant_users(restaurant_id)
+        invalidate_nearby()
+        logger.info('Purged restaurant %s: %s', restaurant_id, '; '.join(timer.report()))
+    return timer
@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from menu.admin import EstimatedCountPaginator
+from menu.models import Restaurant, RestaurantUser, Category, MenuItem
+
+class AdminChangelistTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.admin = User.objects.create_superuser(username="admin", password="testpass")
+        self.client.force_login(self.admin)
+        self.restaurant = Restaurant.objects.create(name="Shown Restaurant")
+        self.other = Restaurant.objects.create(name="Hidden Restaurant")
+        RestaurantUser.objects.create(user=self.admin, restaurant=self.restaurant)
+
+    def add_items(self, count):
+
+        category = Category.objects.create(name=f"Category {count}", restaurant=self.restaurant)
+        for number in range(count):
+            item = MenuItem.objects.create(name=f"Item {count}-{number}", price=5)
+            item.categories.add(category)
+        return category
+
+    def changelist_queries(self, url):
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_menu_item_queries_do_not_grow_with_rows(self):
+
+        self.add_items(2)
+        few = self.changelist_queries('/admin/menu/menuitem/')
+        self.add_items(20)
+        self.assertEqual(self.changelist_queries('/admin/menu/menuitem/'), few)
+
+    def test_category_and_user_queries_do_not_grow_with_rows(self):
+
+        urls = ('/admin/menu/category/', '/admin/menu/restaurantuser/')
+        few = [self.changelist_queries(url) for url in urls]
+        for number in range(10):
+            Category.objects.create(name=f"Extra {number}", restaurant=self.other)
+            user = User.objects.create_user(username=f"user{number}")
+            RestaurantUser.objects.create(user=user, restaurant=self.other)
+        self.assertEqual([self.changelist_queries(url) for url in urls], few)
+
+    def test_restaurant_filter_only_lists_the_selected_restaurant(self):
+
+        response = self.client.get('/admin/menu/category/')
+        self.assertNotContains(response, "Hidden Restaurant")
+
+        category = Category.objects.create(name="Begudes", restaurant=self.other)
+        response = self.client.get(f'/admin/menu/category/?restaurant__id__exact={self.other.id}&o=1')
+        self.assertContains(response, "Hidden Restaurant")
+        self.assertNotContains(response, ">Shown Restaurant<")
+        self.assertEqual(list(response.context['cl'].result_list), [category])
+        self.assertContains(response, '<input type="hidden" name="o" value="1">', html=True)
+
+    def test_autocomplete(self):
+
+        response = self.client.get('/admin/menu/category/add/')
+        self.assertContains(response, 'admin-autocomplete')
+        response = self.client.get('/admin/autocomplete/', {
+            'app_label': 'menu', 'model_name': 'category', 'field_name': 'restaurant', 'term': 'Hidden',
+        })
+        self.assertEqual([result['text'] for result in response.json()['results']], ["Hidden Restaurant"])
+
+    def test_paginator_falls_back_to_exact_count(self):
+
+        paginator = EstimatedCountPaginator(Restaurant.objects.order_by('pk'), 10, estimate=True)
+        self.assertEqual(paginator.count, 2)
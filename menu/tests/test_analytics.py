@@ -0,0 +1,126 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu import analytics
+from menu.models import Restaurant, RestaurantUser, MenuEvent, DailyMenuStat
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class MenuAnalyticsTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.buffer = analytics.get_buffer()
+        self.addCleanup(self.buffer.flush)
+
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.restaurant)
+
+        self.url = f"/api/restaurants/{self.restaurant.id}/analytics/"
+
+    def test_events_are_buffered_and_flushed_in_one_insert(self):
+
+        for item_id in (1, 2, 2):
+            response = self.client.post(self.url, {"events": [
+                {"type": "menu_view"}, {"type": "item_view", "id": item_id},
+            ]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(MenuEvent.objects.exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 6)
+        self.assertEqual(MenuEvent.objects.filter(restaurant_id=self.restaurant.id).count(), 6)
+
+    def test_buffer_flushes_when_full(self):
+
+        buffer = analytics.EventBuffer(size=3)
+        events = [MenuEvent(restaurant_id=self.restaurant.id, kind=MenuEvent.MENU_VIEW, created_at=timezone.now())]
+        buffer.add(events * 2)
+        self.assertFalse(MenuEvent.objects.exists())
+        buffer.add(events)
+        self.assertEqual(MenuEvent.objects.count(), 3)
+
+    def test_idle_buffer_is_flushed_by_the_timer(self):
+
+        buffer = analytics.EventBuffer(size=100, interval=0.05)
+        flushed, closed = threading.Event(), threading.Event()
+        events = [MenuEvent(restaurant_id=self.restaurant.id, kind=MenuEvent.MENU_VIEW, created_at=timezone.now())]
+        # Sense cap més `add()`: l'escriu el fil del temporitzador (aquí, sense tocar la base de dades)
+        with mock.patch.object(MenuEvent.objects, 'bulk_create', side_effect=lambda *args, **kwargs: flushed.set()), \
+                mock.patch('menu.analytics.connections') as connections:
+            connections.close_all.side_effect = closed.set
+            buffer.add(events)
+            self.assertTrue(flushed.wait(5))
+            self.assertTrue(closed.wait(5))
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_buffer_is_flushed_at_exit(self):
+
+        with mock.patch.object(analytics, '_buffer', None), mock.patch('atexit.register') as register:
+            buffer = analytics.get_buffer()
+        register.assert_called_once_with(buffer.flush)
+
+    def test_invalid_events(self):
+
+        response = self.client.post(self.url, {"events": [{"type": "item_view"}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {"events": [{"type": "checkout"}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {"events": [{"type": "menu_view"}] * 51}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_roll_up_adds_to_daily_counts(self):
+
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        DailyMenuStat.objects.create(restaurant=self.restaurant, date=yesterday.date(),
+                                     kind=MenuEvent.ITEM_VIEW, object_id=7, count=10)
+        MenuEvent.objects.bulk_create([
+            MenuEvent(restaurant_id=self.restaurant.id, kind=MenuEvent.ITEM_VIEW, object_id=7, created_at=yesterday),
+            MenuEvent(restaurant_id=self.restaurant.id, kind=MenuEvent.ITEM_VIEW, object_id=7, created_at=yesterday),
+            MenuEvent(restaurant_id=self.restaurant.id, kind=MenuEvent.MENU_VIEW, created_at=timezone.now()),
+            MenuEvent(restaurant_id=self.restaurant.id + 100, kind=MenuEvent.MENU_VIEW, created_at=timezone.now()),
+        ])
+
+        self.assertEqual(analytics.roll_up(), 4)
+        self.assertFalse(MenuEvent.objects.exists())
+        self.assertEqual(DailyMenuStat.objects.get(object_id=7).count, 12)
+        self.assertEqual(DailyMenuStat.objects.get(kind=MenuEvent.MENU_VIEW).count, 1)
+        self.assertEqual(analytics.roll_up(), 0)
+
+    def test_stats_endpoint(self):
+
+        today = timezone.now().date()
+        DailyMenuStat.objects.bulk_create([
+            DailyMenuStat(restaurant=self.restaurant, date=today, kind=MenuEvent.MENU_VIEW, count=5),
+            DailyMenuStat(restaurant=self.restaurant, date=today, kind=MenuEvent.ITEM_VIEW, object_id=3, count=2),
+            DailyMenuStat(restaurant=self.restaurant, date=today, kind=MenuEvent.ITEM_VIEW, object_id=4, count=6),
+            DailyMenuStat(restaurant=self.restaurant, date=today - datetime.timedelta(days=1),
+                          kind=MenuEvent.CATEGORY_OPEN, object_id=9, count=1),
+            DailyMenuStat(restaurant=self.restaurant, date=today - datetime.timedelta(days=40),
+                          kind=MenuEvent.MENU_VIEW, count=100),
+        ])
+        url = f"/api/restaurants/{self.restaurant.id}/stats/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totals'], {"menu_view": 5, "item_view": 8, "category_open": 1})
+        self.assertEqual(len(response.data['daily']), 2)
+        self.assertEqual(response.data['items'], [{"id": 4, "count": 6}, {"id": 3, "count": 2}])
+        self.assertEqual(response.data['categories'], [{"id": 9, "count": 1}])
+
+        response = self.client.get(url, {"start": (today - datetime.timedelta(days=60)).isoformat()})
+        self.assertEqual(response.data['totals']['menu_view'], 105)
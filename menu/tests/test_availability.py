@@ -0,0 +1,156 @@
+import datetime
+import zoneinfo
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.availability import get_schedule
+from menu.models import MenuItem, Category, Restaurant, RestaurantUser, AvailabilityWindow
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+MADRID = zoneinfo.ZoneInfo("Europe/Madrid")
+
+class ScheduleTests(TestCase):
+
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant", timezone="Europe/Madrid")
+        self.breakfast = Category.objects.create(name="Esmorzars", restaurant=self.restaurant)
+        self.dinner = Category.objects.create(name="Sopars", restaurant=self.restaurant)
+
+        # Dilluns 08:00-11:00 i dilluns 20:00-01:00 (passa de mitjanit)
+        AvailabilityWindow.objects.create(restaurant=self.restaurant, category=self.breakfast, weekday=0,
+                                          start_time=datetime.time(8), end_time=datetime.time(11))
+        AvailabilityWindow.objects.create(restaurant=self.restaurant, category=self.dinner, weekday=0,
+                                          start_time=datetime.time(20), end_time=datetime.time(1))
+
+    def test_inside_window(self):
+
+        now = datetime.datetime(2024, 12, 9, 9, 30, tzinfo=MADRID)  # Dilluns
+        schedule = get_schedule(self.restaurant.id, now)
+        self.assertEqual(schedule.inactive_category_ids, {self.dinner.id})
+        self.assertEqual(schedule.next_transition, datetime.datetime(2024, 12, 9, 11, 0, tzinfo=MADRID))
+        self.assertEqual(schedule.seconds_until_transition(), 90 * 60 + 1)
+
+    def test_window_past_midnight(self):
+
+        now = datetime.datetime(2024, 12, 10, 0, 30, tzinfo=MADRID)  # Dimarts
+        schedule = get_schedule(self.restaurant.id, now)
+        self.assertEqual(schedule.inactive_category_ids, {self.breakfast.id})
+        self.assertEqual(schedule.next_transition, datetime.datetime(2024, 12, 10, 1, 0, tzinfo=MADRID))
+
+    def test_timezone_is_respected(self):
+
+        # 08:30 UTC són les 09:30 a Madrid
+        now = datetime.datetime(2024, 12, 9, 8, 30, tzinfo=datetime.timezone.utc)
+        schedule = get_schedule(self.restaurant.id, now)
+        self.assertEqual(schedule.inactive_category_ids, {self.dinner.id})
+
+    def test_without_windows(self):
+
+        schedule = get_schedule(Restaurant.objects.create(name="Other").id)
+        self.assertEqual(schedule.inactive_category_ids, set())
+        self.assertIsNone(schedule.seconds_until_transition())
+
+
+class PublicScheduledMenuTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant", timezone="Europe/Madrid")
+        self.breakfast = Category.objects.create(name="Esmorzars", restaurant=self.restaurant)
+        self.drinks = Category.objects.create(name="Begudes", restaurant=self.restaurant)
+
+        self.croissant = MenuItem.objects.create(name="Croissant", price=2)
+        self.croissant.categories.add(self.breakfast)
+        self.coffee = MenuItem.objects.create(name="Cafè", price=1.5)
+        self.coffee.categories.add(self.breakfast, self.drinks)
+
+        AvailabilityWindow.objects.create(restaurant=self.restaurant, category=self.breakfast, weekday=0,
+                                          start_time=datetime.time(8), end_time=datetime.time(11))
+
+    def get_public(self, endpoint, now):
+        with mock.patch('menu.availability.timezone.now', return_value=now):
+            return self.client.get(f"/api/restaurants/{self.restaurant.id}/{endpoint}/public/")
+
+    def test_outside_window(self):
+
+        now = datetime.datetime(2024, 12, 9, 12, 0, tzinfo=MADRID)
+        response = self.get_public("menuItems", now)
+        self.assertEqual([item['name'] for item in response.data], ["Cafè"])
+
+        response = self.get_public("categories", now)
+        self.assertEqual([category['name'] for category in response.data], ["Begudes"])
+
+    def test_cache_expires_at_next_transition(self):
+
+        now = datetime.datetime(2024, 12, 9, 10, 59, tzinfo=MADRID)
+        with mock.patch('menu.cache.cache.set', wraps=cache.set) as cache_set:
+            response = self.get_public("menuItems", now)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(cache_set.call_args.args[2], 61)
+
+
+class BulkAvailabilityTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.other_category = Category.objects.create(name="Pizzes", restaurant=Restaurant.objects.create(name="Other"))
+
+        self.items = [MenuItem.objects.create(name=f"Pizza {i}", price=10) for i in range(3)]
+        for item in self.items:
+            item.categories.add(self.category)
+        self.other_item = MenuItem.objects.create(name="Pizza", price=10)
+        self.other_item.categories.add(self.other_category)
+
+        user = User.objects.create_user(username="test@example.com", email="test@example.com", password="securepassword123")
+        RestaurantUser.objects.create(user=user, restaurant=self.restaurant)
+        self.token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.url = f"/api/restaurants/{self.restaurant.id}/menuItems/bulk-availability/"
+
+    def test_bulk_toggle_by_category(self):
+
+        response = self.client.patch(self.url, {"categories": [self.category.id, self.other_category.id],
+                                                "is_available": False}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 3)
+        self.assertFalse(MenuItem.objects.resolved(self.restaurant.id)
+                         .filter(categories=self.category, resolved_is_available=True).exists())
+        self.other_item.refresh_from_db()
+        self.assertTrue(self.other_item.is_available)
+
+    def test_bulk_toggle_by_ids(self):
+
+        response = self.client.patch(self.url, {"ids": [self.items[0].id, self.other_item.id],
+                                                "is_available": False}, format="json")
+        self.assertEqual(response.data["updated"], 1)
+
+    def test_bulk_toggle_requires_target(self):
+
+        response = self.client.patch(self.url, {"is_available": False}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_window_for_other_restaurant_category(self):
+
+        response = self.client.post(f"/api/restaurants/{self.restaurant.id}/availabilityWindows/", {
+            "category": self.other_category.id, "weekday": 0, "start_time": "08:00", "end_time": "11:00"
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(f"/api/restaurants/{self.restaurant.id}/availabilityWindows/", {
+            "category": self.category.id, "weekday": 0, "start_time": "08:00", "end_time": "11:00"
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(AvailabilityWindow.objects.get().restaurant, self.restaurant)
@@ -0,0 +1,125 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.cache import get_version
+from menu.events import get_broadcaster
+from menu.models import Brand, MenuItem, MenuItemOverride, Category, Restaurant, RestaurantUser
+from menu.sharding import get_tenant_shard
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class ChainCatalogTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        brand = Brand.objects.create(name="Pizzeria Chain")
+        self.first = Restaurant.objects.create(name="Gràcia", brand=brand)
+        self.second = Restaurant.objects.create(name="Sants", brand=brand)
+        self.unrelated = Restaurant.objects.create(name="Unrelated")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.second)
+
+        first_category = Category.objects.create(name="Pizzes", restaurant=self.first)
+        self.second_category = Category.objects.create(name="Pizzes", restaurant=self.second)
+        self.unrelated_category = Category.objects.create(name="Pizzes", restaurant=self.unrelated)
+
+        # Un sol ítem de catàleg a les categories dels dos locals
+        self.menu_item = MenuItem.objects.create(name="Pizza Margherita", price=10)
+        self.menu_item.categories.add(first_category, self.second_category)
+
+        self.override_url = f"/api/restaurants/{self.second.id}/menuItems/{self.menu_item.id}/override/"
+
+    def public_items(self, restaurant):
+        return self.client.get(f"/api/restaurants/{restaurant.id}/menuItems/public/")
+
+    def test_override_applies_only_to_its_location(self):
+
+        response = self.client.put(self.override_url, {"price": "12.50"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"price": "12.50", "is_available": None})
+
+        self.assertEqual(self.public_items(self.second).data[0]['price'], "12.50")
+        self.assertEqual(self.public_items(self.first).data[0]['price'], "10.00")
+
+        self.client.put(self.override_url, {"is_available": False}, format='json')
+        self.assertEqual(self.public_items(self.second).data, [])
+        self.assertEqual(len(self.public_items(self.first).data), 1)
+
+        response = self.client.delete(self.override_url)
+        self.assertEqual(response.data, {"price": None, "is_available": None})
+        self.assertEqual(self.public_items(self.second).data[0]['price'], "10.00")
+
+    def test_public_categories_are_the_locations(self):
+
+        for restaurant, category_id in ((self.first, self.menu_item.categories.get(restaurant=self.first).id),
+                                        (self.second, self.second_category.id)):
+            row = self.public_items(restaurant).data[0]
+            self.assertEqual((row['categories'], row['category_names']), ([category_id], ["Pizzes"]))
+            row = self.client.get(f"/api/restaurants/{restaurant.id}/public/").data['menuItems'][0]
+            self.assertEqual(row['categories'], [category_id])
+
+    def test_catalog_events_skip_overridden_locations(self):
+
+        MenuItemOverride.objects.create(restaurant=self.second, menu_item=self.menu_item, price="20.00")
+        subscriptions = {restaurant: get_broadcaster().subscribe(restaurant.id) for restaurant in (self.first, self.second)}
+        for subscription in subscriptions.values():
+            self.addCleanup(subscription.close)
+
+        self.menu_item.price = 12
+        self.menu_item.is_available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu_item.save()
+        first = subscriptions[self.first]
+        self.assertEqual([first.get(timeout=0)['type'] for _ in range(2)], ['item.availability', 'item.price'])
+        # El segon local té el seu preu: només en canvia la disponibilitat
+        self.assertEqual(subscriptions[self.second].get(timeout=0)['type'], 'item.availability')
+        self.assertIsNone(subscriptions[self.second].get(timeout=0))
+        self.assertEqual(self.public_items(self.second).data, [])
+
+    def test_invalid_override_price(self):
+
+        response = self.client.put(self.override_url, {"price": "0"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_override_resolved_in_items_query(self):
+
+        MenuItemOverride.objects.create(restaurant=self.second, menu_item=self.menu_item, price=9)
+        self.client.credentials()
+        get_tenant_shard(self.second.id)  # el directori de tenants, si n'hi ha, ja és a la cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.public_items(self.second)
+        self.assertEqual(response.data[0]['price'], "9.00")
+        # Franges horàries, ítems (amb l'override) i categories
+        self.assertEqual(len(queries), 3)
+
+    def test_invalidation_fans_out_to_affected_locations(self):
+
+        versions = {restaurant.id: get_version(restaurant.id) for restaurant in (self.first, self.second, self.unrelated)}
+
+        MenuItemOverride.objects.create(restaurant=self.second, menu_item=self.menu_item, price=9)
+        self.assertEqual(get_version(self.first.id), versions[self.first.id])
+        self.assertNotEqual(get_version(self.second.id), versions[self.second.id])
+
+        versions = {restaurant.id: get_version(restaurant.id) for restaurant in (self.first, self.second, self.unrelated)}
+        self.menu_item.price = 11
+        self.menu_item.save()
+        self.assertNotEqual(get_version(self.first.id), versions[self.first.id])
+        self.assertNotEqual(get_version(self.second.id), versions[self.second.id])
+        self.assertEqual(get_version(self.unrelated.id), versions[self.unrelated.id])
+
+    def test_items_shared_only_within_a_brand(self):
+
+        url = f"/api/restaurants/{self.second.id}/menuItems/"
+        response = self.client.post(url, {
+            "name": "Calzone", "price": "11.00", "categories": [self.second_category.id, self.unrelated_category.id],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('categories', response.data)
@@ -0,0 +1,114 @@
+import threading
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.events import InProcessBackend, event_stream, get_broadcaster, make_event
+from menu.models import MenuItem, Category, Restaurant, RestaurantUser
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class InProcessBackendTests(TestCase):
+
+    def test_publish_to_restaurant_subscribers(self):
+
+        backend = InProcessBackend()
+        subscription = backend.subscribe(1)
+        other = backend.subscribe(2)
+
+        backend.publish(1, make_event('menu.changed'))
+        self.assertEqual(subscription.get(timeout=0)['type'], 'menu.changed')
+        self.assertIsNone(other.get(timeout=0))
+
+        subscription.close()
+        backend.publish(1, make_event('menu.changed'))
+        self.assertIsNone(subscription.get(timeout=0))
+
+    def test_slow_subscriber_gets_resync(self):
+
+        backend = InProcessBackend()
+        subscription = backend.subscribe(1)
+        for _ in range(200):
+            backend.publish(1, make_event('menu.changed'))
+
+        self.assertEqual(subscription.get(timeout=0)['type'], 'resync')
+
+
+class MenuEventsTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.menu_item = MenuItem.objects.create(name="Pizza Margherita", price=10.50)
+        self.menu_item.categories.add(self.category)
+
+        user = User.objects.create_user(username="test@example.com", email="test@example.com", password="securepassword123")
+        RestaurantUser.objects.create(user=user, restaurant=self.restaurant)
+        self.token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.subscription = get_broadcaster().subscribe(self.restaurant.id)
+        self.addCleanup(self.subscription.close)
+
+    def test_toggle_availability_emits_event(self):
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/restaurants/{self.restaurant.id}/menuItems/{self.menu_item.id}/toggle-availability/')
+
+        event = self.subscription.get(timeout=0)
+        self.assertEqual(event['type'], 'item.availability')
+        self.assertEqual(event['data'], {'id': self.menu_item.id, 'is_available': False})
+        self.assertIsNone(self.subscription.get(timeout=0))
+
+    def test_price_change_emits_event(self):
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/restaurants/{self.restaurant.id}/menuItems/{self.menu_item.id}/',
+                              {"price": "12.00"}, format="json")
+
+        event = self.subscription.get(timeout=0)
+        self.assertEqual(event['type'], 'item.price')
+        self.assertEqual(event['data'], {'id': self.menu_item.id, 'price': "12.00"})
+
+    async def test_event_stream(self):
+
+        response = await self.async_client.get(f'/api/restaurants/{self.restaurant.id}/events/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+
+        # Com els `on_commit` de les vistes síncrones, es publica des d'un altre fil
+        publish = threading.Thread(target=get_broadcaster().publish,
+                                   args=(self.restaurant.id, make_event('item.price', id=1, price="9.00")))
+        publish.start()
+        chunk = (await anext(stream)).decode()
+        publish.join()
+        self.assertIn('event: item.price\n', chunk)
+        self.assertIn('data: {"id": 1, "price": "9.00"}\n\n', chunk)
+
+    async def test_event_stream_heartbeat(self):
+
+        subscription = get_broadcaster().subscribe(self.restaurant.id)
+        stream = event_stream(subscription, heartbeat=0.01)
+        self.assertEqual(await anext(stream), 'retry: 5000\n\n')
+        self.assertEqual(await anext(stream), ': keepalive\n\n')
+        await stream.aclose()
+        get_broadcaster().publish(self.restaurant.id, make_event('menu.changed'))
+        self.assertIsNone(subscription.pop())
+
+    async def test_event_stream_unknown_restaurant(self):
+
+        response = await self.async_client.get('/api/restaurants/99999/events/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_event_stream_needs_asgi(self):
+
+        response = self.client.get(f'/api/restaurants/{self.restaurant.id}/events/')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.models import MenuItem, Category, Restaurant, RestaurantUser
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class MenuFacetsTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.restaurant)
+        self.category = Category.objects.create(name="Main", restaurant=self.restaurant)
+
+        self.salad = self.add_item("Salad", "8.50", tags=["vegetarian", "vegan"], allergens=[])
+        self.pizza = self.add_item("Pizza", "11.00", tags=["vegetarian"], allergens=["gluten", "milk"])
+        self.risotto = self.add_item("Risotto", "14.00", tags=["vegetarian", "gluten_free"], allergens=["milk"])
+        self.burger = self.add_item("Burger", "12.00", tags=[], allergens=["gluten"])
+
+        self.base_url = f"/api/restaurants/{self.restaurant.id}/menuItems"
+
+    def add_item(self, name, price, tags, allergens):
+
+        field = MenuItem._meta.get_field
+        item = MenuItem.objects.create(name=name, price=price, tags=field('tags').to_mask(tags),
+                                       allergens=field('allergens').to_mask(allergens))
+        item.categories.add(self.category)
+        return item
+
+    def public_names(self, **params):
+
+        response = self.client.get(f"{self.base_url}/public/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data]
+
+    def test_items_include_tags_and_allergens(self):
+
+        response = self.client.get(f"{self.base_url}/public/")
+        pizza = next(item for item in response.data if item['id'] == self.pizza.id)
+        self.assertEqual(pizza['tags'], ["vegetarian"])
+        self.assertEqual(pizza['allergens'], ["gluten", "milk"])
+
+    def test_filters(self):
+
+        self.assertEqual(self.public_names(tags="vegetarian", max_price="12"), ["Salad", "Pizza"])
+        self.assertEqual(self.public_names(tags="vegetarian,vegan"), ["Salad"])
+        self.assertEqual(self.public_names(exclude_allergens="gluten"), ["Salad", "Risotto"])
+        self.assertEqual(self.public_names(exclude_allergens="gluten,milk", tags=""), ["Salad"])
+
+    def test_filtered_requests_use_the_cached_menu(self):
+
+        self.public_names()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.public_names(max_price="10"), ["Salad"])
+
+    def test_invalid_filters(self):
+
+        for params in ({"tags": "carnivore"}, {"exclude_allergens": "gluten,dust"}, {"max_price": "cheap"}):
+            response = self.client.get(f"{self.base_url}/public/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_facets(self):
+
+        response = self.client.get(f"{self.base_url}/public/facets/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['price'], {"min": "8.50", "max": "14.00"})
+        self.assertEqual(response.data['tags']['vegetarian'], 3)
+        self.assertEqual(response.data['tags']['spicy'], 0)
+        self.assertEqual(response.data['allergens']['gluten'], 2)
+
+        with self.assertNumQueries(0):
+            self.client.get(f"{self.base_url}/public/facets/")
+
+        # Els canvis del menú també invaliden els recomptes
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.patch(f"{self.base_url}/{self.burger.id}/", {"tags": ["spicy"]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tags'], ["spicy"])
+        self.client.credentials()
+        self.assertEqual(self.client.get(f"{self.base_url}/public/facets/").data['tags']['spicy'], 1)
+
+    def test_invalid_tags_on_write(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.patch(f"{self.base_url}/{self.burger.id}/", {"allergens": ["dust"]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(f"{self.base_url}/{self.burger.id}/", {"allergens": "gluten"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.geo import distance_km, geohash_bounds
+from menu.models import Restaurant, RestaurantUser
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+# Plaça de Catalunya, Barcelona
+LAT, LNG = 41.3870, 2.1701
+
+class NearbyTests(TestCase):
+    # Hi ha consultes que passen per totes les bases de dades (menu.sharding)
+    databases = '__all__'
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+
+        # 0,01° de latitud són uns 1,1 km
+        self.near = Restaurant.objects.create(name="Near", latitude=LAT + 0.005, longitude=LNG)
+        self.closest = Restaurant.objects.create(name="Closest", latitude=LAT, longitude=LNG + 0.001)
+        self.far = Restaurant.objects.create(name="Far", latitude=LAT + 0.1, longitude=LNG)
+        self.madrid = Restaurant.objects.create(name="Madrid", latitude=40.4168, longitude=-3.7038)
+        Restaurant.objects.create(name="Nowhere")
+        deleted = Restaurant.objects.create(name="Deleted", latitude=LAT, longitude=LNG)
+        deleted.soft_delete()
+        RestaurantUser.objects.create(user=self.user, restaurant=self.near)
+
+        self.url = "/api/restaurants/nearby/"
+
+    def nearby(self, **params):
+
+        response = self.client.get(self.url, {"lat": LAT, "lng": LNG, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_geometry(self):
+
+        self.assertEqual(geohash_bounds(57.64911, 10.40744, 11)[0], "u4pruydqqvj")
+        self.assertAlmostEqual(distance_km(LAT, LNG, 40.4168, -3.7038), 505, delta=5)
+
+    def test_sorted_by_distance_within_radius(self):
+
+        data = self.nearby()
+        self.assertEqual([row['name'] for row in data], ["Closest", "Near"])
+        self.assertAlmostEqual(data[1]['distance_km'], 0.556, places=2)
+        self.assertEqual(data[0]['latitude'], LAT)
+
+        self.assertEqual([row['name'] for row in self.nearby(radius=20)], ["Closest", "Near", "Far"])
+        self.assertEqual([row['name'] for row in self.nearby(radius=20, limit=1)], ["Closest"])
+        self.assertEqual([row['name'] for row in self.nearby(radius=0.5)], ["Closest"])
+
+    def test_invalid_params(self):
+
+        self.assertEqual(self.client.get(self.url, {"lat": LAT}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"lat": 91, "lng": 0}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"lat": LAT, "lng": LNG, "radius": 500})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_area_is_cached_until_a_restaurant_moves(self):
+
+        self.nearby()
+        with self.assertNumQueries(0):
+            # Un altre punt de la mateixa cel·la fa servir la mateixa entrada
+            self.assertEqual(len(self.nearby(lat=LAT + 0.0001)), 2)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/restaurants/{self.far.id}/", {"latitude": LAT - 0.002}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials()
+        self.assertEqual([row['name'] for row in self.nearby()], ["Closest", "Far", "Near"])
+
+    def test_update_validates_coordinates(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.patch(f"/api/restaurants/{self.near.id}/", {"latitude": 100}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(f"/api/restaurants/{self.near.id}/", {"longitude": None}, format="json")
+        self.assertIsNone(response.data['longitude'])
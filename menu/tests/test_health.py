@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from menu import health
+from menu.models import Restaurant, Category, MenuItem, MenuEvent, DailyMenuStat
+
+class HealthTests(TestCase):
+    # Hi ha consultes que passen per totes les bases de dades (menu.sharding)
+    databases = '__all__'
+
+    def setUp(self):
+
+        cache.clear()
+        health._warmed = False
+        self.addCleanup(setattr, health, '_warmed', False)
+
+        today = timezone.now().date()
+        self.popular = Restaurant.objects.create(name="Popular")
+        self.quiet = Restaurant.objects.create(name="Quiet")
+        for restaurant, views in ((self.popular, 50), (self.quiet, 2)):
+            category = Category.objects.create(name="Pizzes", restaurant=restaurant)
+            MenuItem.objects.create(name="Margherita", price=10).categories.add(category)
+            DailyMenuStat.objects.create(restaurant=restaurant, date=today, kind=MenuEvent.MENU_VIEW, count=views)
+
+    def test_healthz(self):
+
+        response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok", "checks": {"database": "ok", "cache": "ok"}})
+
+    def test_readyz_warms_the_most_requested_menus(self):
+
+        self.assertEqual(health.popular_restaurant_ids(limit=1), [self.popular.id])
+
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['checks']['migrations'], "ok")
+        self.assertTrue(health._warmed)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/api/restaurants/{self.popular.id}/menuItems/public/")
+            self.assertEqual(response.data[0]['name'], "Margherita")
+            self.client.get(f"/api/restaurants/{self.popular.id}/menuItems/public/facets/")
+
+    def test_readyz_fails_until_checks_pass(self):
+
+        failing = mock.Mock(side_effect=RuntimeError("1 unapplied"))
+        with mock.patch.dict(health.CHECKS, {'migrations': failing}), self.assertLogs('menu.health', 'ERROR'):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['migrations'], "error")
+        self.assertFalse(health._warmed)
+
+        with mock.patch.object(health, 'warm_up', side_effect=RuntimeError("database down")), \
+                self.assertLogs('menu.health', 'ERROR'):
+            self.assertEqual(self.client.get('/readyz').status_code, 503)
+        self.assertEqual(self.client.get('/readyz').status_code, 200)
+
+    def test_command(self):
+
+        call_command('warm_menu_cache', self.quiet.id, languages=['en'], stdout=mock.Mock())
+        with self.assertNumQueries(0):
+            self.client.get(f"/api/restaurants/{self.quiet.id}/categories/public/", {"lang": "en"})
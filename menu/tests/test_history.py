@@ -0,0 +1,169 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.history import restore_menu
+from menu.models import MenuItem, Category, Restaurant, RestaurantUser, MenuChange
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class MenuHistoryTests(TestCase):
+
+    def setUp(self):
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.pizzas = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.pasta = Category.objects.create(name="Pasta", restaurant=self.restaurant)
+        self.menu_item = MenuItem.objects.create(name="Pizza Margherita", price=10.50)
+        self.menu_item.categories.add(self.pizzas)
+
+    def changes(self, **filters):
+        return list(MenuChange.objects.filter(restaurant=self.restaurant, **filters)
+                    .order_by('id').values_list('model', 'action', 'diff'))
+
+    def test_create_is_recorded_once_categories_are_added(self):
+
+        self.assertEqual(self.changes(model='menu_item'), [
+            ('menu_item', 'create', {'name': "Pizza Margherita", 'description': "", 'price': "10.50", 'is_available': True,
+                                     'tags': 0, 'allergens': 0}),
+            ('menu_item', 'categories', {'add': [self.pizzas.id]}),
+        ])
+
+    def test_update_stores_only_changed_fields(self):
+
+        menu_item = MenuItem.objects.get(pk=self.menu_item.pk)
+        menu_item.price = "12.00"
+        menu_item.save()
+
+        self.assertEqual(self.changes(model='menu_item', action='update'), [
+            ('menu_item', 'update', {'price': ["10.50", "12.00"]}),
+        ])
+
+    def test_soft_delete(self):
+
+        self.pizzas.soft_delete()
+
+        self.assertFalse(Category.objects.filter(pk=self.pizzas.pk).exists())
+        self.assertTrue(Category.all_objects.filter(pk=self.pizzas.pk).exists())
+        self.assertFalse(MenuItem.objects.for_restaurant(self.restaurant.id).exists())
+        self.assertEqual(self.changes(model='category', action='delete'), [('category', 'delete', {})])
+
+    def test_restore_to_point_in_time(self):
+
+        point = timezone.now()
+        later = point + datetime.timedelta(seconds=1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            menu_item = MenuItem.objects.get(pk=self.menu_item.pk)
+            menu_item.name = "Pizza"
+            menu_item.save()
+            menu_item.categories.set([self.pasta])
+            self.pizzas.soft_delete()
+            new_item = MenuItem.objects.create(name="Calzone", price=12)
+            new_item.categories.add(self.pasta)
+
+        restore_menu(self.restaurant.id, point)
+
+        menu_item.refresh_from_db()
+        self.assertEqual(menu_item.name, "Pizza Margherita")
+        self.assertEqual(list(menu_item.categories.all()), [self.pizzas])
+        self.assertTrue(Category.objects.filter(pk=self.pizzas.pk).exists())
+        self.assertFalse(MenuItem.objects.filter(pk=new_item.pk).exists())
+
+
+class SoftDeleteViewTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.menu_item = MenuItem.objects.create(name="Pizza Margherita", price=10.50)
+        self.menu_item.categories.add(self.category)
+
+        user = User.objects.create_user(username="test@example.com", email="test@example.com", password="securepassword123")
+        RestaurantUser.objects.create(user=user, restaurant=self.restaurant)
+        self.token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.base_url = f"/api/restaurants/{self.restaurant.id}"
+
+    def test_delete_and_restore_category(self):
+
+        response = self.client.delete(f"{self.base_url}/categories/{self.category.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(f"{self.base_url}/menuItems/public/")
+        self.assertEqual(response.data, [])
+
+        response = self.client.post(f"{self.base_url}/categories/{self.category.id}/restore/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.menu_item.categories.filter(pk=self.category.pk).exists())
+
+    def test_restore_menu_item_and_restaurant(self):
+
+        other = Restaurant.objects.create(name="Other")
+        self.client.delete(f"{self.base_url}/menuItems/{self.menu_item.id}/")
+        # Només des del restaurant on és l'ítem
+        response = self.client.post(f"/api/restaurants/{other.id}/menuItems/{self.menu_item.id}/restore/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(f"{self.base_url}/menuItems/{self.menu_item.id}/restore/")
+        self.assertEqual((response.status_code, response.data["id"]), (status.HTTP_200_OK, self.menu_item.id))
+
+        other.soft_delete()
+        response = self.client.post(f"/api/restaurants/{other.id}/restore/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(Restaurant.objects.filter(pk=other.pk).exists())
+
+    def test_delete_and_restore_restaurant(self):
+
+        drinks = Category.objects.create(name="Begudes", restaurant=self.restaurant)
+        drinks.soft_delete()
+        self.restaurant.soft_delete()
+        self.assertFalse(Category.objects.filter(restaurant=self.restaurant).exists())
+
+        # Torna el que es va esborrar amb el restaurant, no la categoria que ja era esborrada
+        self.restaurant.restore()
+        self.assertEqual(list(Category.objects.filter(restaurant=self.restaurant)), [self.category])
+        response = self.client.get(f"{self.base_url}/menuItems/public/")
+        self.assertEqual([row['id'] for row in response.data], [self.menu_item.id])
+
+    def test_history_and_restore_menu(self):
+
+        point = timezone.now()
+        with mock.patch('django.utils.timezone.now', return_value=point + datetime.timedelta(seconds=1)):
+            self.client.delete(f"{self.base_url}/menuItems/{self.menu_item.id}/")
+
+        response = self.client.get(f"{self.base_url}/history/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['action'], "delete")
+
+        response = self.client.post(f"{self.base_url}/restore-menu/", {"at": point.isoformat()}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["restored"], 1)
+        self.assertTrue(MenuItem.objects.filter(pk=self.menu_item.pk).exists())
+
+    def test_history_pagination(self):
+
+        for name in ("Pasta", "Postres", "Begudes"):
+            Category.objects.create(name=name, restaurant=self.restaurant)
+        newest = self.client.get(f"{self.base_url}/history/", {"limit": 2}).data
+        self.assertEqual(len(newest), 2)
+        older = self.client.get(f"{self.base_url}/history/", {"before": newest[-1]['id']}).data
+        self.assertTrue(older)
+        self.assertLess(older[0]['id'], newest[-1]['id'])
+
+        for params in ({"before": "abc"}, {"before": 0}, {"limit": 0}, {"limit": 101}):
+            response = self.client.get(f"{self.base_url}/history/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_history_requires_authentication(self):
+
+        self.client.credentials()
+        response = self.client.get(f"{self.base_url}/history/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
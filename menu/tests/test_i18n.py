@@ -0,0 +1,116 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.models import MenuItem, Category, Restaurant, RestaurantUser, CategoryTranslation, MenuItemTranslation
+from menu.sharding import get_tenant_shard
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class PublicMenuTranslationTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        CategoryTranslation.objects.create(category=self.category, language="en", name="Pizzas")
+
+        self.menu_item = MenuItem.objects.create(name="Pizza Margherita",
+                                                 description="Pizza amb tomàquet i mozzarella",
+                                                 price=10.50)
+        self.menu_item.categories.add(self.category)
+        MenuItemTranslation.objects.create(menu_item=self.menu_item, language="en",
+                                           name="Margherita pizza", description="")
+
+        self.url = f"/api/restaurants/{self.restaurant.id}/menuItems/public/"
+
+    def test_default_language(self):
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['name'], "Pizza Margherita")
+        self.assertEqual(response.data[0]['category_names'], ["Pizzes"])
+
+    def test_lang_query_param(self):
+
+        response = self.client.get(self.url + "?lang=en")
+        self.assertEqual(response.data[0]['name'], "Margherita pizza")
+        # La descripció buida de la traducció fa servir l'original
+        self.assertEqual(response.data[0]['description'], "Pizza amb tomàquet i mozzarella")
+        self.assertEqual(response.data[0]['category_names'], ["Pizzas"])
+
+    def test_accept_language_header(self):
+
+        response = self.client.get(self.url, HTTP_ACCEPT_LANGUAGE="xx, en-GB;q=0.8")
+        self.assertEqual(response.data[0]['name'], "Margherita pizza")
+        self.assertIn('Accept-Language', response['Vary'])
+
+        response = self.client.get(f"/api/restaurants/{self.restaurant.id}/categories/public/",
+                                   HTTP_ACCEPT_LANGUAGE="fr")
+        self.assertEqual(response.data, [{'id': self.category.id, 'name': "Pizzes"}])
+
+    def test_bounded_queries(self):
+
+        for i in range(5):
+            item = MenuItem.objects.create(name=f"Item {i}", price=5)
+            item.categories.add(self.category)
+
+        # Franges horàries, ítems i categories
+        get_tenant_shard(self.restaurant.id)  # el directori de tenants, si n'hi ha, ja és a la cache
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url + "?lang=en")
+        self.assertEqual(len(response.data), 6)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url + "?lang=en")
+
+    def test_translation_change_invalidates_cache(self):
+
+        self.client.get(self.url + "?lang=en")
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItemTranslation.objects.filter(menu_item=self.menu_item).update(name="Pizza")
+            MenuItemTranslation.objects.get(menu_item=self.menu_item).save()
+
+        response = self.client.get(self.url + "?lang=en")
+        self.assertEqual(response.data[0]['name'], "Pizza")
+
+
+class TranslationsActionTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+
+        user = User.objects.create_user(username="test@example.com", email="test@example.com", password="securepassword123")
+        RestaurantUser.objects.create(user=user, restaurant=self.restaurant)
+        self.token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.url = f"/api/restaurants/{self.restaurant.id}/categories/{self.category.id}/translations/"
+
+    def test_put_and_delete_translation(self):
+
+        response = self.client.put(self.url, {"language": "ES", "name": "Pizzas"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"language": "es", "name": "Pizzas"}])
+
+        response = self.client.put(self.url, {"language": "es", "name": "Pizzas caseras"}, format="json")
+        self.assertEqual(response.data, [{"language": "es", "name": "Pizzas caseras"}])
+
+        response = self.client.delete(self.url + "?language=es-ES")
+        self.assertEqual(response.data, [])
+        for language in ("es", "zz"):
+            response = self.client.delete(self.url + f"?language={language}")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_put_unsupported_language(self):
+
+        response = self.client.put(self.url, {"language": "zz", "name": "Pizzas"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
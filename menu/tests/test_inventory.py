@@ -0,0 +1,182 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.cache import get_version
+from menu.events import get_broadcaster
+from menu.history import restore_menu
+from menu.models import Brand, MenuItem, MenuItemOverride, Category, Restaurant, RestaurantUser, MenuChange
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class InventoryTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.restaurant)
+        category = Category.objects.create(name="Postres", restaurant=self.restaurant)
+        self.menu_item = MenuItem.objects.create(name="Tiramisú", price=6)
+        self.menu_item.categories.add(category)
+        self.override = MenuItemOverride.objects.create(restaurant=self.restaurant, menu_item=self.menu_item, stock=3)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.base_url = f"/api/restaurants/{self.restaurant.id}/menuItems"
+        self.url = f"{self.base_url}/{self.menu_item.id}/stock/"
+        self.subscription = get_broadcaster().subscribe(self.restaurant.id)
+        self.addCleanup(self.subscription.close)
+
+    def public_ids(self):
+
+        return [item['id'] for item in self.client.get(f"{self.base_url}/public/").data]
+
+    def test_consume_keeps_cache_until_sold_out(self):
+
+        self.assertEqual(self.public_ids(), [self.menu_item.id])
+        version = get_version(self.restaurant.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"quantity": 2}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"id": self.menu_item.id, "stock": 1, "is_available": True})
+        self.assertEqual(get_version(self.restaurant.id), version)
+        self.assertIsNone(self.subscription.get(timeout=0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.data, {"id": self.menu_item.id, "stock": 0, "is_available": False})
+        self.assertEqual(self.subscription.get(timeout=0)['data'], {'id': self.menu_item.id, 'is_available': False})
+        self.assertEqual(self.public_ids(), [])
+        change = MenuChange.objects.filter(action='update').get()
+        self.assertEqual((change.model, change.diff), ('menu_item_override', {'is_available': [True, False]}))
+
+    def test_consume_more_than_stock(self):
+
+        response = self.client.post(self.url, {"quantity": 4}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["stock"], 3)
+        self.override.refresh_from_db()
+        self.assertEqual(self.override.stock, 3)
+
+        response = self.client.post(self.url, {"quantity": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_consume_is_one_conditional_update(self):
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {"quantity": 1}, format="json")
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"stock" >', updates[0])
+
+    def test_untracked_stock(self):
+
+        MenuItemOverride.objects.filter(pk=self.override.pk).update(stock=None)
+        response = self.client.post(self.url, {"quantity": 5}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["stock"])
+        self.assertTrue(response.data["is_available"])
+
+    def test_set_stock(self):
+
+        response = self.client.put(self.url, {"stock": 0}, format="json")
+        self.assertEqual(response.data, {"id": self.menu_item.id, "stock": 0, "is_available": False})
+
+        # En reposar-lo torna a estar a la venda, perquè l'havia tret l'estoc exhaurit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.url, {"stock": 10}, format="json")
+        self.assertEqual(response.data, {"id": self.menu_item.id, "stock": 10, "is_available": True})
+        self.assertEqual(self.subscription.get(timeout=0)['data'], {'id': self.menu_item.id, 'is_available': True})
+
+        # Si el personal l'ha tret de la venda, reposar-lo no el torna a posar
+        self.client.put(self.url, {"stock": 0}, format="json")
+        self.client.patch(f"{self.base_url}/{self.menu_item.id}/toggle-availability/")
+        self.client.patch(f"{self.base_url}/{self.menu_item.id}/toggle-availability/")
+        response = self.client.put(self.url, {"stock": 10}, format="json")
+        self.assertEqual(response.data, {"id": self.menu_item.id, "stock": 10, "is_available": False})
+
+        response = self.client.put(self.url, {"stock": None}, format="json")
+        self.assertIsNone(response.data["stock"])
+        self.assertEqual(self.client.put(self.url, {}, format="json").status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.credentials()
+        self.assertEqual(self.client.put(self.url, {"stock": 1}, format="json").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_toggle_is_a_single_update(self):
+
+        url = f"{self.base_url}/{self.menu_item.id}/toggle-availability/"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url)
+        self.assertFalse(response.data["is_available"])
+        # L'altre UPDATE és el de la seqüència del registre de sincronització
+        updates = [query['sql'] for query in queries
+                   if query['sql'].startswith(f'UPDATE "{MenuItemOverride._meta.db_table}"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"price"', updates[0])
+
+        self.assertTrue(self.client.patch(url).data["is_available"])
+        self.assertEqual(self.public_ids(), [self.menu_item.id])
+
+    def test_owner_reads_show_the_location_values(self):
+
+        MenuItemOverride.objects.filter(pk=self.override.pk).update(price="7.50")
+        item_url = f"{self.base_url}/{self.menu_item.id}/"
+        self.client.get(f"{self.base_url}/")  # la llista i el detall ja són a la cache
+        self.client.get(item_url)
+
+        response = self.client.patch(f"{item_url}toggle-availability/")
+        self.assertEqual(response.data["is_available"], False)
+        for row in (self.client.get(f"{self.base_url}/").data[0], self.client.get(item_url).data,
+                    self.client.get(f"/api/restaurants/{self.restaurant.id}/").data["menuItems"][0]):
+            self.assertEqual((row["price"], row["is_available"]), ("7.50", False))
+
+        # Les escriptures de l'ítem també responen amb els valors del local
+        response = self.client.patch(item_url, {"description": "Casolà"}, format="json")
+        self.assertEqual((response.data["price"], response.data["is_available"]), ("7.50", False))
+
+    def test_availability_is_per_location(self):
+
+        # El mateix ítem a un altre local de la cadena, que no es porta el compte de l'estoc
+        brand = Brand.objects.create(name="Cadena")
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(brand=brand)
+        other = Restaurant.objects.create(name="Other", brand=brand)
+        self.menu_item.categories.add(Category.objects.create(name="Postres", restaurant=other))
+        other_url = f"/api/restaurants/{other.id}/menuItems/public/"
+        self.assertEqual(len(self.client.get(other_url).data), 1)
+        at = timezone.now()
+
+        self.client.put(self.url, {"stock": 0}, format="json")
+        self.assertEqual(self.public_ids(), [])
+        self.assertEqual(len(self.client.get(other_url).data), 1)
+        self.assertEqual(self.client.get(f"/api/restaurants/{other.id}/menuItems/{self.menu_item.id}/stock/").data,
+                         {"id": self.menu_item.id, "stock": None, "is_available": True})
+
+        self.client.patch(f"{self.base_url}/{self.menu_item.id}/toggle-availability/")
+        self.assertEqual(self.public_ids(), [self.menu_item.id])
+        self.client.patch(f"{self.base_url}/bulk-availability/", {"ids": [self.menu_item.id], "is_available": False},
+                          format="json")
+        self.assertEqual(self.public_ids(), [])
+        self.assertEqual(len(self.client.get(other_url).data), 1)
+
+        self.menu_item.refresh_from_db()
+        self.assertTrue(self.menu_item.is_available)
+        self.assertFalse(MenuItemOverride.objects.filter(restaurant=other).exists())
+
+        # Restaurar el menú del local només toca el seu override
+        restore_menu(self.restaurant.id, at)
+        self.assertEqual(self.public_ids(), [self.menu_item.id])
+        self.menu_item.refresh_from_db()
+        self.assertTrue(self.menu_item.is_available)
+        self.client.put(self.url, {"stock": 0}, format="json")
+
+        # Tornar als valors de l'ítem no perd l'estoc del local
+        self.client.delete(f"{self.base_url}/{self.menu_item.id}/override/")
+        self.assertEqual(self.public_ids(), [self.menu_item.id])
+        self.assertEqual(self.client.get(self.url).data["stock"], 0)
@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from menu.media import serve_media
+from menu.models import Restaurant
+
+
+class MediaTests(TestCase):
+
+    def setUp(self):
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.factory = RequestFactory()
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.restaurant.logo.save("logo.png", ContentFile(b"0123456789"))
+        self.name = self.restaurant.logo.name
+
+    def get(self, name, **headers):
+
+        response = serve_media(self.factory.get(f"/media/{name}", **headers), name)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_names_carry_the_content_hash(self):
+
+        self.assertRegex(self.name, r'^restaurant_photos/logo\.[0-9a-f]{12}\.png$')
+        self.assertIn(self.name, self.restaurant.logo.url)
+        # El mateix contingut reaprofita el fitxer; un altre contingut té un altre nom
+        self.assertEqual(default_storage.save("restaurant_photos/logo.png", ContentFile(b"0123456789")), self.name)
+        self.assertNotEqual(default_storage.save("restaurant_photos/logo.png", ContentFile(b"other")), self.name)
+
+    def test_serve_with_caching_headers(self):
+
+        response, body = self.get(self.name)
+        self.assertEqual((response.status_code, body), (200, b"0123456789"))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response, body = self.get(self.name, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((response.status_code, body), (304, b""))
+
+        # Els fitxers sense hash al nom tenen una cache curta
+        old = default_storage.path("restaurant_photos/old.png")
+        shutil.copy(default_storage.path(self.name), old)
+        response, _body = self.get("restaurant_photos/old.png")
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+        for name in ("restaurant_photos/missing.png", "../secret.txt", "restaurant_photos"):
+            with self.assertRaises(Http404):
+                self.get(name)
+
+    def test_range_requests(self):
+
+        etag = self.get(self.name)[0]['ETag']
+        for header, status, body, content_range in (
+            ('bytes=2-5', 206, b"2345", 'bytes 2-5/10'),
+            ('bytes=7-', 206, b"789", 'bytes 7-9/10'),
+            ('bytes=-3', 206, b"789", 'bytes 7-9/10'),
+            ('bytes=8-20', 206, b"89", 'bytes 8-9/10'),
+            ('bytes=10-', 416, b"", 'bytes */10'),
+        ):
+            response, content = self.get(self.name, HTTP_RANGE=header, HTTP_IF_RANGE=etag)
+            self.assertEqual((response.status_code, content, response['Content-Range']), (status, body, content_range))
+
+        # Amb diversos intervals o un If-Range que ja no coincideix, el fitxer sencer
+        for headers in ({'HTTP_RANGE': 'bytes=0-1,4-5'}, {'HTTP_RANGE': 'bytes=2-5', 'HTTP_IF_RANGE': '"stale"'}):
+            response, content = self.get(self.name, **headers)
+            self.assertEqual((response.status_code, content), (200, b"0123456789"))
+
+    def test_sendfile_handoff(self):
+
+        with mock.patch('menu.media.SENDFILE', 'x-accel-redirect'):
+            response, body = self.get(self.name, HTTP_RANGE='bytes=2-5')
+        self.assertEqual((response.status_code, body), (200, b""))
+        self.assertEqual(response['X-Accel-Redirect'], f"/protected-media/{self.name}")
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+        with mock.patch('menu.media.SENDFILE', 'x-sendfile'):
+            response, _body = self.get(self.name)
+        self.assertEqual(response['X-Sendfile'], default_storage.path(self.name))
@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.models import MenuItem, Category, Restaurant, RestaurantUser, MenuItemCategory
+from menu.ordering import RANK_GAP, move, rank_between
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class RankTests(TestCase):
+
+    def test_rank_between(self):
+
+        self.assertEqual(rank_between(RANK_GAP, 2 * RANK_GAP), RANK_GAP + RANK_GAP // 2)
+        self.assertEqual(rank_between(None, RANK_GAP), 0)
+        self.assertEqual(rank_between(RANK_GAP, None), 2 * RANK_GAP)
+        self.assertIsNone(rank_between(5, 6))
+
+    def test_move_updates_one_row(self):
+
+        restaurant = Restaurant.objects.create(name="Test Restaurant")
+        first, second, third = [Category.objects.create(name=name, restaurant=restaurant) for name in "ABC"]
+        categories = Category.objects.filter(restaurant=restaurant)
+
+        with CaptureQueriesContext(connection) as queries:
+            move(categories, 'pk', third.pk, after_key=first.pk)
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(list(categories), [first, third, second])
+
+    def test_move_rebalances_when_there_is_no_gap(self):
+
+        restaurant = Restaurant.objects.create(name="Test Restaurant")
+        first, second, third = [Category.objects.create(name=name, restaurant=restaurant, rank=rank)
+                                for name, rank in zip("ABC", [1, 2, 3])]
+        categories = Category.objects.filter(restaurant=restaurant)
+
+        move(categories, 'pk', third.pk, after_key=first.pk)
+        self.assertEqual(list(categories), [first, third, second])
+
+
+class ReorderViewTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.pizzas = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.pasta = Category.objects.create(name="Pasta", restaurant=self.restaurant)
+
+        self.items = [MenuItem.objects.create(name=f"Pizza {i}", price=10) for i in range(3)]
+        for item in self.items:
+            item.categories.add(self.pizzas)
+        self.items[2].categories.add(self.pasta)
+
+        user = User.objects.create_user(username="test@example.com", email="test@example.com", password="securepassword123")
+        RestaurantUser.objects.create(user=user, restaurant=self.restaurant)
+        self.token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.base_url = f"/api/restaurants/{self.restaurant.id}"
+
+    def test_new_objects_go_last(self):
+
+        response = self.client.get(f"{self.base_url}/categories/public/")
+        self.assertEqual([category['name'] for category in response.data], ["Pizzes", "Pasta"])
+
+        response = self.client.get(f"{self.base_url}/menuItems/public/")
+        self.assertEqual([item['id'] for item in response.data], [item.id for item in self.items])
+
+    def test_reorder_categories(self):
+
+        response = self.client.post(f"{self.base_url}/categories/reorder/",
+                                    {"moves": [{"id": self.pasta.id, "after": None}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([category['name'] for category in response.data], ["Pasta", "Pizzes"])
+
+        # L'ítem que és a Pasta passa a sortir primer al menú públic
+        response = self.client.get(f"{self.base_url}/menuItems/public/")
+        self.assertEqual(response.data[0]['id'], self.items[2].id)
+        self.assertEqual(response.data[0]['category_names'], ["Pasta", "Pizzes"])
+
+    def test_reorder_items_in_category(self):
+
+        response = self.client.post(f"{self.base_url}/menuItems/reorder/", {
+            "category": self.pizzas.id,
+            "moves": [{"id": self.items[0].id, "after": self.items[2].id}, {"id": self.items[1].id}],
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["items"], [self.items[1].id, self.items[2].id, self.items[0].id])
+        self.assertTrue(MenuItemCategory.objects.filter(category=self.pasta, menu_item=self.items[2]).exists())
+
+    def test_reorder_with_unknown_item(self):
+
+        response = self.client.post(f"{self.base_url}/menuItems/reorder/", {
+            "category": self.pasta.id, "moves": [{"id": self.items[0].id, "after": None}],
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
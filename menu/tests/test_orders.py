@@ -0,0 +1,130 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.models import MenuItem, MenuItemOverride, Category, Restaurant, RestaurantUser, Order, OrderLine
+from menu.orders import ORDER_MAX_LINES
+from menu.serializers import OrderLineInputSerializer
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class OrderTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.restaurant)
+        category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.items = []
+        for number in range(5):
+            item = MenuItem.objects.create(name=f"Pizza {number}", price=10 + number)
+            item.categories.add(category)
+            self.items.append(item)
+
+        other = Restaurant.objects.create(name="Other Restaurant")
+        self.other_item = MenuItem.objects.create(name="Other", price=5)
+        self.other_item.categories.add(Category.objects.create(name="Other", restaurant=other))
+
+        self.url = f"/api/restaurants/{self.restaurant.id}/orders/"
+
+    def submit(self, lines, **data):
+
+        return self.client.post(self.url, {"table": "7", "lines": lines, **data}, format="json")
+
+    def test_submit(self):
+
+        MenuItemOverride.objects.create(restaurant=self.restaurant, menu_item=self.items[1], price="9.50")
+        response = self.submit([{"id": self.items[0].id, "quantity": 2, "price": "10.00"},
+                                {"id": self.items[1].id}])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["total"], "29.50")
+        self.assertEqual(response.data["status"], "pending")
+
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertEqual(order.table, "7")
+        self.assertEqual(list(order.lines.order_by('menu_item').values_list('name', 'unit_price', 'quantity')),
+                         [("Pizza 0", 10, 2), ("Pizza 1", 9.5, 1)])
+
+    def test_submit_queries_do_not_grow_with_lines(self):
+
+        # Amb shards, les escriptures consulten el directori de tenants sense la cache
+        queries = 6 if len(settings.DATABASES) == 1 else 7
+        self.submit([{"id": self.items[0].id}])
+        with self.assertNumQueries(queries):
+            self.submit([{"id": self.items[0].id}])
+        with self.assertNumQueries(queries):
+            self.assertEqual(self.submit([{"id": item.id} for item in self.items]).status_code, status.HTTP_201_CREATED)
+
+    def test_rejected_lines(self):
+
+        self.items[2].is_available = False
+        self.items[2].save()
+        response = self.submit([{"id": self.items[0].id, "price": "9.00"}, {"id": self.items[2].id},
+                                {"id": self.other_item.id}])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["unavailable"], sorted([self.items[2].id, self.other_item.id]))
+        self.assertEqual(response.data["prices"], {str(self.items[0].id): "10.00"})
+        self.assertFalse(Order.objects.exists())
+
+    def test_largest_total_fits(self):
+
+        # Totes les línies amb la quantitat màxima de l'ítem més car possible (999.99)
+        price_field = MenuItem._meta.get_field('price')
+        price = Decimal(10) ** (price_field.max_digits - price_field.decimal_places) - Decimal('0.01')
+        quantity = OrderLineInputSerializer().fields['quantity'].max_value
+        Order._meta.get_field('total').run_validators(ORDER_MAX_LINES * quantity * price)
+
+    def test_invalid_lines(self):
+
+        self.assertEqual(self.submit([]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.submit([{"id": self.items[0].id, "quantity": 0}]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.submit([{"id": self.items[0].id}, {"id": self.items[0].id}]).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_stock_is_consumed_atomically(self):
+
+        MenuItemOverride.objects.create(restaurant=self.restaurant, menu_item=self.items[0], stock=5)
+        MenuItemOverride.objects.create(restaurant=self.restaurant, menu_item=self.items[1], stock=1)
+        stock = MenuItemOverride.objects.filter(restaurant=self.restaurant)
+
+        response = self.submit([{"id": self.items[0].id, "quantity": 2}, {"id": self.items[1].id, "quantity": 2}])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["unavailable"], [self.items[1].id])
+        self.assertEqual(stock.get(menu_item=self.items[0]).stock, 5)
+
+        response = self.submit([{"id": self.items[0].id, "quantity": 2}, {"id": self.items[1].id}])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(stock.get(menu_item=self.items[0]).stock, 3)
+        self.assertFalse(stock.get(menu_item=self.items[1]).is_available)
+
+    def test_queue(self):
+
+        ids = [self.submit([{"id": item.id}]).data["id"] for item in self.items]
+        Order.objects.create(restaurant=Restaurant.objects.exclude(pk=self.restaurant.pk).get(), total=5)
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        response = self.client.patch(f"{self.url}{ids[0]}/", {"status": "served", "total": "0"}, format="json")
+        self.assertEqual(response.data["status"], "served")
+        self.assertEqual(response.data["total"], "10.00")
+
+        response = self.client.get(self.url)
+        self.assertEqual([order["id"] for order in response.data["results"]], ids[1:])
+        self.assertEqual(response.data["results"][0]["lines"][0]["name"], "Pizza 1")
+        self.assertEqual(response.data["after"], ids[-1])
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"after": ids[2]})
+        self.assertEqual([order["id"] for order in response.data["results"]], ids[3:])
+        self.assertEqual(self.client.get(self.url, {"after": ids[-1]}).data, {"results": [], "after": ids[-1]})
+
+        response = self.client.get(self.url, {"status": "served"})
+        self.assertEqual([order["id"] for order in response.data["results"]], ids[:1])
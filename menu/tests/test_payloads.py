@@ -0,0 +1,122 @@
+import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.viewsets import ModelViewSet
+from menu.models import MenuItem, Category, Restaurant, RestaurantUser, CategoryTranslation, MenuItemTranslation
+from menu.payloads import category_rows, menu_item_rows, public_restaurant_payload
+from menu.renderers import FastJSONRenderer
+from menu.serializers import CategorySerializer, MenuItemSerializer
+from menu.serializers import PublicCategorySerializer, PublicMenuItemSerializer, PublicRestaurantSerializer
+from menu.sharding import get_tenant_shard
+from menu.views import FastListMixin
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class FastPayloadTests(TestCase):
+    """
+    El camí ràpid ha de generar els mateixos bytes que els serializers amb el renderer de DRF.
+    """
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.restaurant = Restaurant.objects.create(name="Cal Pep", address="Plaça de les Olles, 8",
+                                                    logo="restaurant_photos/logo.png")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.restaurant)
+        other = Restaurant.objects.create(name="Other Restaurant")
+
+        self.pizzas = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.drinks = Category.objects.create(name="Begudes \u2028 fresques", restaurant=self.restaurant)
+        removed = Category.objects.create(name="Esborrada", restaurant=self.restaurant)
+        foreign = Category.objects.create(name="Altres", restaurant=other)
+        CategoryTranslation.objects.create(category=self.pizzas, language="en", name="Pizzas")
+        CategoryTranslation.objects.create(category=self.drinks, language="en", name="")
+
+        margherita = MenuItem.objects.create(name="Pizza Margherita", description="Tomàquet i mozzarella 🍕",
+                                             price=Decimal('10.5'))
+        margherita.categories.add(self.pizzas, self.drinks, removed, foreign)
+        MenuItemTranslation.objects.create(menu_item=margherita, language="en", name="Margherita pizza",
+                                           description="")
+        water = MenuItem.objects.create(name="Aigua \"fresca\"", price=Decimal('1'), is_available=False)
+        water.categories.add(self.drinks)
+        removed.soft_delete()
+
+    def assertSameBytes(self, fast, slow):
+        self.assertEqual(FastJSONRenderer().render(fast), JSONRenderer().render(slow))
+
+    def test_public_payloads(self):
+
+        for language in (None, "en"):
+            categories = Category.objects.filter(restaurant=self.restaurant).translated(language)
+            self.assertSameBytes(category_rows(categories), PublicCategorySerializer(categories, many=True).data)
+
+            menu_items = MenuItem.objects.for_restaurant(self.restaurant.id).in_menu_order(self.restaurant.id) \
+                .resolved(self.restaurant.id).translated(language)
+            rows = menu_item_rows(menu_items, language, resolved=True, restaurant_id=self.restaurant.id)
+            self.assertSameBytes(
+                rows, PublicMenuItemSerializer(menu_items.with_translated_categories(language, self.restaurant.id), many=True).data,
+            )
+            # Les categories d'altres locals no surten al menú públic
+            self.assertEqual(rows[0]['categories'], [self.pizzas.id, self.drinks.id])
+
+            request = RequestFactory().get('/')
+            context = {'request': request, 'language': language}
+            self.assertSameBytes(
+                public_restaurant_payload(self.restaurant, request, language),
+                PublicRestaurantSerializer(self.restaurant, context=context).data,
+            )
+
+    def test_list_endpoints(self):
+
+        response = self.client.get(f"/api/restaurants/{self.restaurant.id}/menuItems/")
+        menu_items = MenuItem.objects.for_restaurant(self.restaurant.id).in_menu_order(self.restaurant.id) \
+            .resolved(self.restaurant.id)
+        self.assertEqual(response.content, JSONRenderer().render(MenuItemSerializer(menu_items, many=True).data))
+        self.assertEqual(response.data[0]['price'], "10.50")
+
+        response = self.client.get(f"/api/restaurants/{self.restaurant.id}/categories/")
+        categories = Category.objects.filter(restaurant=self.restaurant)
+        self.assertEqual(response.content, JSONRenderer().render(CategorySerializer(categories, many=True).data))
+
+    def test_fast_list_needs_rows(self):
+
+        with self.assertRaises(TypeError):
+            type("NoRowsViewSet", (FastListMixin, ModelViewSet), {})
+
+    def test_list_queries(self):
+
+        for i in range(5):
+            item = MenuItem.objects.create(name=f"Item {i}", price=5)
+            item.categories.add(self.pizzas)
+
+        # Autenticació, ítems i categories, independentment del nombre d'ítems
+        get_tenant_shard(self.restaurant.id)  # el directori de tenants, si n'hi ha, ja és a la cache
+        with self.assertNumQueries(3):
+            self.client.get(f"/api/restaurants/{self.restaurant.id}/menuItems/")
+
+    def test_renderer_fallbacks(self):
+
+        data = {
+            'price': Decimal('2.50'),
+            'at': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 5, 1),
+            'label': gettext_lazy("Menu"),
+            1: [None, True],
+        }
+        self.assertSameBytes(data, data)
+        # orjson no codifica enters de més de 64 bits
+        self.assertSameBytes({"big": 2 ** 70}, {"big": 2 ** 70})
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import resolve
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.models import MenuItem, Category, Restaurant
+from menu.pipeline import PUBLIC_PATH
+from menu.urls import router
+
+ENDPOINTS = ('public', 'menu/changes', 'categories/public', 'menuItems/public', 'menuItems/public/facets')
+
+
+class PublicPipelineTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        MenuItem.objects.create(name="Margherita", price=10).categories.add(category)
+        self.urls = [f"/api/restaurants/{self.restaurant.id}/{endpoint}/" for endpoint in ENDPOINTS]
+
+    def test_public_routes(self):
+
+        # Les rutes de PUBLIC_PATH són exactament les de les accions amb `public=True`
+        public_actions = {
+            pattern.callback.actions['get'] for pattern in router.urls
+            if pattern.callback.initkwargs.get('public')
+        }
+        self.assertEqual(len(public_actions), len(ENDPOINTS))
+        for url in self.urls:
+            self.assertTrue(PUBLIC_PATH.match(url), url)
+            self.assertIn(resolve(url).func.actions['get'], public_actions)
+
+    def test_public_requests_skip_sessions_and_authentication(self):
+
+        # Ni sessió, ni token (encara que sigui invàlid), ni API navegable
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        with mock.patch.object(SessionMiddleware, 'process_request', autospec=True,
+                               side_effect=SessionMiddleware.process_request) as process_request:
+            for url in self.urls:
+                response = self.client.get(url, HTTP_ACCEPT='text/html')
+                self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+            process_request.assert_not_called()
+
+            response = self.client.get(f"/api/restaurants/{self.restaurant.id}/categories/")
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            process_request.assert_called()
+
+    @override_settings(MENU_LEAN_PUBLIC=False)
+    def test_lean_path_can_be_disabled(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        response = self.client.get(self.urls[0])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,140 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.cache import get_version
+from django.utils import timezone
+from menu.history import restore_menu
+from menu.models import MenuItem, MenuItemOverride, Category, Restaurant, RestaurantUser, MenuChange, MenuDelta
+from menu.models import Brand
+from menu.sharding import get_tenant_shard
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class BulkPriceTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.restaurant)
+        self.pizzas = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.drinks = Category.objects.create(name="Begudes", restaurant=self.restaurant)
+        self.margherita = MenuItem.objects.create(name="Margherita", price=Decimal("10.10"))
+        self.margherita.categories.add(self.pizzas)
+        self.calzone = MenuItem.objects.create(name="Calzone", price=Decimal("12.00"))
+        self.calzone.categories.add(self.pizzas)
+        self.water = MenuItem.objects.create(name="Aigua", price=Decimal("1.50"))
+        self.water.categories.add(self.drinks)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = f"/api/restaurants/{self.restaurant.id}/menuItems/bulk-price/"
+
+    def prices(self):
+
+        return dict(MenuItem.objects.values_list('name', 'price'))
+
+    def test_percent_increase(self):
+
+        version = get_version(self.restaurant.id)
+        deltas = MenuDelta.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {"categories": [self.pizzas.id], "percent": 5}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(self.prices(), {"Margherita": Decimal("10.61"), "Calzone": Decimal("12.60"), "Aigua": Decimal("1.50")})
+        self.assertNotEqual(get_version(self.restaurant.id), version)
+
+        self.assertEqual(
+            {change.object_id: change.diff for change in MenuChange.objects.filter(action='update')},
+            {self.margherita.id: {'price': ['10.10', '10.61']}, self.calzone.id: {'price': ['12.00', '12.60']}},
+        )
+        self.assertEqual(set(MenuDelta.objects.order_by('id')[deltas:].values_list('object_id', flat=True)),
+                         {self.margherita.id, self.calzone.id})
+        public = self.client.get(f"/api/restaurants/{self.restaurant.id}/menuItems/public/").data
+        self.assertEqual({row['id']: row['price'] for row in public}[self.calzone.id], "12.60")
+
+    def test_shared_items_change_the_location_price(self):
+
+        # La Calzone també és a un altre local de la cadena; la Margherita ja té un preu propi aquí
+        brand = Brand.objects.create(name="Chain")
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(brand=brand)
+        other = Restaurant.objects.create(name="Other", brand=brand)
+        self.calzone.categories.add(Category.objects.create(name="Pizzes", restaurant=other))
+        MenuItemOverride.objects.create(restaurant=self.restaurant, menu_item=self.margherita, price=Decimal("9.00"))
+        at = timezone.now()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {"categories": [self.pizzas.id, self.drinks.id], "percent": 10}, format="json")
+        self.assertEqual(response.data["updated"], 3)
+        self.assertEqual(self.prices(), {"Margherita": Decimal("10.10"), "Calzone": Decimal("12.00"), "Aigua": Decimal("1.65")})
+        self.assertEqual(dict(MenuItemOverride.objects.values_list('menu_item__name', 'price')),
+                         {"Margherita": Decimal("9.90"), "Calzone": Decimal("13.20")})
+
+        public = self.client.get(f"/api/restaurants/{self.restaurant.id}/menuItems/public/").data
+        self.assertEqual({row['name']: row['price'] for row in public}, {"Margherita": "9.90", "Calzone": "13.20", "Aigua": "1.65"})
+        public = self.client.get(f"/api/restaurants/{other.id}/menuItems/public/").data
+        self.assertEqual([row['price'] for row in public], ["12.00"])
+
+        # L'historial és només del local per als preus propis, i restaurar-lo els torna enrere
+        self.assertCountEqual(
+            MenuChange.objects.filter(action='update').values_list('restaurant_id', 'model', 'object_id', 'diff'),
+            [
+                (self.restaurant.id, 'menu_item', self.water.id, {'price': ['1.50', '1.65']}),
+                (self.restaurant.id, 'menu_item_override', self.margherita.id, {'price': ['9.00', '9.90']}),
+                (self.restaurant.id, 'menu_item_override', self.calzone.id, {'price': [None, '13.20']}),
+            ],
+        )
+        restore_menu(self.restaurant.id, at)
+        self.assertEqual(self.prices()["Aigua"], Decimal("1.50"))
+        self.assertEqual(dict(MenuItemOverride.objects.values_list('menu_item__name', 'price')),
+                         {"Margherita": Decimal("9.00"), "Calzone": None})
+
+    def test_queries_do_not_grow_with_items(self):
+
+        def count():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(self.url, {"categories": [self.pizzas.id], "amount": "0.50"}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        get_tenant_shard(self.restaurant.id)  # el directori de tenants, si n'hi ha, ja és a la cache
+        few = count()
+        for number in range(20):
+            MenuItem.objects.create(name=f"Pizza {number}", price=8).categories.add(self.pizzas)
+        self.assertEqual(count(), few)
+        self.assertEqual(MenuItem.objects.get(name="Pizza 0").price, Decimal("8.50"))
+
+    def test_out_of_range_prices_change_nothing(self):
+
+        for data, ids in (
+            ({"categories": [self.pizzas.id], "amount": "-10.10"}, [self.margherita.id]),
+            ({"categories": [self.pizzas.id, self.drinks.id], "amount": "990"}, [self.margherita.id, self.calzone.id]),
+        ):
+            response = self.client.patch(self.url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data["ids"], sorted(ids))
+        self.assertEqual(self.prices()["Margherita"], Decimal("10.10"))
+        self.assertFalse(MenuChange.objects.filter(action='update').exists())
+
+        response = self.client.patch(self.url, {"categories": [self.pizzas.id], "percent": 5, "amount": 1}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_restaurant_categories_are_ignored(self):
+
+        other = Category.objects.create(name="Pizzes", restaurant=Restaurant.objects.create(name="Other"))
+        MenuItem.objects.create(name="Other pizza", price=10).categories.add(other)
+        response = self.client.patch(self.url, {"categories": [other.id], "amount": 1}, format="json")
+        self.assertEqual(response.data["updated"], 0)
+        self.assertEqual(self.prices()["Other pizza"], Decimal("10.00"))
+
+        self.client.credentials()
+        response = self.client.patch(self.url, {"categories": [self.pizzas.id], "amount": 1}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
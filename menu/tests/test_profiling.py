@@ -0,0 +1,77 @@
+import io
+import marshal
+import zipfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from menu.models import MenuItem, Category, Restaurant, RequestProfile
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class RequestProfilingTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.staff = User.objects.create_user(username="staff", password="testpass", is_staff=True)
+        self.staff_token = Token.objects.create(user=self.staff)
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        for number in range(3):
+            MenuItem.objects.create(name=f"Pizza {number}", price=10).categories.add(category)
+        self.url = f"/api/restaurants/{self.restaurant.id}/menuItems/"
+
+    def test_staff_request_is_profiled(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.staff_token.key)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((profile.user, profile.method, profile.path, profile.status_code),
+                         (self.staff, 'GET', self.url, 200))
+        self.assertGreater(profile.sql_count, 0)
+        self.assertIn('menu_menuitem', profile.report)
+        self.assertIn('serializers:', profile.report)
+        self.assertIsInstance(marshal.loads(bytes(profile.stats)), dict)
+
+        response = self.client.get(self.url + "?_profile=1")
+        self.assertTrue(RequestProfile.objects.filter(pk=response['X-Profile-Id']).exists())
+
+    def test_other_requests_are_not_profiled(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+
+        # Staff, però amb el perfil desactivat explícitament
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.staff_token.key)
+        for headers, query in (({'HTTP_X_PROFILE': '0'}, ''), ({}, '?_profile=0'), ({}, '?_profile=false')):
+            self.assertNotIn('X-Profile-Id', self.client.get(self.url + query, **headers))
+
+        # Sense la capçalera ni el paràmetre no es mira ni l'usuari
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.staff_token.key)
+        with mock.patch('menu.profiling.staff_user') as staff_user:
+            response = self.client.get(self.url + "?page=1")
+        staff_user.assert_not_called()
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_admin_download(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.staff_token.key)
+        profile_id = self.client.get(self.url, HTTP_X_PROFILE='1')['X-Profile-Id']
+
+        admin = User.objects.create_superuser(username="admin", password="testpass")
+        self.client.force_login(admin)
+        response = self.client.post('/admin/menu/requestprofile/', {
+            'action': 'download', '_selected_action': [profile_id],
+        })
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), [f'profile-{profile_id}.prof', f'profile-{profile_id}.txt'])
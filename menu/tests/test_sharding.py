@@ -0,0 +1,135 @@
+import io
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu import tenants
+from menu.models import Brand, MenuItem, MenuItemTranslation, Category, Restaurant, RestaurantUser
+from menu.models import Order, OrderLine, TenantShard
+from menu.sharding import SHARD_ID_BLOCK, check_shared_cache, get_tenant_shard, use_shard
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+# Amb una segona base de dades, p. ex. DATABASE_SHARDS=shard_1=sqlite:///shard_1.sqlite3
+SHARD = next((alias for alias in settings.DATABASES if alias != 'default'), None)
+
+
+@unittest.skipIf(SHARD, "Only with a single database.")
+class SingleDatabaseTests(TestCase):
+
+    def test_lookup_does_not_query(self):
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_tenant_shard(1), ('default', False))
+            self.assertEqual(get_tenant_shard(1, cached=False), ('default', False))
+        self.assertEqual(check_shared_cache(None), [])
+
+
+@unittest.skipUnless(SHARD, "Needs a second database in DATABASE_SHARDS.")
+class ShardingTests(TestCase):
+    databases = {'default', SHARD} if SHARD else {'default'}
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+
+        brand = Brand.objects.create(name="Chain")
+        self.restaurant = Restaurant.objects.create(name="Moving", brand=brand)
+        self.sibling = Restaurant.objects.create(name="Sibling", brand=brand)
+        self.staying = Restaurant.objects.create(name="Staying")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.restaurant)
+
+        category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.item = MenuItem.objects.create(name="Margherita", price=10)
+        self.item.categories.add(category, Category.objects.create(name="Pizzes", restaurant=self.sibling))
+        MenuItemTranslation.objects.create(menu_item=self.item, language="en", name="Margherita")
+        order = Order.objects.create(restaurant=self.restaurant, total=10)
+        OrderLine.objects.create(order=order, menu_item=self.item, name="Margherita", unit_price=10, quantity=1)
+        Category.objects.create(name="Begudes", restaurant=self.staying)
+
+    def move(self):
+
+        out = io.StringIO()
+        call_command('move_restaurant_shard', self.restaurant.id, SHARD, '--grace', '0', stdout=out)
+        return out.getvalue()
+
+    def test_move_restaurant(self):
+
+        output = self.move()
+        self.assertIn(f"Restaurants {self.restaurant.id}, {self.sibling.id} moved to {SHARD}", output)
+        self.assertEqual(get_tenant_shard(self.restaurant.id), (SHARD, False))
+        self.assertEqual(get_tenant_shard(self.staying.id), ('default', False))
+
+        self.assertEqual(set(Restaurant.all_objects.values_list('name', flat=True)), {"Staying"})
+        self.assertFalse(MenuItem.all_objects.exists())
+        self.assertFalse(Brand.objects.exists())
+        with use_shard(SHARD):
+            self.assertEqual(set(Restaurant.all_objects.values_list('name', flat=True)), {"Moving", "Sibling"})
+            self.assertEqual(Category.objects.count(), 2)
+            self.assertEqual(MenuItemTranslation.objects.get().menu_item_id, self.item.id)
+            self.assertEqual(OrderLine.objects.get().order.restaurant_id, self.restaurant.id)
+
+        # Les peticions del restaurant van a la seva base de dades; els comptes continuen a default
+        response = self.client.get(f"/api/restaurants/{self.restaurant.id}/menuItems/public/")
+        self.assertEqual([row["id"] for row in response.data], [self.item.id])
+        response = self.client.post("/token-auth/", {"username": "testuser", "password": "testpass"})
+        self.assertEqual(response.data["restaurant_name"], "Moving")
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(f"/api/restaurants/{self.restaurant.id}/users/me/")
+        self.assertEqual(response.data["restaurant_name"], "Moving")
+        response = self.client.post(f"/api/restaurants/{self.restaurant.id}/categories/", {"name": "Postres"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(response.data["id"], SHARD_ID_BLOCK)
+
+    def test_writes_are_blocked_while_moving(self):
+
+        TenantShard.objects.create(restaurant_id=self.restaurant.id, alias='default', read_only=True)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        url = f"/api/restaurants/{self.restaurant.id}/categories/"
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.post(url, {"name": "Postres"})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_writes_do_not_trust_the_cached_directory(self):
+
+        # Un altre worker ha començat el trasllat: la cache d'aquest procés encara diu `default`
+        self.assertEqual(get_tenant_shard(self.restaurant.id), ('default', False))
+        TenantShard.objects.create(restaurant_id=self.restaurant.id, alias='default', read_only=True)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        url = f"/api/restaurants/{self.restaurant.id}/categories/"
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url, {"name": "Postres"}).status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(get_tenant_shard(self.restaurant.id), ('default', True))
+
+    def test_shared_cache_check(self):
+
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['menu.W001'])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_failed_copy_is_undone(self):
+
+        copy = tenants.copy_in_chunks
+
+        def copy_until_items(queryset, target, chunk_size):
+            if queryset.model is MenuItem:
+                raise RuntimeError("Copy failed.")
+            return copy(queryset, target, chunk_size)
+
+        with mock.patch('menu.tenants.copy_in_chunks', side_effect=copy_until_items):
+            with self.assertRaises(RuntimeError):
+                self.move()
+        self.assertEqual(get_tenant_shard(self.restaurant.id), ('default', False))
+        self.assertEqual(Category.objects.filter(restaurant=self.restaurant).count(), 1)
+        with use_shard(SHARD):
+            self.assertFalse(Restaurant.all_objects.exists())
+            self.assertFalse(Category.objects.exists())
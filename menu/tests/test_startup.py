@@ -0,0 +1,49 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+
+class StartupTests(SimpleTestCase):
+
+    def test_api_request_does_not_load_admin(self):
+        script = (
+            "import django, json, sys; django.setup(); "
+            "from django.urls import resolve; resolve('/api/restaurants/1/menuItems/public/'); "
+            "print(json.dumps([name for name in ('menu.admin', 'menu.tenants', 'PIL') if name in sys.modules]))"
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env,
+                                cwd=settings.BASE_DIR, check=True)
+        self.assertEqual(json.loads(result.stdout), [])
+
+    def test_startup_profile(self):
+        # La sortida del procés fill és fixa: només es comprova l'informe, sense arrencar cap intèrpret
+        stages = [
+            {'name': name, 'seconds': seconds, 'rss': mb * 2 ** 20, 'modules': 10}
+            for name, seconds, mb in (('python', 0, 10), ('settings', 0.01, 12), ('apps', 0.1, 30),
+                                      ('wsgi', 0.02, 31), ('first request', 0.05, 35))
+        ]
+        child = subprocess.CompletedProcess([], 0, stdout=json.dumps({'stages': stages, 'status': '200 OK', 'memory': {}}),
+                                            stderr="import time:      2500 |       4000 | django.db\n"
+                                                   "import time:       800 |        800 |   rest_framework.fields\n")
+        out = io.StringIO()
+        with mock.patch('subprocess.run', return_value=child) as run:
+            call_command('startup_profile', '--path', '/', '--top', '3', stdout=out)
+        self.assertIn('importtime', run.call_args.args[0])
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0].split(), ['stage', 'time', 'RSS', '+RSS', 'modules'])
+        self.assertEqual(lines[3].split(), ['apps', '100.0ms', '30.0MB', '18.0MB', '10'])
+        self.assertIn("total: 180.0ms, 35.0MB (first request: HTTP 200 OK)", lines)
+        self.assertEqual([line.split()[0] for line in lines[lines.index("Import time per package (self):") + 1:]],
+                         ['django', 'rest_framework'])
+
+        with mock.patch('subprocess.run', return_value=child), self.assertRaises(CommandError):
+            call_command('startup_profile', '--budget-ms', '100', stdout=io.StringIO())
@@ -0,0 +1,160 @@
+import datetime
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.models import MenuItem, MenuItemOverride, Category, Restaurant, RestaurantUser, MenuDelta
+from menu.sync import compact
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class MenuSyncTests(TestCase):
+    # Hi ha consultes que passen per totes les bases de dades (menu.sharding)
+    databases = '__all__'
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.restaurant)
+        self.pizzas = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.pasta = Category.objects.create(name="Pasta", restaurant=self.restaurant)
+        self.margherita = MenuItem.objects.create(name="Margherita", price=10)
+        self.margherita.categories.add(self.pizzas)
+        self.carbonara = MenuItem.objects.create(name="Carbonara", price=12)
+        self.carbonara.categories.add(self.pasta)
+
+        self.url = f"/api/restaurants/{self.restaurant.id}/menu/changes/"
+
+    def changes(self, since):
+
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_resync_without_since(self):
+
+        data = self.client.get(self.url).data
+        self.assertTrue(data['resync'])
+        self.assertTrue(self.changes(0)['resync'])
+        self.assertTrue(self.changes(data['seq'] + 1)['resync'])
+
+        response = self.client.get(self.url, {"since": -1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_changes_since_seq(self):
+
+        seq = self.client.get(self.url).data['seq']
+        data = self.changes(seq)
+        self.assertFalse(data['resync'])
+        self.assertEqual(data['seq'], seq)
+        self.assertEqual(data['menuItems']['upserts'], [])
+        self.assertEqual(data['menuItems']['order'], [self.margherita.id, self.carbonara.id])
+
+        self.margherita.price = 11
+        self.margherita.save()
+        MenuItemOverride.objects.create(restaurant=self.restaurant, menu_item=self.carbonara, price="13.50")
+
+        data = self.changes(seq)
+        self.assertGreater(data['seq'], seq)
+        self.assertEqual({item['id']: item['price'] for item in data['menuItems']['upserts']},
+                         {self.margherita.id: "11.00", self.carbonara.id: "13.50"})
+        self.assertEqual(data['categories']['upserts'], [])
+        self.assertEqual(self.changes(data['seq'])['menuItems']['upserts'], [])
+
+    def test_removed_objects_are_tombstones(self):
+
+        seq = self.client.get(self.url).data['seq']
+        self.carbonara.categories.remove(self.pasta)
+        self.pizzas.soft_delete()
+
+        data = self.changes(seq)
+        self.assertEqual(data['categories']['deleted'], [self.pizzas.id])
+        self.assertEqual(data['categories']['order'], [self.pasta.id])
+        self.assertEqual(sorted(data['menuItems']['deleted']), sorted([self.margherita.id, self.carbonara.id]))
+        self.assertEqual(data['menuItems']['order'], [])
+
+    def test_category_rename_updates_its_items(self):
+
+        seq = self.client.get(self.url).data['seq']
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.client.patch(f"/api/restaurants/{self.restaurant.id}/categories/{self.pasta.id}/", {"name": "Pastes"})
+
+        data = self.changes(seq)
+        self.assertEqual([category['name'] for category in data['categories']['upserts']], ["Pastes"])
+        self.assertEqual([item['category_names'] for item in data['menuItems']['upserts']], [["Pastes"]])
+
+    def test_reorder_advances_seq(self):
+
+        seq = self.client.get(self.url).data['seq']
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.client.post(f"/api/restaurants/{self.restaurant.id}/categories/reorder/",
+                         {"moves": [{"id": self.pasta.id, "after": None}]}, format="json")
+
+        data = self.changes(seq)
+        self.assertGreater(data['seq'], seq)
+        self.assertEqual(data['categories']['order'], [self.pasta.id, self.pizzas.id])
+        self.assertEqual(data['menuItems']['order'], [self.carbonara.id, self.margherita.id])
+
+    def test_queries_do_not_grow_with_changes(self):
+
+        seq = self.client.get(self.url).data['seq']
+        self.margherita.price = 11
+        self.margherita.save()
+        self.changes(seq)
+        with self.assertNumQueries(4):
+            self.changes(seq)
+
+        for price in range(20, 30):
+            item = MenuItem.objects.create(name=f"Item {price}", price=price)
+            item.categories.add(self.pizzas)
+        self.changes(seq)
+        with self.assertNumQueries(4):
+            self.assertEqual(len(self.changes(seq)['menuItems']['upserts']), 11)
+
+    def test_sequence_is_per_restaurant(self):
+
+        seq = self.client.get(self.url).data['seq']
+        other = Restaurant.objects.create(name="Other")
+        Category.objects.create(name="Pizzes", restaurant=other)
+        self.assertEqual(self.client.get(self.url).data['seq'], seq)
+
+        # Un número per objecte, seguits, repartits amb la fila `FLOOR` del restaurant bloquejada
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/restaurants/{self.restaurant.id}/menuItems/bulk-availability/",
+                              {"categories": [self.pizzas.id, self.pasta.id], "is_available": False}, format="json")
+        self.assertEqual(self.client.get(self.url).data['seq'], seq + 2)
+        changes = MenuDelta.objects.filter(restaurant=self.restaurant, seq__gt=seq).exclude(kind=MenuDelta.FLOOR)
+        self.assertEqual(sorted(changes.values_list('seq', flat=True)), [seq + 1, seq + 2])
+        self.assertEqual(self.changes(seq)['menuItems']['deleted'], sorted([self.margherita.id, self.carbonara.id]))
+
+    def test_compaction(self):
+
+        seq = self.client.get(self.url).data['seq']
+        for price in (11, 12, 13):
+            self.margherita.price = price
+            self.margherita.save()
+        rows = MenuDelta.objects.filter(restaurant=self.restaurant, object_id=self.margherita.id, kind=MenuDelta.MENU_ITEM)
+        self.assertGreater(rows.count(), 1)
+
+        compact(timezone.now() - datetime.timedelta(days=1))
+        self.assertEqual(rows.count(), 1)
+        self.assertEqual([item['price'] for item in self.changes(seq)['menuItems']['upserts']], ["13.00"])
+
+        out = io.StringIO()
+        call_command('compact_menu_sync', days=0, stdout=out)
+        self.assertIn('canvis esborrats', out.getvalue())
+        self.assertTrue(self.changes(seq)['resync'])
+        self.assertFalse(MenuDelta.objects.exclude(kind=MenuDelta.FLOOR).exists())
+
+        # Des del `seq` de la resincronització es torna a rebre només el que canvia
+        seq = self.client.get(self.url).data['seq']
+        self.assertFalse(self.changes(seq)['resync'])
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu.models import MenuItem, Category, Restaurant, RestaurantUser
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class TenantCacheTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.restaurant = Restaurant.objects.create(name="Test Restaurant")
+        self.other_restaurant = Restaurant.objects.create(name="Other Restaurant")
+        self.category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        self.menu_item = MenuItem.objects.create(name="Pizza Margherita", price=10.50)
+        self.menu_item.categories.add(self.category)
+
+        user = User.objects.create_user(username="test@example.com", email="test@example.com", password="securepassword123")
+        self.user = RestaurantUser.objects.create(user=user, restaurant=self.restaurant)
+        self.token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.base_url = f"/api/restaurants/{self.restaurant.id}"
+
+    def test_repeated_get_is_served_from_cache(self):
+
+        self.client.get(f"{self.base_url}/menuItems/")
+        # Només la consulta del token
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{self.base_url}/menuItems/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['category_names'], ["Pizzes"])
+
+    def test_query_params_are_part_of_the_key(self):
+
+        self.client.get(f"{self.base_url}/")
+        with self.assertNumQueries(1):
+            self.client.get(f"{self.base_url}/")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"{self.base_url}/?format=json")
+        self.assertGreater(len(queries), 1)
+
+    def test_scheme_is_part_of_the_key(self):
+
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(logo="restaurant_photos/logo.png")
+        for url in (f"{self.base_url}/", f"{self.base_url}/public/"):
+            self.assertTrue(self.client.get(url).data['logo'].startswith("http://"))
+            self.assertTrue(self.client.get(url, secure=True).data['logo'].startswith("https://"))
+
+    def test_write_invalidates_only_its_restaurant(self):
+
+        self.client.get(f"{self.base_url}/categories/")
+        self.client.get(f"/api/restaurants/{self.other_restaurant.id}/categories/")
+
+        Category.objects.create(name="Pasta", restaurant=self.restaurant)
+
+        response = self.client.get(f"{self.base_url}/categories/")
+        self.assertEqual(len(response.data), 2)
+        with self.assertNumQueries(1):
+            self.client.get(f"/api/restaurants/{self.other_restaurant.id}/categories/")
+
+    def test_padded_ids_share_the_restaurant_keys(self):
+
+        padded = f"/api/restaurants/0{self.restaurant.id}"
+        for endpoint in ("categories/", "menuItems/public/", "categories/public/"):
+            self.client.get(f"{padded}/{endpoint}")
+
+        Category.objects.create(name="Pasta", restaurant=self.restaurant)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"{self.base_url}/menuItems/{self.menu_item.id}/", {"name": "Pizza"}, format="json")
+
+        self.assertEqual(len(self.client.get(f"{padded}/categories/").data), 2)
+        self.assertEqual(len(self.client.get(f"{padded}/categories/public/").data), 2)
+        self.assertEqual(self.client.get(f"{padded}/menuItems/public/").data[0]['name'], "Pizza")
+
+    def test_user_change_invalidates_users(self):
+
+        self.client.get(f"{self.base_url}/users/")
+        self.user.user.email = "new@example.com"
+        self.user.user.save()
+
+        response = self.client.get(f"{self.base_url}/users/")
+        self.assertEqual(response.data[0]['email'], "new@example.com")
+
+    def test_metrics_for_staff_only(self):
+
+        self.client.get(f"{self.base_url}/categories/")
+        self.client.get(f"{self.base_url}/categories/")
+
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.user.is_staff = True
+        self.user.user.save()
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tenant_cache.hit'], 1)
+        self.assertEqual(response.data['tenant_cache.miss'], 1)
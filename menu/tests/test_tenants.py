@@ -0,0 +1,164 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from menu.models import Brand, MenuItem, MenuItemOverride, Category, Restaurant, RestaurantUser
+from menu.models import CategoryTranslation, MenuItemTranslation, AvailabilityWindow, MenuChange, DailyMenuStat, MenuEvent
+from menu.models import MenuDelta, Order, OrderLine
+from menu.tenants import delete_orphan_items, delete_orphan_logos, export_restaurant, purge_restaurant
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class TenantPurgeTests(TestCase):
+    # Hi ha consultes que passen per totes les bases de dades (menu.sharding)
+    databases = '__all__'
+
+    def setUp(self):
+
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = self.settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        brand = Brand.objects.create(name="Chain")
+        self.restaurant = Restaurant.objects.create(
+            name="To Remove", brand=brand, logo=SimpleUploadedFile("logo.png", b"png", content_type="image/png")
+        )
+        self.other = Restaurant.objects.create(name="Other Location", brand=brand)
+
+        self.owner = User.objects.create_user(username="owner", password="testpass")
+        Token.objects.create(user=self.owner)
+        RestaurantUser.objects.create(user=self.owner, restaurant=self.restaurant)
+        self.staff = User.objects.create_user(username="staff", password="testpass", is_staff=True)
+        RestaurantUser.objects.create(user=self.staff, restaurant=self.restaurant)
+
+        category = Category.objects.create(name="Pizzes", restaurant=self.restaurant)
+        CategoryTranslation.objects.create(category=category, language="en", name="Pizzas")
+        self.other_category = Category.objects.create(name="Pizzes", restaurant=self.other)
+
+        self.exclusive = MenuItem.objects.create(name="Calzone", price=9)
+        self.exclusive.categories.add(category)
+        MenuItemTranslation.objects.create(menu_item=self.exclusive, language="en", name="Calzone")
+        AvailabilityWindow.objects.create(restaurant=self.restaurant, menu_item=self.exclusive, weekday=0,
+                                          start_time="12:00", end_time="16:00")
+
+        self.shared = MenuItem.objects.create(name="Margherita", price=10)
+        self.shared.categories.add(category, self.other_category)
+        MenuItemOverride.objects.create(restaurant=self.restaurant, menu_item=self.shared, price=11)
+
+        DailyMenuStat.objects.create(restaurant=self.restaurant, date="2026-01-01", kind=MenuEvent.MENU_VIEW, count=3)
+
+        order = Order.objects.create(restaurant=self.restaurant, total=9)
+        OrderLine.objects.create(order=order, menu_item=self.exclusive, name="Calzone", unit_price=9, quantity=1)
+
+    def test_export(self):
+
+        stream = io.StringIO()
+        rows = export_restaurant(self.restaurant.id, stream)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(lines), rows)
+        models = {line['model'] for line in lines}
+        self.assertTrue({'menu.restaurant', 'menu.category', 'menu.menuitem', 'menu.menuitemcategory',
+                         'menu.menuitemoverride', 'menu.menuchange', 'menu.dailymenustat', 'menu.order', 'menu.orderline'} <= models)
+        self.assertNotIn('auth.user', models)
+
+    def test_purge(self):
+
+        logo = self.restaurant.logo.path
+        self.assertTrue(os.path.exists(logo))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            timer = purge_restaurant(self.restaurant.id, delete_users=True, chunk_size=1)
+
+        self.assertFalse(Restaurant.all_objects.filter(pk=self.restaurant.id).exists())
+        self.assertFalse(Category.all_objects.filter(restaurant_id=self.restaurant.id).exists())
+        self.assertFalse(MenuChange.objects.filter(restaurant_id=self.restaurant.id).exists())
+        self.assertFalse(MenuItem.all_objects.filter(pk=self.exclusive.pk).exists())
+        self.assertFalse(MenuItemTranslation.objects.exists())
+        self.assertFalse(AvailabilityWindow.objects.exists())
+        self.assertFalse(MenuItemOverride.objects.exists())
+        self.assertFalse(MenuDelta.objects.filter(restaurant_id=self.restaurant.id).exists())
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderLine.objects.exists())
+
+        # L'ítem compartit es queda a l'altre local
+        self.assertEqual(list(self.shared.categories.all()), [self.other_category])
+
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+        self.assertFalse(Token.objects.exists())
+        self.assertIsNone(RestaurantUser.objects.get(user=self.staff).restaurant)
+        self.assertFalse(os.path.exists(logo))
+
+        self.assertIn('categories', [label for label, _rows, _seconds in timer.steps])
+
+    def test_users_are_kept_by_default(self):
+
+        # L'exportació no porta els comptes: sense `delete_users` es conserven
+        purge_restaurant(self.restaurant.id)
+        self.assertIsNone(RestaurantUser.objects.get(user=self.owner).restaurant)
+        self.assertTrue(Token.objects.filter(user=self.owner).exists())
+
+    def test_orphans(self):
+
+        orphan = MenuItem.objects.create(name="Orphan", price=5)
+        MenuItemTranslation.objects.create(menu_item=orphan, language="en", name="Orphan")
+        order = Order.objects.create(restaurant=self.other, total=5)
+        line = OrderLine.objects.create(order=order, menu_item=orphan, name="Orphan", unit_price=5, quantity=1)
+        unused_logo = SimpleUploadedFile("unused.png", b"png", content_type="image/png")
+        path = Restaurant._meta.get_field('logo').storage.save("restaurant_photos/unused.png", unused_logo)
+
+        self.assertEqual(delete_orphan_items(), 1)
+        self.assertFalse(MenuItem.all_objects.filter(pk=orphan.pk).exists())
+        self.assertTrue(MenuItem.objects.filter(pk=self.exclusive.pk).exists())
+        line.refresh_from_db()
+        self.assertIsNone(line.menu_item)
+
+        self.assertEqual(delete_orphan_logos(), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, path)))
+        self.assertTrue(os.path.exists(self.restaurant.logo.path))
+
+    def test_command(self):
+
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        out = io.StringIO()
+        call_command('purge_restaurant', self.restaurant.id, output_dir=output_dir, stdout=out)
+
+        self.assertFalse(Restaurant.all_objects.filter(pk=self.restaurant.id).exists())
+        self.assertEqual(len(os.listdir(output_dir)), 1)
+        self.assertIn('total:', out.getvalue())
+
+    def test_admin_action(self):
+
+        admin = User.objects.create_superuser(username="admin", password="testpass")
+        self.client.force_login(admin)
+        response = self.client.post('/admin/menu/restaurant/', {
+            'action': 'export_and_purge', '_selected_action': [self.restaurant.id],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['model'], 'menu.restaurant')
+        self.assertFalse(Restaurant.all_objects.filter(pk=self.restaurant.id).exists())
+
+    def test_purge_covers_all_relations(self):
+
+        # Els DELETE directes no segueixen les relacions: un model nou que apunti a aquests
+        # s'ha d'afegir a `purge_restaurant`/`delete_orphan_items` i a aquesta llista
+        handled = {
+            Restaurant: {'RestaurantUser', 'Category', 'MenuItemOverride', 'AvailabilityWindow', 'MenuChange',
+                         'DailyMenuStat', 'MenuDelta', 'Order'},
+            Category: {'MenuItem', 'MenuItemCategory', 'CategoryTranslation', 'AvailabilityWindow'},
+            MenuItem: {'MenuItemCategory', 'MenuItemOverride', 'MenuItemTranslation', 'AvailabilityWindow', 'OrderLine'},
+        Order: {'OrderLine'},
+        }
+        for model, names in handled.items():
+            self.assertEqual({rel.related_model.__name__ for rel in model._meta.related_objects}, names)
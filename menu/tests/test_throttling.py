@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from menu import metrics, throttling
+from menu.models import Restaurant, RestaurantUser
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = Token.objects.create(user=self.user)
+        self.viral = Restaurant.objects.create(name="Viral")
+        self.other = Restaurant.objects.create(name="Other")
+        RestaurantUser.objects.create(user=self.user, restaurant=self.viral)
+
+    def public(self, restaurant):
+        return self.client.get(f"/api/restaurants/{restaurant.id}/categories/public/")
+
+    def test_sliding_window(self):
+
+        self.assertEqual([throttling.hit('test', 3, 60, now=600) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(throttling.hit('test', 3, 60, now=610), 50)
+        # A mitja finestra següent encara compta la meitat de l'anterior (4 peticions)
+        self.assertEqual(throttling.hit('test', 3, 60, now=690), 0)
+        self.assertGreater(throttling.hit('test', 3, 60, now=691), 0)
+        self.assertEqual(throttling.hit('test', 3, 60, now=800), 0)
+
+    def test_restaurant_quota(self):
+
+        with mock.patch.dict(throttling.RESTAURANT_RATES, {str(self.viral.id): (2, 60)}):
+            self.assertEqual(self.public(self.viral).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.public(self.viral).status_code, status.HTTP_200_OK)
+            response = self.public(self.viral)
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertGreater(int(response['Retry-After']), 0)
+
+            # Els altres restaurants i el mateix restaurant autenticat no en queden afectats
+            self.assertEqual(self.public(self.other).status_code, status.HTTP_200_OK)
+            self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+            response = self.client.get(f"/api/restaurants/{self.viral.id}/categories/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(metrics.snapshot()['ratelimit.restaurant_public.throttled'], 1)
+
+    def test_client_quota(self):
+
+        with mock.patch.dict(throttling.RATES, {'anon': (1, 60), 'user': (2, 60)}):
+            self.assertEqual(self.public(self.viral).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.public(self.other).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+            url = f"/api/restaurants/{self.viral.id}/"
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -1,7 +1,9 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
-from menu.models import MenuItem, Category, Restaurant, RestaurantUser
+from menu.models import MenuItem, MenuItemCategory, Category, Restaurant, RestaurantUser
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 
@@ -227,6 +229,58 @@ class MenuItemViewSetTests(TestCase):
         self.assertEqual(response.data['name'], "Pizza Margherita")
         self.assertEqual(response.data['price'], "12.50")
 
+    def count_queries(self, method, url, data):
+
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertIn(response.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
+        return len(queries)
+
+    def link_writes(self, method, url, data):
+
+        # (INSERT, DELETE) a la taula dels enllaços ítem-categoria
+        table = MenuItemCategory._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertIn(response.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
+        sqls = [query['sql'] for query in queries]
+        return (sum(sql.startswith(f'INSERT INTO "{table}"') for sql in sqls),
+                sum(sql.startswith(f'DELETE FROM "{table}"') for sql in sqls))
+
+    def test_menu_item_categories_queries(self):
+
+        categories = [Category.objects.create(name=f"Categoria {number}", restaurant=self.restaurant).id for number in range(10)]
+        url = f"/api/restaurants/{self.restaurant.id}/menuItems/"
+        self.count_queries("post", url, self.menu_item_data)
+
+        # Les categories es resolen amb una sola consulta, i els enllaços s'afegeixen de cop
+        few = self.count_queries("post", url, {**self.menu_item_data, "categories": categories[:2]})
+        many = self.count_queries("post", url, {**self.menu_item_data, "categories": categories})
+        self.assertEqual(few, many)
+        self.assertEqual(self.link_writes("post", url, {**self.menu_item_data, "categories": categories}), (1, 0))
+
+        # Canviar dues categories o deu costa el mateix: un DELETE per les que sobren i un INSERT per les noves
+        item_url = f"{url}{self.menu_item.id}/"
+        few = self.count_queries("put", item_url, {**self.menu_item_data, "categories": categories[:2]})
+        many = self.count_queries("put", item_url, {**self.menu_item_data, "categories": categories[2:]})
+        self.assertEqual(few, many)
+        self.assertEqual(set(self.menu_item.categories.values_list('id', flat=True)), set(categories[2:]))
+        self.assertEqual(self.link_writes("put", item_url, {**self.menu_item_data, "categories": categories[:5]}), (1, 1))
+        self.assertEqual(self.link_writes("put", item_url, {**self.menu_item_data, "categories": categories}), (1, 0))
+        self.assertEqual(set(self.menu_item.categories.values_list('id', flat=True)), set(categories))
+        self.assertEqual(self.link_writes("put", item_url, {**self.menu_item_data, "categories": categories[:3]}), (0, 1))
+
+        # Sense canvis a les categories no s'escriu cap enllaç
+        self.assertEqual(self.link_writes("put", item_url, {**self.menu_item_data, "categories": categories[2::-1]}), (0, 0))
+
+    def test_menu_item_category_of_other_restaurant(self):
+
+        other = Category.objects.create(name="Pizzes", restaurant=Restaurant.objects.create(name="Other"))
+        response = self.client.post(f"/api/restaurants/{self.restaurant.id}/menuItems/",
+                                    {**self.menu_item_data, "categories": [other.id]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('categories', response.data)
+
     def test_check_menu_item_exists(self):
 
         response = self.client.get(f"/api/restaurants/{self.restaurant.id}/menuItems/check/?name=Pizza Margherita&categories={self.category.id}")
@@ -0,0 +1,123 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+RATE_LIMITS = {
+    # Tot el trànsit públic d'un restaurant (es pot canviar per restaurant amb MENU_RESTAURANT_RATE_LIMITS)
+    'restaurant_public': '3000/min',
+    # Peticions autenticades a un restaurant
+    'restaurant_api': '1200/min',
+    # Per client: adreça IP (els comensals d'un local poden compartir-ne una) o usuari
+    'anon': '600/min',
+    'user': '1200/min',
+    **getattr(settings, 'MENU_RATE_LIMITS', {}),
+}
+
+
+def parse_rate(rate):
+    """
+    `'600/min'` -> `(600, 60)`, com els ritmes dels throttles de DRF.
+    """
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+RATES = {scope: parse_rate(rate) for scope, rate in RATE_LIMITS.items()}
+# Límit públic de restaurants concrets, p. ex. `{42: '12000/min'}`
+RESTAURANT_RATES = {
+    str(restaurant_id): parse_rate(rate)
+    for restaurant_id, rate in getattr(settings, 'MENU_RESTAURANT_RATE_LIMITS', {}).items()
+}
+
+metrics.register(*(f'ratelimit.{scope}.throttled' for scope in RATES))
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def hit(key, limit, period, now=None):
+    """
+    Compta una petició a `key` i retorna 0 si no passa de `limit` per `period` segons, o els
+    segons que cal esperar. Fa servir una finestra lliscant aproximada amb dos comptadors
+    (l'actual i l'anterior, ponderat pel temps que encara hi cau), de manera que només calen
+    increments atòmics de la cache i cap consulta a la base de dades.
+    """
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    current = _incr(f'ratelimit:{key}:{int(window)}', period * 2)
+    previous = cache.get(f'ratelimit:{key}:{int(window) - 1}', 0)
+    estimate = previous * (period - elapsed) / period + current
+    if estimate <= limit:
+        return 0
+    if current > limit:
+        wait = period - elapsed
+    else:
+        # La finestra anterior pesa cada cop menys: quan hi hagi prou marge es tornarà a servir
+        wait = (estimate - limit) * period / previous
+    return max(1, math.ceil(wait))
+
+
+class QuotaThrottle(BaseThrottle):
+    """
+    Base dels límits de l'API: `get_quota()` retorna `(scope, clau, límit, període)` o None si
+    la petició no hi compta. Per defecte, el ritme de `scope` (a `RATE_LIMITS`) per adreça IP.
+    """
+    scope = 'anon'
+
+    def get_quota(self, request, view):
+        return (self.scope, self.get_ident(request), *RATES[self.scope])
+
+    def allow_request(self, request, view):
+        quota = self.get_quota(request, view)
+        if quota is None:
+            return True
+        scope, key, limit, period = quota
+        self.retry_after = hit(f'{scope}:{key}', limit, period)
+        if self.retry_after:
+            metrics.increment(f'ratelimit.{scope}.throttled')
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
+
+
+class RestaurantRateThrottle(QuotaThrottle):
+    """
+    Quota compartida per tot el trànsit d'un restaurant, perquè un sol local no ocupi els workers
+    de tots. El trànsit públic i l'autenticat tenen quotes separades: un codi QR viral no
+    impedeix que el restaurant editi el menú.
+    """
+
+    def get_quota(self, request, view):
+        restaurant_id = getattr(view, 'kwargs', {}).get(getattr(view, 'tenant_url_kwarg', 'restaurant_id'))
+        try:
+            # Com `TenantCacheMixin.get_tenant_id`: `/restaurants/01/` comparteix la quota de l'1
+            restaurant_id = int(restaurant_id)
+        except (TypeError, ValueError):
+            return None
+        if request.user and request.user.is_authenticated:
+            return ('restaurant_api', restaurant_id, *RATES['restaurant_api'])
+        rate = RESTAURANT_RATES.get(str(restaurant_id), RATES['restaurant_public'])
+        return ('restaurant_public', restaurant_id, *rate)
+
+
+class ClientRateThrottle(QuotaThrottle):
+    """
+    Quota per client: per usuari si està autenticat i, si no, per adreça IP.
+    """
+
+    def get_quota(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return ('user', request.user.pk, *RATES['user'])
+        return super().get_quota(request, view)
@@ -1,14 +1,20 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import RestaurantViewSet, RestaurantUserViewSet, CategoryViewSet, MenuItemViewSet, RegisterView
+from .views import AvailabilityWindowViewSet, OrderViewSet, MetricsView, menu_events
+from .pipeline import public_first
 
 router = DefaultRouter()
 router.register(r'restaurants', RestaurantViewSet)
 router.register(r'restaurants/(?P<restaurant_id>\d+)/categories', CategoryViewSet, basename='category')
 router.register(r'restaurants/(?P<restaurant_id>\d+)/menuItems', MenuItemViewSet, basename='menuitem')
 router.register(r'restaurants/(?P<restaurant_id>\d+)/users', RestaurantUserViewSet, basename='restaurant-users')
+router.register(r'restaurants/(?P<restaurant_id>\d+)/availabilityWindows', AvailabilityWindowViewSet, basename='availability-window')
+router.register(r'restaurants/(?P<restaurant_id>\d+)/orders', OrderViewSet, basename='order')
 
 urlpatterns = [
-    path('', include(router.urls)),
+    path('restaurants/<int:restaurant_id>/events/', menu_events, name='menu_events'),
+    path('', include(public_first(router.urls))),
     path('register/', RegisterView.as_view(), name='register_user'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
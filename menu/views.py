@@ -1,37 +1,217 @@
-from rest_framework import viewsets
-from .models import Restaurant, RestaurantUser, Category, MenuItem
+import datetime
+
+from rest_framework import mixins, viewsets
+from .models import Restaurant, RestaurantUser, Category, MenuItem, CategoryTranslation, MenuItemTranslation
+from .models import AvailabilityWindow, MenuChange, MenuItemCategory, MenuItemOverride, validate_timezone
+from .models import MenuEvent, DailyMenuStat, MenuDelta, Order
 from .serializers import RestaurantSerializer, RestaurantUserSerializer, CategorySerializer, MenuItemSerializer
+from .serializers import CategoryTranslationSerializer, MenuItemTranslationSerializer, AvailabilityWindowSerializer
+from .serializers import BulkAvailabilitySerializer, BulkPriceSerializer, MenuChangeSerializer, RestoreMenuSerializer
+from .serializers import HistoryQuerySerializer
+from .serializers import ReorderSerializer, MenuItemReorderSerializer, MenuItemOverrideSerializer
+from .serializers import StockSerializer, ConsumeSerializer
+from .serializers import NearbyQuerySerializer
+from .serializers import OrderSerializer, OrderSubmitSerializer, OrderQueueSerializer
+from .serializers import AnalyticsBatchSerializer, StatsQuerySerializer, PublicMenuFilterSerializer, SyncQuerySerializer
+from .analytics import EVENT_KINDS, EVENT_NAMES, get_buffer
+from .cache import get_or_build_public_menu, tenant_cache_key, get_tenant_response, set_tenant_response
+from .events import get_broadcaster, event_stream
+from .facets import filter_menu_rows
+from .geo import nearby_restaurants
+from .health import ensure_warm, run_checks
+from .history import restore_menu
+from .i18n import get_request_language, normalize_language
+from .inventory import OutOfStock, consume, set_availability, set_stock, toggle_availability
+from .orders import OrderRejected, order_queue, submit_order
+from .pipeline import PublicEndpointMixin
+from .pricing import InvalidPrices, adjust_prices
+from .ordering import move
+from .payloads import format_price, category_rows, menu_item_rows, public_restaurant_payload
+from .public import public_categories, public_menu_items, public_facets
+from .signals import menu_changed
+from .sharding import use_tenant
+from .sync import menu_delta, record_changes, record_category_changes
+from . import metrics
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework import status
+from rest_framework import serializers, status
+from rest_framework.exceptions import NotFound
 from django.contrib.auth.models import User
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET
+
+STATS_DEFAULT_DAYS = 30
 
 class CustomAuthToken(ObtainAuthToken):
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
         token = Token.objects.get(key=response.data['token'])
         restaurant_user = RestaurantUser.objects.get(user=token.user)
-        restaurant = restaurant_user.restaurant
+        with use_tenant(restaurant_user.restaurant_id):
+            restaurant = restaurant_user.restaurant
         return Response({
             'token': token.key,
             'user_id': token.user.pk,
-            'restaurant_id': restaurant_user.restaurant.id,
+            'restaurant_id': restaurant.id,
             'restaurant_name': restaurant.name,
             'email': token.user.email
         })
 
-class RestaurantViewSet(viewsets.ModelViewSet):
+def public_menu_response(data):
+    """
+    Resposta pública amb dades de la cache del menú, que té una entrada per idioma.
+    """
+    response = Response(data, status=status.HTTP_200_OK)
+    patch_vary_headers(response, ['Accept-Language'])
+    return response
+
+class TenantCacheMixin:
+    """
+    Guarda a la cache les respostes GET de `tenant_cache_actions` per restaurant, serializer
+    i paràmetres de la URL. Les escriptures del restaurant canvien la versió de `tenant_cache_scope`
+    i invaliden només les seves entrades.
+    """
+    tenant_cache_scope = 'menu'
+    tenant_cache_actions = ('list', 'retrieve')
+    # També el fan servir els límits per restaurant de `throttling.RestaurantRateThrottle`
+    tenant_url_kwarg = 'restaurant_id'
+
+    def get_tenant_id(self):
+        # Enter, perquè `/restaurants/01/` llegeixi i escrigui les mateixes claus (i versions) que `/restaurants/1/`
+        try:
+            return int(self.kwargs[self.tenant_url_kwarg])
+        except ValueError:
+            raise NotFound()
+
+    def list(self, request, *args, **kwargs):
+        return self.tenant_cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.tenant_cached(super().retrieve, request, *args, **kwargs)
+
+    def tenant_cached(self, view, request, *args, **kwargs):
+        if self.action not in self.tenant_cache_actions:
+            return view(request, *args, **kwargs)
+
+        key = tenant_cache_key(
+            self.get_tenant_id(), self.tenant_cache_scope, self.get_serializer_class().__name__,
+            # Amb l'esquema i el host: les respostes porten URL absolutes (p. ex. el logo)
+            self.action, self.kwargs.get('pk', ''), f'{request.scheme}://{request.get_host()}',
+            query_params=request.query_params
+        )
+        data = get_tenant_response(key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_tenant_response(key, response.data)
+        return response
+
+class FastListMixin:
+    """
+    `list()` construeix la resposta amb `list_rows(queryset)` a partir de `values_list()`, sense passar
+    pel serializer. Cada vista n'ha de definir `list_rows`; es comprova en definir la classe.
+    """
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, 'list_rows', None)):
+            raise TypeError(f"{cls.__name__} must define list_rows(queryset).")
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.list_rows(self.filter_queryset(self.get_queryset())), status=status.HTTP_200_OK)
+
+class SoftDeleteMixin:
+    """
+    Els DELETE fan un esborrat lògic i l'acció `restore/` el desfà. `restore/` busca entre les files
+    esborrades del model de `get_queryset()`; `soft_delete_scope` és el camí fins al restaurant de la
+    URL amb què `get_queryset()` les filtra (None si no en filtra cap).
+    """
+    soft_delete_scope = None
+
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+
+    def get_deleted_queryset(self):
+        deleted = self.get_queryset().model.all_objects.filter(deleted_at__isnull=False)
+        if self.soft_delete_scope is None:
+            return deleted
+        return deleted.filter(**{self.soft_delete_scope: self.kwargs['restaurant_id']}).distinct()
+
+    @action(detail=True, methods=['post'], url_path='restore', permission_classes=[IsAuthenticated])
+    def restore(self, request, pk=None, restaurant_id=None):
+        instance = get_object_or_404(self.get_deleted_queryset(), pk=pk)
+        instance.restore()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+def apply_moves(siblings, key_field, moves):
+    """
+    Aplica els moviments d'un `ReorderSerializer` dins d'una transacció. Cada moviment actualitza una fila.
+    """
+    with transaction.atomic(using=siblings.db):
+        for item in moves:
+            try:
+                updated = move(siblings, key_field, item['id'], item['after'])
+            except siblings.model.DoesNotExist:
+                updated = 0
+            if not updated:
+                raise serializers.ValidationError({"error": f"Invalid move for id {item['id']}."})
+
+class TranslationsMixin:
+    """
+    Afegeix l'acció `translations/` per consultar (GET), crear o actualitzar (PUT)
+    i esborrar (DELETE amb `?language=`) les traduccions d'un objecte.
+    """
+    translation_model = None
+    translation_serializer_class = None
+    translation_parent_field = None
+
+    @action(detail=True, methods=['get', 'put', 'delete'], url_path='translations')
+    def translations(self, request, pk=None, restaurant_id=None):
+        obj = self.get_object()
+        translations = self.translation_model.objects.filter(**{self.translation_parent_field: obj})
+
+        if request.method == 'PUT':
+            serializer = self.translation_serializer_class(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            data = dict(serializer.validated_data)
+            language = data.pop('language')
+            self.translation_model.objects.update_or_create(
+                **{self.translation_parent_field: obj}, language=language, defaults=data
+            )
+        elif request.method == 'DELETE':
+            language = request.query_params.get('language')
+            if not language:
+                return Response({"error": "Missing language parameter"}, status=status.HTTP_400_BAD_REQUEST)
+            # Com en desar-les: `CA` o `ca-ES` són `ca`
+            deleted, _rows = translations.filter(language=normalize_language(language)).delete()
+            if not deleted:
+                raise NotFound()
+
+        serializer = self.translation_serializer_class(translations.order_by('language'), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class RestaurantViewSet(PublicEndpointMixin, TenantCacheMixin, SoftDeleteMixin, viewsets.ModelViewSet):
     queryset = Restaurant.objects.all()
     serializer_class = RestaurantSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
+    tenant_cache_actions = ('retrieve',)
+    tenant_url_kwarg = 'pk'
 
     def update(self, request, *args, **kwargs):
         restaurant = self.get_object()
@@ -53,27 +233,162 @@ class RestaurantViewSet(viewsets.ModelViewSet):
         if 'hours' in data:
             restaurant.hours = data['hours']
 
+        if 'timezone' in data:
+            try:
+                validate_timezone(data['timezone'])
+            except ValidationError as e:
+                return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+            restaurant.timezone = data['timezone']
+
+        for field in ('latitude', 'longitude'):
+            if field in data:
+                value = data[field] if data[field] != '' else None
+                try:
+                    setattr(restaurant, field, Restaurant._meta.get_field(field).clean(value, restaurant))
+                except ValidationError as e:
+                    return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
         restaurant.save()
 
         serializer = self.get_serializer(restaurant)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
-    @action(detail=True, methods=['get'], permission_classes=[AllowAny], url_path='public')
-    def get_public_restaurant(self, request, pk=None):
+    @action(detail=False, methods=['get'], url_path='nearby', permission_classes=[AllowAny])
+    def nearby(self, request):
+        """
+        Restaurants a `?radius=` km (per defecte 5) de `?lat=&lng=`, del més proper al més llunyà,
+        amb la distància en km. Fins a `?limit=` resultats (per defecte 20).
+        """
+        query = NearbyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        return Response(
+            nearby_restaurants(params['lat'], params['lng'], params['radius'], params['limit'], request),
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=['get'], url_path='history', permission_classes=[IsAuthenticated])
+    def get_menu_history(self, request, pk=None):
+        """
+        Historial de canvis del menú, del més recent al més antic. Es pagina amb `?before=<id>` i
+        `?limit=` (per defecte i com a màxim 100).
+        """
         restaurant = self.get_object()
-        serializer = self.get_serializer(restaurant)
+        query = HistoryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        changes = MenuChange.objects.filter(restaurant=restaurant).order_by('-id')
+        if 'before' in params:
+            changes = changes.filter(id__lt=params['before'])
+        serializer = MenuChangeSerializer(changes[:params['limit']], many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='restore-menu', permission_classes=[IsAuthenticated])
+    def restore_menu_at(self, request, pk=None):
+        """
+        Restaura el menú (restaurant, categories i ítems) a l'estat que tenia a `at`.
+        """
+        restaurant = self.get_object()
+        serializer = RestoreMenuSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        restored = restore_menu(restaurant.id, serializer.validated_data['at'])
+        return Response({"restored": restored}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='analytics', permission_classes=[AllowAny], authentication_classes=[])
+    def track_events(self, request, pk=None):
+        """
+        Registra esdeveniments del menú públic: `{"events": [{"type": "item_view", "id": 7}, ...]}`
+        (`menu_view`, `item_view`, `category_open`). No toca la base de dades: s'acumulen i s'escriuen per lots.
+        """
+        try:
+            restaurant_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        serializer = AnalyticsBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        now = timezone.now()
+        events = [
+            MenuEvent(restaurant_id=restaurant_id, kind=EVENT_KINDS[event['type']],
+                      object_id=event.get('id', 0), created_at=now)
+            for event in serializer.validated_data['events']
+        ]
+        get_buffer().add(events)
+        return Response({"accepted": len(events)}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path='stats', permission_classes=[IsAuthenticated])
+    def get_stats(self, request, pk=None):
+        """
+        Estadístiques del menú entre `?start=` i `?end=` (per defecte, els últims 30 dies): totals,
+        evolució diària i visites per ítem i per categoria. Només llegeix els agregats diaris.
+        """
+        restaurant = self.get_object()
+        query = StatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        end = query.validated_data.get('end', timezone.now().date())
+        start = query.validated_data.get('start', end - datetime.timedelta(days=STATS_DEFAULT_DAYS - 1))
+
+        stats = DailyMenuStat.objects.filter(restaurant=restaurant, date__range=(start, end))
+        totals = dict.fromkeys(EVENT_KINDS, 0)
+        daily = {}
+        for row in stats.values('date', 'kind').annotate(total=Sum('count')).order_by('date'):
+            day = daily.setdefault(row['date'], {'date': row['date'], **dict.fromkeys(EVENT_KINDS, 0)})
+            day[EVENT_NAMES[row['kind']]] = row['total']
+            totals[EVENT_NAMES[row['kind']]] += row['total']
+
+        objects = {'item_view': [], 'category_open': []}
+        for row in stats.exclude(kind=MenuEvent.MENU_VIEW).values('kind', 'object_id') \
+                .annotate(total=Sum('count')).order_by('-total', 'object_id'):
+            objects[EVENT_NAMES[row['kind']]].append({'id': row['object_id'], 'count': row['total']})
+
+        return Response({
+            'start': start,
+            'end': end,
+            'totals': totals,
+            'daily': list(daily.values()),
+            'items': objects['item_view'],
+            'categories': objects['category_open'],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny], url_path='public', public=True)
+    def get_public_restaurant(self, request, pk=None):
+        restaurant = self.get_object()
+        language = get_request_language(request)
+        # Una entrada per origen, perquè el logo hi és amb una URL absoluta
+        return public_menu_response(get_or_build_public_menu(
+            restaurant.id, f'restaurant:{request.scheme}://{request.get_host()}', language,
+            lambda: (public_restaurant_payload(restaurant, request, language), None)
+        ))
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny], url_path='menu/changes', public=True)
+    def get_menu_changes(self, request, pk=None):
+        """
+        Canvis del menú públic des de `?since=<seq>` (el `seq` d'una resposta anterior): ítems i
+        categories nous o modificats, ids esborrats i l'ordre actual. Amb `resync` cal tornar a
+        descarregar el menú sencer (i continuar des del `seq` retornat).
+        """
+        restaurant = self.get_object()
+        query = SyncQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return public_menu_response(menu_delta(restaurant.id, query.validated_data.get('since'), get_request_language(request)))
     
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(PublicEndpointMixin, TenantCacheMixin, SoftDeleteMixin, TranslationsMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
+    translation_model = CategoryTranslation
+    translation_serializer_class = CategoryTranslationSerializer
+    translation_parent_field = 'category'
+    soft_delete_scope = 'restaurant_id'
 
     def get_queryset(self):
         restaurant_id = self.kwargs['restaurant_id']
         categories = Category.objects.filter(restaurant_id=restaurant_id)
         return categories
 
+    def list_rows(self, queryset):
+        return category_rows(queryset.translated())
+
     def perform_create(self, serializer):
         restaurant_id = self.kwargs['restaurant_id']
         category_name = serializer.validated_data.get('name')
@@ -84,6 +399,19 @@ class CategoryViewSet(viewsets.ModelViewSet):
         restaurant = Restaurant.objects.get(id=restaurant_id)       
         serializer.save(restaurant=restaurant)
     
+    @action(detail=False, methods=['post'], url_path='reorder')
+    def reorder(self, request, restaurant_id=None):
+        """
+        Reordena categories: `{"moves": [{"id": 3, "after": 1}, ...]}`.
+        """
+        serializer = ReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        moves = serializer.validated_data['moves']
+        apply_moves(Category.objects.filter(restaurant_id=restaurant_id), 'pk', moves)
+        record_category_changes(restaurant_id, [item['id'] for item in moves])
+        menu_changed({int(restaurant_id)})
+        return Response(CategorySerializer(self.get_queryset(), many=True).data, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'], url_path='check')
     def check_category_exists(self, request, restaurant_id=None):
         """
@@ -101,38 +429,150 @@ class CategoryViewSet(viewsets.ModelViewSet):
         
         return Response({"exists": False}, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=False, methods=['get'], url_path='public', permission_classes=[AllowAny])
+    @action(detail=False, methods=['get'], url_path='public', permission_classes=[AllowAny], public=True)
     def get_public_categories(self, request, restaurant_id=None):
         """
         Endpoint públic per obtenir categories d'un restaurant.
+        L'idioma es tria amb `?lang=` o `Accept-Language`.
         """
-        categories = Category.objects.filter(restaurant_id=restaurant_id)
-        serializer = self.get_serializer(categories, many=True)
-        return Response(serializer.data)
+        return public_menu_response(public_categories(self.get_tenant_id(), get_request_language(request)))
 
-class MenuItemViewSet(viewsets.ModelViewSet):
+class MenuItemViewSet(PublicEndpointMixin, TenantCacheMixin, SoftDeleteMixin, TranslationsMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = MenuItemSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
+    translation_model = MenuItemTranslation
+    translation_serializer_class = MenuItemTranslationSerializer
+    translation_parent_field = 'menu_item'
+    soft_delete_scope = 'categories__restaurant_id'
 
     def get_queryset(self):
         restaurant_id = self.kwargs['restaurant_id']
-        return MenuItem.objects.filter(categories__restaurant_id=restaurant_id).distinct()
+        return MenuItem.objects.for_restaurant(restaurant_id).in_menu_order(restaurant_id)
+
+    def list_rows(self, queryset):
+        return menu_item_rows(queryset.resolved(self.get_tenant_id()).translated(), resolved=True)
 
     @action(detail=True, methods=['patch'], url_path='toggle-availability')
     def toggle_availability(self, request, pk=None, restaurant_id=None):
         """
-        Acción personalizada para alternar el estado de `is_available`.
+        Acción personalizada para alternar el estado de `is_available` en este local.
         """
-        try:
-            menu_item = self.get_object()  # Obtiene el menú item por su ID
-            menu_item.is_available = not menu_item.is_available  # Alterna el valor de is_available
-            menu_item.save()
-            # Devuelve la respuesta con el estado actualizado
-            return Response({"id": menu_item.id, "is_available": menu_item.is_available}, status=status.HTTP_200_OK)
-        except MenuItem.DoesNotExist:
-            return Response({"error": "Menu item not found"}, status=status.HTTP_404_NOT_FOUND)
+        menu_item = self.get_object()
+        is_available = toggle_availability(self.get_tenant_id(), menu_item.id)
+        return Response({"id": menu_item.id, "is_available": is_available}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get', 'put', 'post'], url_path='stock')
+    def stock(self, request, pk=None, restaurant_id=None):
+        """
+        Estoc de l'ítem en aquest local: GET per consultar-lo, PUT `{"stock": 10}` per fixar-lo (null deixa
+        de portar el compte) i POST `{"quantity": 2}` per descomptar unitats venudes. Amb zero l'ítem deixa
+        d'estar disponible al local; si no en queden prou, el POST respon 409 sense descomptar res.
+        """
+        menu_item = self.get_object()
+        restaurant_id = self.get_tenant_id()
+
+        if request.method == 'PUT':
+            serializer = StockSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            set_stock(restaurant_id, menu_item.id, serializer.validated_data['stock'])
+        elif request.method == 'POST':
+            serializer = ConsumeSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            try:
+                consume(restaurant_id, menu_item.id, serializer.validated_data['quantity'])
+            except OutOfStock as e:
+                return Response({"error": str(e), "stock": e.stock}, status=status.HTTP_409_CONFLICT)
+
+        stock, is_available = MenuItem.objects.resolved(restaurant_id).filter(pk=menu_item.id) \
+            .values_list('resolved_stock', 'resolved_is_available').get()
+        serializer = StockSerializer({'id': menu_item.id, 'stock': stock, 'is_available': is_available})
+        return Response(serializer.data, status=status.HTTP_200_OK)
         
+    @action(detail=False, methods=['patch'], url_path='bulk-availability')
+    def bulk_availability(self, request, restaurant_id=None):
+        """
+        Canvia la disponibilitat al local de molts ítems alhora (per `ids` i/o `categories`) amb un sol UPDATE.
+        """
+        serializer = BulkAvailabilitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data.get('ids')
+        category_ids = serializer.validated_data.get('categories')
+
+        restaurant_id = self.get_tenant_id()
+        filters = {'categories__restaurant_id': restaurant_id, 'categories__deleted_at__isnull': True}
+        if category_ids:
+            filters['categories__in'] = category_ids
+        menu_items = MenuItem.objects.filter(**filters)
+        if ids:
+            menu_items = menu_items.filter(pk__in=ids)
+
+        is_available = serializer.validated_data['is_available']
+        changed_ids = set_availability(restaurant_id, MenuItem.objects.filter(pk__in=menu_items.values('pk')), is_available)
+        return Response({"updated": len(changed_ids), "is_available": is_available}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['patch'], url_path='bulk-price')
+    def bulk_price(self, request, restaurant_id=None):
+        """
+        Canvia el preu de tots els ítems d'unes categories amb un sol UPDATE: `{"categories": [2, 3], "percent": 5}`
+        o `{"categories": [2], "amount": "-0.50"}`. Si algun preu quedaria fora de rang, no se'n canvia cap.
+        """
+        serializer = BulkPriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            changes = adjust_prices(restaurant_id, **serializer.validated_data)
+        except InvalidPrices as e:
+            return Response({"error": str(e), "ids": e.ids}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "updated": len(changes),
+            "items": [{"id": item_id, "price": format_price(price)} for item_id, _old, price in changes],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get', 'put', 'delete'], url_path='override')
+    def override(self, request, pk=None, restaurant_id=None):
+        """
+        Preu i disponibilitat de l'ítem en aquest local: GET per consultar-los, PUT per canviar-los
+        i DELETE per tornar als de l'ítem. Els camps a null fan servir el valor de l'ítem. L'estoc
+        del local es manté.
+        """
+        menu_item = self.get_object()
+        overrides = MenuItemOverride.objects.filter(restaurant_id=restaurant_id, menu_item=menu_item)
+
+        if request.method == 'PUT':
+            serializer = MenuItemOverrideSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            # La disponibilitat que fixa el personal ja no és la de l'estoc exhaurit
+            MenuItemOverride.objects.update_or_create(
+                restaurant_id=restaurant_id, menu_item=menu_item, defaults={**serializer.validated_data, 'sold_out': False}
+            )
+        elif request.method == 'DELETE':
+            override = overrides.first()
+            if override is not None and override.stock is not None:
+                override.price = override.is_available = None
+                override.sold_out = False
+                override.save()
+            elif override is not None:
+                override.delete()
+
+        serializer = MenuItemOverrideSerializer(overrides.first() or MenuItemOverride())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='reorder')
+    def reorder(self, request, restaurant_id=None):
+        """
+        Reordena els ítems d'una categoria: `{"category": 2, "moves": [{"id": 7, "after": null}, ...]}`.
+        """
+        serializer = MenuItemReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        category = get_object_or_404(Category, pk=serializer.validated_data['category'], restaurant_id=restaurant_id)
+        links = MenuItemCategory.objects.filter(category=category)
+        moves = serializer.validated_data['moves']
+        apply_moves(links, 'menu_item_id', moves)
+        record_changes([(restaurant_id, item['id']) for item in moves], MenuDelta.MENU_ITEM)
+        menu_changed({int(restaurant_id)})
+        item_ids = links.order_by('rank', 'pk').values_list('menu_item_id', flat=True)
+        return Response({"category": category.id, "items": list(item_ids)}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'], url_path='check')
     def check_menu_item_exists(self, request, restaurant_id=None):
         item_name = request.query_params.get('name')
@@ -142,10 +582,7 @@ class MenuItemViewSet(viewsets.ModelViewSet):
             category_ids = list(map(int, category_ids))  # Convertir les categories a una llista d'enters
 
             # Busquem ítems de menú amb el mateix nom (insensible a majúscules)
-            menu_items = MenuItem.objects.filter(
-                categories__restaurant_id=restaurant_id,
-                name__iexact=item_name
-            ).distinct()
+            menu_items = MenuItem.objects.for_restaurant(restaurant_id).filter(name__iexact=item_name)
 
             # Comprovar si alguna de les categories seleccionades coincideix amb les categories de l'ítem existent
             for item in menu_items:
@@ -157,19 +594,148 @@ class MenuItemViewSet(viewsets.ModelViewSet):
     
         return Response({"error": "Missing parameters or invalid values"}, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=False, methods=['get'], url_path='public', permission_classes=[AllowAny])
+    @action(detail=False, methods=['get'], url_path='public', permission_classes=[AllowAny], public=True)
     def get_public_menu_items(self, request, restaurant_id=None):
         """
         Endpoint públic per obtenir ítems del menú d'un restaurant.
+        L'idioma es tria amb `?lang=` o `Accept-Language`, i es pot filtrar amb
+        `?max_price=&tags=&exclude_allergens=` sobre el menú de la cache.
+        """
+        language = get_request_language(request)
+        filters = {}
+        # Sense paràmetres (el cas habitual) no cal construir el serializer
+        if request.query_params:
+            query = PublicMenuFilterSerializer(data=request.query_params)
+            query.is_valid(raise_exception=True)
+            filters = query.validated_data
+
+        rows = public_menu_items(self.get_tenant_id(), language)
+        if filters:
+            rows = filter_menu_rows(rows, **filters)
+        return public_menu_response(rows)
+
+    @action(detail=False, methods=['get'], url_path='public/facets', permission_classes=[AllowAny], public=True)
+    def get_public_facets(self, request, restaurant_id=None):
         """
-        menu_items = MenuItem.objects.filter(categories__restaurant_id=restaurant_id, is_available=True).distinct()
-        serializer = self.get_serializer(menu_items, many=True)
-        return Response(serializer.data)
+        Recomptes per etiqueta, al·lergen i rang de preus del menú públic, per construir els filtres.
+        Es calculen un cop a partir dels ítems de la cache i es guarden amb el menú.
+        """
+        return public_menu_response(public_facets(self.get_tenant_id()))
+
+class AvailabilityWindowViewSet(viewsets.ModelViewSet):
+    serializer_class = AvailabilityWindowSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        restaurant_id = self.kwargs['restaurant_id']
+        return AvailabilityWindow.objects.filter(restaurant_id=restaurant_id).order_by('weekday', 'start_time')
 
-class RestaurantUserViewSet(viewsets.ModelViewSet):
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['restaurant_id'] = int(self.kwargs['restaurant_id'])
+        return context
+
+    def perform_create(self, serializer):
+        serializer.save(restaurant_id=self.kwargs['restaurant_id'])
+
+class OrderViewSet(mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet):
+    """
+    Comandes de taula. Els clients les envien sense autenticar; el personal en consulta la cua
+    i en canvia l'estat (`PATCH {"status": "accepted"}`).
+    """
+    serializer_class = OrderSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post', 'patch', 'head', 'options']
+
+    def get_permissions(self):
+        if self.action == 'create':
+            return [AllowAny()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        return Order.objects.filter(restaurant_id=self.kwargs['restaurant_id']).prefetch_related('lines')
+
+    def create(self, request, restaurant_id=None):
+        """
+        Envia una comanda: `{"table": "12", "lines": [{"id": 7, "quantity": 2, "price": "10.50"}]}`.
+        Respon 409 amb els ítems no disponibles i els preus actuals dels que han canviat.
+        """
+        serializer = OrderSubmitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            order = submit_order(int(restaurant_id), **serializer.validated_data)
+        except OrderRejected as e:
+            return Response({
+                "error": str(e),
+                "unavailable": e.unavailable,
+                "prices": {str(item_id): format_price(price) for item_id, price in e.prices.items()},
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({"id": order.id, "status": order.status, "total": format_price(order.total)},
+                        status=status.HTTP_201_CREATED)
+
+    def list(self, request, restaurant_id=None):
+        """
+        Cua de comandes obertes (o dels `?status=` demanats) per ordre d'arribada. Es pagina amb
+        `?after=<id>`: `after` de la resposta és l'última comanda retornada, per continuar o per
+        consultar només les noves.
+        """
+        query = OrderQueueSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        after = query.validated_data.get('after')
+        orders = order_queue(restaurant_id, query.validated_data.get('status') or Order.OPEN_STATUSES, after)
+        return Response({
+            "results": OrderSerializer(orders, many=True).data,
+            "after": orders[-1].id if orders else after,
+        }, status=status.HTTP_200_OK)
+
+@require_GET
+async def menu_events(request, restaurant_id):
+    """
+    Canal Server-Sent Events públic amb els canvis del menú d'un restaurant
+    (`item.availability`, `item.price`, `item.created`, `item.deleted`, `menu.changed`).
+    En reconnectar, el client ha de tornar a carregar el menú públic.
+
+    Cada client és una connexió oberta: només se serveix amb l'aplicació ASGI, on espera sense
+    ocupar cap worker. Als workers WSGI respon 503.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': "Menu events are only served by the ASGI application."}, status=503)
+    if not await Restaurant.objects.filter(pk=restaurant_id).aexists():
+        raise Http404
+    subscription = get_broadcaster().subscribe(restaurant_id)
+    response = StreamingHttpResponse(event_stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def health_response(checks, warm=False):
+    ok, results = run_checks(checks)
+    if ok and warm:
+        ok = ensure_warm()
+    return JsonResponse({'status': 'ok' if ok else 'error', 'checks': results}, status=200 if ok else 503)
+
+@require_GET
+def healthz(request):
+    """
+    El procés respon i arriba a la base de dades i a la cache.
+    """
+    return health_response(['database', 'cache'])
+
+@require_GET
+def readyz(request):
+    """
+    El worker pot rebre trànsit: a més de `healthz`, les migracions estan aplicades i el menú dels
+    restaurants més consultats ja és a la cache (la primera crida fa l'escalfament).
+    """
+    return health_response(['database', 'cache', 'migrations'], warm=True)
+
+class RestaurantUserViewSet(TenantCacheMixin, viewsets.ModelViewSet):
     serializer_class = RestaurantUserSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    tenant_cache_scope = 'users'
 
     def get_queryset(self):
         restaurant_id = self.kwargs['restaurant_id']
@@ -221,6 +787,16 @@ class RegisterView(APIView):
 
         return Response({"message": "User and restaurant created successfully."}, status=status.HTTP_201_CREATED)
     
+class MetricsView(APIView):
+    """
+    Comptadors per a monitoratge (encerts i errades de la cache, etc.). Només per a staff.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
+
 class ProtectedView(APIView):
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]